@@ -105,6 +105,22 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.getenv('HS_CACHE_LOCATION', 'memcached:11211'),
+    }
+}
+
+OTP_BACKEND = 'apps.user.otp_backends.CacheOTPBackend'
+OTP_CACHE_ALIAS = 'default'
+AUTH_TOKEN_CACHE_ALIAS = 'default'
+THROTTLE_CACHE_ALIAS = 'default'
+EMAIL_FILTER_CACHE_ALIAS = 'default'
+SIGN_UP_CACHE_ALIAS = 'default'
+EMAIL_FILTER_ERROR_RATE = float(os.getenv('HS_EMAIL_FILTER_ERROR_RATE', 0.001))
+SIGNED_ACCESS_TOKEN_KEY = os.getenv('HS_SIGNED_TOKEN_KEY', SECRET_KEY)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -124,13 +140,29 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+PASSWORD_HASHERS = [
+    'apps.user.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+# tune against a target latency with `./manage.py benchmark_password_hashers`
+PBKDF2_ITERATIONS = int(os.getenv('HS_PBKDF2_ITERATIONS', 150000))
+
+# concurrent hashes per process, see `apps.user.hashing`
+PASSWORD_HASHING_WORKERS = int(os.getenv('HS_PASSWORD_HASHING_WORKERS', 2))
+PASSWORD_HASHING_MAX_PENDING = 4
+PASSWORD_HASHING_WAIT_SECONDS = 0.5
+
 
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'oauth2_provider.contrib.rest_framework.OAuth2Authentication',
+        'apps.user.authentication.SignedTokenAuthentication',
+        'apps.user.authentication.CachedOAuth2Authentication',
     ),
 
     'DEFAULT_PERMISSION_CLASSES': [
@@ -138,7 +170,10 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_THROTTLE_RATES': {
-        'user_exists_endpoint': '5/day'
+        'user_exists_endpoint': '5/day',
+        'sign_up': {'ip': '20/hour', 'email': '5/hour', 'client_id': '600/minute'},
+        'forgot_password': {'ip': '20/hour', 'email': '5/hour', 'client_id': '600/minute'},
+        'verify_otp': {'ip': '60/hour', 'email': '20/hour', 'client_id': '1200/minute'},
     },
 
     'DEFAULT_RENDERER_CLASSES': (
@@ -188,6 +223,16 @@ EMAIL_PORT = 587
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 
+# messages a second, shared by every worker through this cache
+EMAIL_RATE_LIMIT = float(os.getenv('HS_EMAIL_RATE_LIMIT', 10))
+EMAIL_RATE_CACHE_ALIAS = 'default'
+
+# the outbox relay publishes the pending calls of these tasks as one call of
+# the batch task, so pending mails go out over one SMTP connection
+OUTBOX_BATCH_TASKS = {
+    'apps.globals.utils.email.send_mail': 'apps.globals.utils.email.send_mails',
+}
+
 DEBUG_FILE_NAME = '/var/log/hs-api/debug.log'
 
 LOGGING = {
@@ -1,7 +1,32 @@
+import hashlib
+import tempfile
 from .dev import *
 
 BROKER_BACKEND = 'memory'
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# a file instead of shared-cache memory, so parallel writers in
+# concurrency tests wait on SQLite's busy timeout instead of failing.
+# It lives in the temp dir, one per checkout, rather than in the repo
+DATABASES['default']['TEST'] = {
+    'NAME': os.path.join(tempfile.gettempdir(),
+                         f'hs-api-test-{hashlib.md5(BASE_DIR.encode()).hexdigest()[:8]}.sqlite3')
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+}
+
+# throttling stays off unless a test points this back to a real cache
+THROTTLE_CACHE_ALIAS = 'throttle'
+
 del LOGGING
+
+# build the email filter in the request's thread, which sees the test's transaction
+EMAIL_FILTER_BACKGROUND_REBUILD = False
@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 
 class EntitiesConfig(AppConfig):
-    name = 'entities'
+    name = 'apps.entities'
+    label = 'entities'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,37 @@
+# BM25 parameters of the job search, see `apps.entities.search`
+SEARCH_BM25_K1 = 1.2
+SEARCH_BM25_B = 0.75
+SEARCH_MAX_QUERY_TERMS = 10
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+# document count and average length only drift slowly, so ranking may use stale ones
+SEARCH_STATS_CACHE_SECONDS = 300
+SEARCH_REBUILD_BATCH_SIZE = 500
+# postings read per query term, highest impact first, so a search reads a bounded number of rows
+SEARCH_MAX_POSTINGS_PER_TERM = 1000
+
+SEARCH_STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it',
+    'of', 'on', 'or', 'that', 'the', 'to', 'we', 'will', 'with', 'you', 'your'
+))
+
+# how long other processes' job changes may take to reach a facet index
+FACET_INDEX_SYNC_SECONDS = 5
+FACET_DEFAULT_LIMIT = 20
+FACET_MAX_LIMIT = 100
+# share of the pk range above which a facet value's jobs are kept as a bitmap rather than
+# an array of pks, about where a 4 byte pk each takes more room than a bit per pk
+FACET_BITMAP_DENSITY = 1 / 32
+
+# most rows a bulk write takes, see `apps.entities.views.mixins.BulkWriteMixin`
+BULK_MAX_ITEMS = 100
+
+# chunked document uploads, see `apps.entities.uploads`
+UPLOAD_MAX_FILE_SIZE = 100 * 1024 * 1024
+UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024
+# bytes read from a request or a chunk at a time, so neither is held in memory
+UPLOAD_STREAM_BLOCK_SIZE = 64 * 1024
+# an upload expires this long after its last chunk
+UPLOAD_EXPIRE_SECONDS = 24 * 60 * 60
+# hex digests as uploads declare them, in either case
+SHA256_PATTERN = r'^[0-9a-fA-F]{64}$'
@@ -0,0 +1,26 @@
+from rest_framework import status
+
+
+class DocumentUploadException(Exception):
+    """A chunked upload request that cannot be taken, answered with `status_code`"""
+    status_code = status.HTTP_400_BAD_REQUEST
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        if status_code is not None:
+            self.status_code = status_code
+
+    def get_data(self):
+        return {'message': str(self)}
+
+
+class DocumentUploadOffsetConflict(DocumentUploadException):
+    """A chunk not at the offset the upload has reached, which the client resumes from"""
+    status_code = status.HTTP_409_CONFLICT
+
+    def __init__(self, offset):
+        super().__init__('Chunk is not at the upload offset.')
+        self.offset = offset
+
+    def get_data(self):
+        return {**super().get_data(), 'offset': self.offset}
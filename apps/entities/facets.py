@@ -0,0 +1,369 @@
+import heapq
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from itertools import islice
+from django.conf import settings
+from django.core.cache import caches
+
+from .constants import FACET_BITMAP_DENSITY, FACET_INDEX_SYNC_SECONDS
+from .models import Job
+
+FACET_INDEX_VERSION_KEY = 'hs:job-facets:version'
+
+# facet name -> `Job.objects.values()` lookup
+FACET_LOOKUPS = {
+    'employment_type': 'employment_type',
+    'seniority_level': 'seniority_level',
+    'location': 'location',
+    'open_to_all': 'open_to_all',
+    'assessment_based': 'assessment_based',
+    'industry': 'company__industry',
+    'skills': 'skills_required',
+}
+
+
+def _facet_value(value):
+    """Facet values are strings the way they show up in a query string"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def _popcount(bitmap: int):
+    return bin(bitmap).count('1')
+
+
+def _to_bitmap(pks):
+    if not pks:
+        return 0
+    bits = bytearray(max(pks) // 8 + 1)
+    for pk in pks:
+        bits[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _to_bytes(bitmap: int):
+    return bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+
+
+def _has(data: bytes, pk):
+    return pk >> 3 < len(data) and data[pk >> 3] >> (pk & 7) & 1
+
+
+def _in_array(pks: array, pk):
+    idx = bisect_left(pks, pk)
+    return idx < len(pks) and pks[idx] == pk
+
+
+# the set bits of every byte value, highest first
+_BYTE_BITS = [tuple(bit for bit in range(7, -1, -1) if byte >> bit & 1) for byte in range(256)]
+
+
+def _iter_pks_descending(bitmap: int):
+    data = _to_bytes(bitmap)
+    for idx in range(len(data) - 1, -1, -1):
+        if data[idx]:
+            for bit in _BYTE_BITS[data[idx]]:
+                yield idx << 3 | bit
+
+
+def _is_dense(num_pks, max_pk):
+    return num_pks > max_pk * FACET_BITMAP_DENSITY
+
+
+def _to_postings(pks, max_pk):
+    """The jobs of a value: a sorted `array` of their pks, or a bitmap if they are dense"""
+    if _is_dense(len(pks), max_pk):
+        return _to_bitmap(pks)
+    return array('I', sorted(pks))
+
+
+def _find_pks(postings, pks: set):
+    """The pks of `pks` that `postings` has"""
+    if isinstance(postings, int):
+        data = _to_bytes(postings)
+        return {pk for pk in pks if _has(data, pk)}
+    if len(postings) < len(pks):
+        return {pk for pk in postings if pk in pks}
+    return {pk for pk in pks if _in_array(postings, pk)}
+
+
+def _add_pks(postings, pks, max_pk):
+    """New postings rather than changed ones, queries may be reading the old ones"""
+    if isinstance(postings, int):
+        return postings | _to_bitmap(pks)
+    return _to_postings(sorted({*postings, *pks}), max_pk)
+
+
+def _remove_pks(postings, pks):
+    """Bitmaps stay bitmaps until the next rebuild"""
+    if isinstance(postings, int):
+        return postings & ~_to_bitmap(pks)
+    return array('I', (pk for pk in postings if pk not in pks))
+
+
+def _union(postings):
+    """ORs the postings of some values, into a set of pks unless one of them is a bitmap"""
+    if all(isinstance(value_postings, array) for value_postings in postings):
+        return set().union(*postings)
+
+    mask = 0
+    for value_postings in postings:
+        mask |= value_postings if isinstance(value_postings, int) else _to_bitmap(value_postings)
+    return mask
+
+
+def _intersect(masks):
+    """ANDs `_union` results, starting from the smallest set of pks if there is one"""
+    sets = sorted((mask for mask in masks if isinstance(mask, set)), key=len)
+    bitmaps = [mask for mask in masks if not isinstance(mask, set)]
+    if not sets:
+        matches = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            matches &= bitmap
+        return matches
+
+    matches = sets[0].intersection(*sets[1:])
+    for bitmap in bitmaps:
+        data = _to_bytes(bitmap)
+        matches = {pk for pk in matches if _has(data, pk)}
+    return matches
+
+
+class _Matches(object):
+    """
+    Jobs to count facet values among, a set of pks or a bitmap. Every value
+    is counted against the smaller of its postings and the jobs, the other
+    form of the jobs is made once, when first needed.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self._size = None
+        self._bitmap = None
+        self._bytes = None
+
+    def __len__(self):
+        if self._size is None:
+            self._size = len(self.jobs) if isinstance(self.jobs, set) else _popcount(self.jobs)
+        return self._size
+
+    def get_bitmap(self):
+        if self._bitmap is None:
+            self._bitmap = _to_bitmap(self.jobs) if isinstance(self.jobs, set) else self.jobs
+        return self._bitmap
+
+    def get_bytes(self):
+        if self._bytes is None:
+            self._bytes = _to_bytes(self.get_bitmap())
+        return self._bytes
+
+    def count(self, postings):
+        if not len(self):
+            return 0
+        if isinstance(postings, int):
+            return _popcount(self.get_bitmap() & postings)
+        if isinstance(self.jobs, set):
+            if len(postings) <= len(self.jobs):
+                return sum(1 for pk in postings if pk in self.jobs)
+            return sum(1 for pk in self.jobs if _in_array(postings, pk))
+
+        data = self.get_bytes()
+        return sum(1 for pk in postings if _has(data, pk))
+
+    def get_page(self, cursor, limit):
+        """Up to `limit` pks below `cursor`, highest first"""
+        if isinstance(self.jobs, set):
+            return heapq.nlargest(limit, (pk for pk in self.jobs
+                                          if cursor is None or pk < cursor))
+
+        page = self.jobs
+        if cursor is not None:
+            page &= (1 << max(cursor, 0)) - 1
+        return list(islice(_iter_pks_descending(page), limit))
+
+
+class FacetIndex(object):
+    """
+    Per-process facet index of jobs. Every facet value keeps the pks of its
+    jobs, as a sorted `array` while they are few and as a bitmap, a Python
+    int with bit `pk` set, once they make up more than `FACET_BITMAP_DENSITY`
+    of the pk range. Either way a value takes at most about `max(Job.pk) / 8`
+    bytes, and the many rare values (locations, skills) far less. Besides a
+    bitmap of every job, that is all it keeps: there is no map from a job to
+    its values.
+
+    A query ANDs the ORs of the picked values of each facet, and counts the
+    values of a facet against the other facets' picks, so picking a value
+    does not zero out its siblings. Picks of sparse values only are matched
+    as sets of pks, without touching a bitmap of the whole pk range. Every
+    value is counted once per query, against the matches, or the other
+    facets' picks for a picked facet.
+
+    Jobs saved in this process are updated in place once their transaction
+    commits. Every change also moves a version stamp in the shared cache, and
+    processes that see it moved by someone else rebuild from the DB, at most
+    once every `sync_seconds`.
+    """
+    _UNSYNCED = object()
+
+    def __init__(self, sync_seconds=FACET_INDEX_SYNC_SECONDS):
+        self.sync_seconds = sync_seconds
+        self._lock = threading.Lock()
+        self._version = self._UNSYNCED
+        self._checked_at = None
+        self._postings = None
+        self._every_job = 0
+        self._unfiltered_counts = None
+        self._revision = 0
+
+    def _get_cache(self):
+        return caches[getattr(settings, 'SEARCH_CACHE_ALIAS', 'default')]
+
+    def _load_values(self, jobs):
+        """Returns the pks of `jobs` by facet and value, and the pks of every one of them
+        """
+        value_pks = {facet: {} for facet in FACET_LOOKUPS}
+        pks = set()
+        for facet, lookup in FACET_LOOKUPS.items():
+            for pk, value in jobs.values_list('pk', lookup):
+                pks.add(pk)
+                if value is not None:
+                    value_pks[facet].setdefault(_facet_value(value), []).append(pk)
+        return value_pks, pks
+
+    def rebuild(self):
+        cache = self._get_cache()
+        cache.add(FACET_INDEX_VERSION_KEY, 0, None)
+        # read before the rows, so changes made meanwhile trigger another rebuild
+        version = cache.get(FACET_INDEX_VERSION_KEY)
+
+        value_pks, pks = self._load_values(Job.objects.all())
+        every_job = _to_bitmap(pks)
+        max_pk = every_job.bit_length()
+        postings = {
+            facet: {value: _to_postings(facet_pks, max_pk) for value, facet_pks in values.items()}
+            for facet, values in value_pks.items()
+        }
+
+        with self._lock:
+            self._postings, self._every_job = postings, every_job
+            self._unfiltered_counts = None
+            self._revision += 1
+            self._version, self._checked_at = version, time.monotonic()
+
+    def sync(self):
+        if self._postings is not None and time.monotonic() - self._checked_at < self.sync_seconds:
+            return
+
+        self._checked_at = time.monotonic()
+        if self._postings is None or \
+           self._get_cache().get(FACET_INDEX_VERSION_KEY) != self._version:
+            self.rebuild()
+
+    def _bump_version(self):
+        cache = self._get_cache()
+        cache.add(FACET_INDEX_VERSION_KEY, 0, None)
+        try:
+            version = cache.incr(FACET_INDEX_VERSION_KEY)
+        except ValueError:
+            return
+
+        with self._lock:
+            # otherwise someone else changed jobs too, and the next sync rebuilds
+            if self._version == version - 1:
+                self._version = version
+
+    def update_jobs(self, pks):
+        """
+        Reloads the facet values of the jobs with `pks`, deleted ones drop
+        out. Without a map from jobs to values, every value's postings are
+        checked for the jobs, each against the smaller of the two.
+        """
+        pks = set(pks)
+        if self._postings is not None:
+            value_pks, existing_pks = self._load_values(Job.objects.filter(pk__in=pks))
+            with self._lock:
+                self._unfiltered_counts = None
+                self._revision += 1
+
+                # only jobs coming or going copy the bitmap of every job
+                indexed_pks = _find_pks(self._every_job, pks)
+                if indexed_pks != existing_pks:
+                    self._every_job = _remove_pks(self._every_job, indexed_pks - existing_pks) \
+                        | _to_bitmap(existing_pks - indexed_pks)
+                max_pk = self._every_job.bit_length()
+
+                for facet, values in self._postings.items():
+                    new_values = value_pks[facet]
+                    for value, postings in list(values.items()):
+                        had_pks = _find_pks(postings, pks)
+                        has_pks = set(new_values.pop(value, ()))
+                        if had_pks - has_pks:
+                            postings = _remove_pks(postings, had_pks - has_pks)
+                        if has_pks - had_pks:
+                            postings = _add_pks(postings, has_pks - had_pks, max_pk)
+
+                        if postings:
+                            values[value] = postings
+                        else:
+                            del values[value]
+                    for value, value_pks_added in new_values.items():
+                        values[value] = _to_postings(value_pks_added, max_pk)
+        self._bump_version()
+
+    def query(self, filters, cursor=None, limit=20):
+        """
+        `filters` maps facets to the values to match, any of them within a
+        facet and every facet. Returns the number of matches, up to `limit`
+        of their pks below `cursor` highest first, and the counts per facet value.
+        """
+        self.sync()
+        with self._lock:
+            postings = {facet: dict(values) for facet, values in self._postings.items()}
+            every_job = self._every_job
+            unfiltered_counts, revision = self._unfiltered_counts, self._revision
+
+        masks = {}
+        for facet, values in filters.items():
+            masks[facet] = _union([postings[facet][value] for value in values
+                                   if value in postings[facet]])
+
+        matches = _Matches(_intersect(list(masks.values())) if masks else every_job)
+        if not masks and unfiltered_counts is not None:
+            facet_counts = unfiltered_counts
+        else:
+            facet_counts = {}
+            for facet, values in postings.items():
+                if facet in masks and len(masks) == 1 and unfiltered_counts is not None:
+                    facet_counts[facet] = unfiltered_counts[facet]
+                    continue
+
+                jobs = matches
+                if facet in masks:
+                    other_masks = [mask for other_facet, mask in masks.items()
+                                   if other_facet != facet]
+                    jobs = _Matches(_intersect(other_masks) if other_masks else every_job)
+                facet_counts[facet] = {value: count for value, count in (
+                    (value, jobs.count(value_postings)) for value, value_postings in values.items()
+                ) if count}
+
+        if not masks:
+            with self._lock:
+                if revision == self._revision:
+                    self._unfiltered_counts = facet_counts
+
+        return len(matches), matches.get_page(cursor, limit), facet_counts
+
+    def clear(self):
+        with self._lock:
+            self._postings = self._checked_at = None
+            self._every_job = 0
+            self._unfiltered_counts = None
+            self._revision += 1
+            self._version = self._UNSYNCED
+
+
+facet_index = FacetIndex()
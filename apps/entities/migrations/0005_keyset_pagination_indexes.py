@@ -0,0 +1,25 @@
+# Generated by Django 2.2.13 on 2026-10-18 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entities', '0004_userdocument_owner'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['created_at', 'id'], name='entities_co_created_6b212c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['created_at', 'id'], name='entities_jo_created_02536f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['created_at', 'id'], name='entities_jo_created_5e9729_idx'),
+        ),
+    ]
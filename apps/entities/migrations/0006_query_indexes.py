@@ -0,0 +1,25 @@
+# Generated by Django 2.2.13 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entities', '0005_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='education',
+            index=models.Index(fields=['user', '-start_date', '-id'], name='entities_ed_user_id_7214d6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experience',
+            index=models.Index(fields=['user', '-start_date', '-id'], name='entities_ex_user_id_2409a7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['applicant', 'job'], name='entities_jo_applica_03c9cf_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.13 on 2026-10-18 03:57
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, OuterRef, Subquery
+
+
+def set_impact(apps, schema_editor):
+    JobSearchDocument = apps.get_model('entities', 'JobSearchDocument')
+    JobSearchPosting = apps.get_model('entities', 'JobSearchPosting')
+    length = JobSearchDocument.objects.filter(pk=OuterRef('document_id')).values('length')
+    JobSearchPosting.objects.filter(document__length__gt=0).update(impact=ExpressionWrapper(
+        F('frequency') * 1.0 / Subquery(length), output_field=models.FloatField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entities', '0008_document_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobsearchposting',
+            name='impact',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(set_impact, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='jobsearchposting',
+            index=models.Index(fields=['term', '-impact'], name='entities_jo_term_084b12_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.13 on 2026-10-18 04:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entities', '0009_job_search_impact'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentblob',
+            name='file',
+            field=models.FileField(db_index=True, max_length=255, upload_to=''),
+        ),
+        migrations.AlterField(
+            model_name='userdocument',
+            name='document',
+            field=models.FileField(db_index=True, upload_to=''),
+        ),
+    ]
@@ -1,4 +1,6 @@
+import uuid
 from django.db import models
+from django.utils import timezone
 from apps.user.models import User
 
 
@@ -35,6 +37,10 @@ class Company(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # keyset pagination, see `apps.globals.pagination.KeysetPagination`
+        indexes = [models.Index(fields=['created_at', 'id'])]
+
     @classmethod
     def get_all(cls):
         return cls.objects.all()
@@ -51,13 +57,17 @@ class Experience(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # a user's entries, latest first
+        indexes = [models.Index(fields=['user', '-start_date', '-id'])]
+
     @classmethod
     def get_all(cls):
         return cls.objects.all()
 
     @staticmethod
     def get_user_experiences(user_id):
-        return Experience.objects.filter(user__id=user_id)
+        return Experience.objects.filter(user__id=user_id).order_by('-start_date', '-id')
 
 
 class Education(models.Model):
@@ -73,13 +83,17 @@ class Education(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # a user's entries, latest first
+        indexes = [models.Index(fields=['user', '-start_date', '-id'])]
+
     @classmethod
     def get_all(cls):
         return cls.objects.all()
 
     @staticmethod
     def get_user_education(user_id):
-        return Education.objects.filter(user__id=user_id)
+        return Education.objects.filter(user__id=user_id).order_by('-start_date', '-id')
 
     @staticmethod
     def is_users_education(user: User, education_instance):
@@ -92,7 +106,7 @@ class UserDocument(models.Model):
                                    related_name='related_documents')
     education = models.ForeignKey(Education, on_delete=models.CASCADE, null=True,
                                   related_name='related_documents')
-    document = models.FileField(null=False)
+    document = models.FileField(null=False, db_index=True)
     doc_type = models.CharField(max_length=15, blank=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -115,6 +129,51 @@ class UserDocument(models.Model):
         return user_document.owner == user
 
 
+class DocumentBlob(models.Model):
+    """A stored file, shared by every `UserDocument` with its content"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    file = models.FileField(max_length=255, db_index=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class DocumentUpload(models.Model):
+    """A chunked upload of a `UserDocument`, see `apps.entities.uploads`"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='document_uploads')
+    experience = models.ForeignKey(Experience, on_delete=models.CASCADE, null=True,
+                                   related_name='document_uploads')
+    education = models.ForeignKey(Education, on_delete=models.CASCADE, null=True,
+                                  related_name='document_uploads')
+    doc_type = models.CharField(max_length=15, blank=False)
+    file_name = models.CharField(max_length=100)
+    size = models.BigIntegerField()
+    # SHA-256 of the whole file, not named so as the camel case parser would make it `sha_256`
+    checksum = models.CharField(max_length=64)
+    # bytes received so far, chunks are only taken at this offset
+    offset = models.BigIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def get_users_upload(cls, user: User, pk):
+        return cls.objects.filter(owner=user, pk=pk, expires_at__gt=timezone.now()).first()
+
+
+class DocumentUploadChunk(models.Model):
+    """The bytes of an upload from `offset` on, stored as they arrived"""
+    upload = models.ForeignKey(DocumentUpload, on_delete=models.CASCADE, related_name='chunks')
+    offset = models.BigIntegerField()
+    size = models.PositiveIntegerField()
+    file = models.FileField(max_length=255)
+
+    class Meta:
+        unique_together = ('upload', 'offset')
+
+
 class Job(models.Model):
     company = models.ForeignKey(Company, on_delete=models.PROTECT, null=True, related_name='jobs')
     profession = models.ForeignKey(Profession, on_delete=models.PROTECT,
@@ -132,10 +191,23 @@ class Job(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination, see `apps.globals.pagination.KeysetPagination`
+            models.Index(fields=['created_at', 'id']),
+        ]
+
     @classmethod
     def get_all(cls):
         return cls.objects.all()
 
+    @classmethod
+    def get_all_with_relations(cls):
+        """Everything `JobReadSerializer` reads, in two queries"""
+        return cls.objects.select_related(
+            'company', 'profession', 'poster'
+        ).prefetch_related('skills_required')
+
 
 class JobApplication(models.Model):
     # TODO: Should this be CASCADED on job deletion?
@@ -149,10 +221,47 @@ class JobApplication(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination, see `apps.globals.pagination.KeysetPagination`
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['applicant', 'job']),
+        ]
+
     @classmethod
     def get_all(cls):
         return cls.objects.all()
 
+    @classmethod
+    def get_all_with_relations(cls):
+        """Everything `JobApplicationReadSerializer` reads, in one query"""
+        return cls.objects.select_related(
+            'job__company', 'job__profession', 'applicant'
+        )
+
     @staticmethod
     def is_users_job_application(user: User, job_application):
         return job_application.applicant == user
+
+
+class JobSearchDocument(models.Model):
+    """Per-job statistics of the search index, see `apps.entities.search`"""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, primary_key=True,
+                               related_name='search_document')
+    length = models.PositiveIntegerField()
+
+
+class JobSearchPosting(models.Model):
+    """One term of a job's searchable text and how often it occurs there"""
+    document = models.ForeignKey(JobSearchDocument, on_delete=models.CASCADE,
+                                 related_name='postings')
+    term = models.CharField(max_length=50)
+    frequency = models.PositiveIntegerField()
+    # `frequency / length`, the order a search reads a term's postings in
+    impact = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ('term', 'document')
+        indexes = [
+            models.Index(fields=['term', '-impact']),
+        ]
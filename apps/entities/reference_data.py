@@ -0,0 +1,118 @@
+"""
+Per-process snapshots of the reference tables, professions, companies and
+skills, which are read far more often than they are written.
+
+A snapshot is an immutable copy of a table's rows, as `.values()` dicts,
+with the version it was loaded at. Every table has a version counter in
+the shared cache, which the signals in `apps.entities.signals` move when
+a row is saved or deleted. A read compares the counter with its snapshot's
+and reloads the table when they differ, so every process picks up a change
+on its next read. Changes that skip signals, like `QuerySet.update()`,
+need `reference_data.invalidate(model)`.
+"""
+import hashlib
+import threading
+from types import MappingProxyType
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Company, Profession, Skill
+
+REFERENCE_MODELS = (Profession, Company, Skill)
+
+
+class ReferenceSnapshot(object):
+    """The rows of a table at `version`, in pk order, newest first, and by pk"""
+
+    def __init__(self, model, version, rows):
+        self.model = model
+        self.version = version
+        self.rows = tuple(rows)
+        self.newest_first = tuple(sorted(self.rows, key=lambda row: (row['created_at'], row['pk']),
+                                         reverse=True))
+        self.by_pk = MappingProxyType({row['pk']: row for row in self.rows})
+        self.lookups = frozenset(self.rows[0]) if self.rows else frozenset()
+        self._digest = None
+
+    @property
+    def digest(self):
+        """Hash of the rows' `pk` and `updated_at`, like the validators of `ConditionalGetMixin`
+        """
+        if self._digest is None:
+            stamps = [(row['pk'], row['updated_at']) for row in self.rows]
+            self._digest = hashlib.md5(repr(stamps).encode()).hexdigest()
+        return self._digest
+
+
+class ReferenceDataCache(object):
+    """
+    Snapshots of `models`, loaded lazily and kept until their version moves.
+    Snapshots loaded inside a transaction are not kept, as they may hold
+    rows that are never committed.
+    """
+
+    def __init__(self, models=REFERENCE_MODELS):
+        self.models = models
+        self._lock = threading.Lock()
+        self._snapshots = {}
+
+    def _get_cache(self):
+        return caches[getattr(settings, 'REFERENCE_DATA_CACHE_ALIAS', 'default')]
+
+    def _get_version_key(self, model):
+        return f'hs:reference-data:{model._meta.label_lower}:version'
+
+    def _get_version(self, model):
+        cache = self._get_cache()
+        key = self._get_version_key(model)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, 0, None)
+            version = cache.get(key)
+        return version
+
+    def _load(self, model, version):
+        fields = [field.name for field in model._meta.concrete_fields]
+        return ReferenceSnapshot(model, version,
+                                 model.objects.order_by('pk').values('pk', *fields))
+
+    def get(self, model):
+        """The snapshot of `model`, reloaded if its version moved
+        """
+        version = self._get_version(model)
+        snapshot = self._snapshots.get(model)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        # the version is read before the rows, so changes made meanwhile trigger another reload
+        snapshot = self._load(model, version)
+        if not transaction.get_connection().in_atomic_block:
+            with self._lock:
+                self._snapshots[model] = snapshot
+        return snapshot
+
+    def _bump_version(self, model):
+        cache = self._get_cache()
+        key = self._get_version_key(model)
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+    def invalidate(self, model):
+        """
+        Moves the version of `model` now, so the current transaction reads
+        its own changes, and again once it commits, for processes that
+        reloaded in between.
+        """
+        self._bump_version(model)
+        transaction.on_commit(lambda: self._bump_version(model))
+
+    def clear(self):
+        with self._lock:
+            self._snapshots = {}
+
+
+reference_data = ReferenceDataCache()
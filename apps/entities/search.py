@@ -0,0 +1,180 @@
+"""
+Full-text job search over an inverted index kept in the DB.
+
+Every job has a `JobSearchDocument` with the number of terms in its text,
+and one `JobSearchPosting` per distinct term. A search reads at most
+`SEARCH_MAX_POSTINGS_PER_TERM` postings of each of its terms, highest
+`frequency / length` first through the `(term, -impact)` index, and ranks
+the jobs with BM25. Its cost is bounded whatever the number of jobs, at the
+price of missing jobs outside the top postings of every term they match.
+Document count and average length come from the cache.
+
+Signals in `apps.entities.signals` reindex a job when it or its skills
+change, and have `index_jobs_for_search` reindex the jobs of a renamed
+company, profession or skill. Changes that skip signals, like
+`QuerySet.update()`, need `./manage.py rebuild_job_search_index`.
+"""
+import heapq
+import math
+import re
+from collections import Counter
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .constants import (
+    SEARCH_BM25_B,
+    SEARCH_BM25_K1,
+    SEARCH_MAX_POSTINGS_PER_TERM,
+    SEARCH_MAX_QUERY_TERMS,
+    SEARCH_REBUILD_BATCH_SIZE,
+    SEARCH_STATS_CACHE_SECONDS,
+    SEARCH_STOP_WORDS
+)
+from .models import Job, JobSearchDocument, JobSearchPosting
+
+STATS_CACHE_KEY = 'hs:job-search:stats'
+TERM_PATTERN = re.compile(r'\w+')
+MAX_TERM_LENGTH = JobSearchPosting._meta.get_field('term').max_length
+
+
+def _get_cache():
+    return caches[getattr(settings, 'SEARCH_CACHE_ALIAS', 'default')]
+
+
+def tokenize(text: str):
+    return [
+        term[:MAX_TERM_LENGTH]
+        for term in TERM_PATTERN.findall(text.lower())
+        if len(term) > 1 and term not in SEARCH_STOP_WORDS
+    ]
+
+
+def get_job_text(job: Job):
+    """The searchable text of a job, related names included"""
+    texts = [job.description, job.location, job.employment_type, job.seniority_level]
+    if job.company:
+        texts.append(job.company.name)
+    if job.profession:
+        texts.append(job.profession.name)
+    texts.extend(skill.name for skill in job.skills_required.all())
+    return ' '.join(texts)
+
+
+def _get_postings(document: JobSearchDocument, term_frequencies: Counter):
+    return [
+        JobSearchPosting(document=document, term=term, frequency=frequency,
+                         impact=frequency / document.length)
+        for term, frequency in term_frequencies.items()
+    ]
+
+
+def index_job(job: Job):
+    term_frequencies = Counter(tokenize(get_job_text(job)))
+    with transaction.atomic():
+        document, created = JobSearchDocument.objects.update_or_create(
+            job=job, defaults={'length': sum(term_frequencies.values())})
+        if not created:
+            document.postings.all().delete()
+        JobSearchPosting.objects.bulk_create(_get_postings(document, term_frequencies))
+
+
+def index_jobs(jobs, batch_size=SEARCH_REBUILD_BATCH_SIZE):
+    """Reindexes `jobs` a batch at a time, returns the number of jobs indexed
+    """
+    num_jobs = 0
+    jobs = jobs.select_related('company', 'profession') \
+        .prefetch_related('skills_required').order_by('pk')
+
+    last_pk = 0
+    while True:
+        batch = list(jobs.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        for job in batch:
+            index_job(job)
+        num_jobs += len(batch)
+        last_pk = batch[-1].pk
+    return num_jobs
+
+
+def rebuild(batch_size=SEARCH_REBUILD_BATCH_SIZE):
+    """Indexes every job from scratch, returns the number of jobs indexed
+    """
+    num_jobs = 0
+    jobs = Job.objects.select_related('company', 'profession') \
+        .prefetch_related('skills_required').order_by('pk')
+
+    with transaction.atomic():
+        JobSearchDocument.objects.all().delete()
+
+        last_pk = 0
+        while True:
+            batch = list(jobs.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+
+            documents, postings = [], []
+            for job in batch:
+                term_frequencies = Counter(tokenize(get_job_text(job)))
+                document = JobSearchDocument(job=job, length=sum(term_frequencies.values()))
+                documents.append(document)
+                postings.extend(_get_postings(document, term_frequencies))
+
+            JobSearchDocument.objects.bulk_create(documents)
+            JobSearchPosting.objects.bulk_create(postings, batch_size=batch_size)
+            num_jobs += len(batch)
+            last_pk = batch[-1].pk
+
+    _get_cache().delete(STATS_CACHE_KEY)
+    return num_jobs
+
+
+def get_collection_stats():
+    """Returns the number of indexed jobs and their average length
+    """
+    cache = _get_cache()
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        aggregate = JobSearchDocument.objects.aggregate(num_documents=Count('pk'),
+                                                        total_length=Sum('length'))
+        num_documents = aggregate['num_documents']
+        stats = (num_documents, (aggregate['total_length'] or 0) / max(num_documents, 1))
+        cache.set(STATS_CACHE_KEY, stats, SEARCH_STATS_CACHE_SECONDS)
+    return stats
+
+
+def search(query: str, limit: int):
+    """Returns up to `limit` `(job_id, score)` pairs, best match first
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:SEARCH_MAX_QUERY_TERMS]
+    num_documents, average_length = get_collection_stats()
+    if not terms or not num_documents:
+        return []
+
+    postings, document_frequencies = [], {}
+    for term in terms:
+        term_postings = list(JobSearchPosting.objects.filter(term=term).order_by('-impact')
+                             .values_list('term', 'document_id', 'frequency', 'document__length')
+                             [:SEARCH_MAX_POSTINGS_PER_TERM])
+        postings.extend(term_postings)
+        document_frequencies[term] = len(term_postings)
+
+    # only terms with more postings than were read need counting
+    capped_terms = [term for term in terms
+                    if document_frequencies[term] == SEARCH_MAX_POSTINGS_PER_TERM]
+    if capped_terms:
+        document_frequencies.update(
+            JobSearchPosting.objects.filter(term__in=capped_terms).values('term')
+            .annotate(num_documents=Count('pk')).values_list('term', 'num_documents'))
+
+    scores = Counter()
+    for term, job_id, frequency, length in postings:
+        document_frequency = document_frequencies[term]
+        idf = math.log(1 + (num_documents - document_frequency + 0.5) / (document_frequency + 0.5))
+        length_norm = 1 - SEARCH_BM25_B + SEARCH_BM25_B * length / max(average_length, 1)
+        scores[job_id] += idf * frequency * (SEARCH_BM25_K1 + 1) \
+            / (frequency + SEARCH_BM25_K1 * length_norm)
+
+    return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
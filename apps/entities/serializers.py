@@ -1,6 +1,8 @@
 from rest_framework import serializers
-from .models import (Profession, Company, Experience, Education,
-                     UserDocument, Job, JobApplication)
+from apps.user.models import User
+from .constants import SHA256_PATTERN, UPLOAD_MAX_FILE_SIZE
+from .models import (Skill, Profession, Company, Experience, Education,
+                     UserDocument, DocumentUpload, Job, JobApplication)
 
 
 class ProfessionSerializer(serializers.ModelSerializer):
@@ -44,3 +46,131 @@ class JobApplicationSerializer(serializers.ModelSerializer):
     class Meta:
         model = JobApplication
         fields = '__all__'
+
+
+class SkillSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Skill
+        fields = ('id', 'name')
+
+
+class ProfessionSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Profession
+        fields = ('id', 'name', 'industry')
+
+
+class CompanySummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Company
+        fields = ('id', 'name', 'logo')
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id'] + User.get_public_fields()
+
+
+class JobSummarySerializer(serializers.ModelSerializer):
+    company = CompanySummarySerializer(read_only=True)
+    profession = ProfessionSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Job
+        fields = ('id', 'company', 'profession', 'location', 'employment_type',
+                  'seniority_level', 'end_date')
+
+
+class JobReadSerializer(serializers.ModelSerializer):
+    """Nested read-only `Job`, expects `Job.get_all_with_relations()` rows"""
+    company = CompanySummarySerializer(read_only=True)
+    profession = ProfessionSummarySerializer(read_only=True)
+    poster = UserSummarySerializer(read_only=True)
+    skills_required = SkillSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Job
+        fields = '__all__'
+
+
+class JobApplicationReadSerializer(serializers.ModelSerializer):
+    """Nested read-only `JobApplication`, expects `JobApplication.get_all_with_relations()` rows"""
+    job = JobSummarySerializer(read_only=True)
+    applicant = UserSummarySerializer(read_only=True)
+
+    class Meta:
+        model = JobApplication
+        fields = '__all__'
+
+
+class ProfileExperienceSerializer(serializers.ModelSerializer):
+    profession = ProfessionSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Experience
+        exclude = ('user',)
+
+
+class ProfileEducationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Education
+        exclude = ('user',)
+
+
+class UserDocumentMetadataSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserDocument
+        exclude = ('owner', 'document')
+
+
+class DocumentUploadSerializer(serializers.ModelSerializer):
+    size = serializers.IntegerField(min_value=1, max_value=UPLOAD_MAX_FILE_SIZE)
+    checksum = serializers.RegexField(SHA256_PATTERN)
+
+    class Meta:
+        model = DocumentUpload
+        exclude = ('owner',)
+        read_only_fields = ('offset', 'expires_at', 'created_at', 'updated_at')
+
+    def validate_checksum(self, value):
+        return value.lower()
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        for field in ('experience', 'education'):
+            if attrs.get(field) is not None and attrs[field].user_id != user.pk:
+                raise serializers.ValidationError({field: 'Not one of your own.'})
+        return attrs
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves pks from `context['prefetched'][model]`, so a bulk write
+    looks up the rows all its items reference in one query.
+    """
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched', {}).get(self.get_queryset().model)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        try:
+            return prefetched[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class ExperienceBulkItemSerializer(ExperienceSerializer):
+    """An item of a bulk write, `id` picks the user's experience to update"""
+    id = serializers.IntegerField(required=False, min_value=1)
+    profession = PrefetchedPrimaryKeyRelatedField(queryset=Profession.objects.all())
+
+
+class EducationBulkItemSerializer(EducationSerializer):
+    """An item of a bulk write, `id` picks the user's education to update"""
+    id = serializers.IntegerField(required=False, min_value=1)
+
+    class Meta(EducationSerializer.Meta):
+        read_only_fields = ('user',)
@@ -0,0 +1,92 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.user.models import OutboxMessage
+from .facets import facet_index
+from .models import Company, Job, Profession, Skill, UserDocument
+from .reference_data import reference_data
+from .search import index_job
+from .tasks import index_jobs_for_search
+from .uploads import delete_unused_blobs
+
+
+def update_job_facets(pks):
+    """The facet index lives in memory, so only committed changes go in"""
+    pks = list(pks)
+    transaction.on_commit(lambda: facet_index.update_jobs(pks))
+
+
+def reindex_jobs(pks):
+    """Jobs sharing a company, profession or skill can be many, so a task reindexes them"""
+    pks = list(pks)
+    if pks:
+        OutboxMessage.enqueue(index_jobs_for_search, pks)
+
+
+@receiver(post_save, sender=Job)
+def index_saved_job(sender, instance, **kwargs):
+    index_job(instance)
+    update_job_facets([instance.pk])
+
+
+@receiver(post_delete, sender=Job)
+def remove_job_facets(sender, instance, **kwargs):
+    update_job_facets([instance.pk])
+
+
+@receiver(m2m_changed, sender=Job.skills_required.through)
+def index_job_skills(sender, instance, action, reverse, pk_set=None, **kwargs):
+    if reverse and action == 'pre_clear':
+        # `post_clear` does not say which jobs lost the skill
+        instance._cleared_job_pks = list(instance.job_set.values_list('pk', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    pks = [instance.pk]
+    if reverse and action == 'post_clear':
+        pks = getattr(instance, '_cleared_job_pks', [])
+    elif reverse:
+        pks = pk_set
+
+    # skills are part of a job, so are its validators, see `ConditionalGetMixin`
+    Job.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+    if reverse:
+        reindex_jobs(pks)
+    else:
+        index_job(instance)
+    update_job_facets(pks)
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Profession)
+@receiver(post_save, sender=Skill)
+def index_named_jobs(sender, instance, created, **kwargs):
+    """Jobs are indexed with the names of their company, profession and skills"""
+    if created:
+        return
+    jobs = instance.job_set.all() if sender is Skill else instance.jobs.all()
+    pks = list(jobs.values_list('pk', flat=True))
+    reindex_jobs(pks)
+
+    if sender is Company:
+        # jobs are faceted by their company's industry
+        update_job_facets(pks)
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Profession)
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Company)
+@receiver(post_delete, sender=Profession)
+@receiver(post_delete, sender=Skill)
+def invalidate_reference_data(sender, **kwargs):
+    reference_data.invalidate(sender)
+
+
+@receiver(post_delete, sender=UserDocument)
+def delete_document_blob(sender, instance, **kwargs):
+    """Documents with the same content share a blob, it goes with the last of them"""
+    names = [instance.document.name]
+    transaction.on_commit(lambda: delete_unused_blobs(names))
@@ -0,0 +1,34 @@
+from celery import task
+from celery.utils.log import get_task_logger
+from django.utils import timezone
+
+from apps.globals.utils.db import delete_in_batches
+from apps.user.constants import PURGE_BATCH_SIZE, PURGE_TIME_BUDGET_SECONDS
+from .models import DocumentUpload, Job
+from .search import index_jobs
+from .uploads import delete_uploads
+
+logging = get_task_logger(__name__)
+
+
+def _delete_uploads(model, pks):
+    return delete_uploads(pks)
+
+
+@task()
+def remove_expired_document_uploads(batch_size=PURGE_BATCH_SIZE,
+                                    time_budget=PURGE_TIME_BUDGET_SECONDS):
+    """Uploads never completed, with their stored chunks"""
+    queryset = DocumentUpload.objects.filter(expires_at__lte=timezone.now())
+    num_deleted, elapsed = delete_in_batches(queryset, batch_size=batch_size,
+                                             time_budget=time_budget, delete=_delete_uploads)
+    logging.info(f'Document Uploads Deleted: {num_deleted} in {elapsed:.2f}s')
+    return num_deleted
+
+
+@task()
+def index_jobs_for_search(pks):
+    """Reindexes the jobs `pks` for search, see `apps.entities.signals`"""
+    num_indexed = index_jobs(Job.objects.filter(pk__in=pks))
+    logging.info(f'Jobs Indexed for Search: {num_indexed}')
+    return num_indexed
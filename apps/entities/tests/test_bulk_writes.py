@@ -0,0 +1,137 @@
+from datetime import date
+from django.db import connection
+from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from apps.user.models import User
+from ..constants import BULK_MAX_ITEMS
+from ..models import Education, Experience, Profession, Skill
+
+
+class BulkWritesTestCase(APITestCase):
+    # the Profession lookup, one INSERT, and reading back the new pks on SQLite
+    IMPORT_QUERIES = 3
+
+    def setUp(self):
+        self.user = User.objects.create(username='oort', email='oort@oort.com')
+        self.professions = [Profession.objects.create(name=f'profession {idx}',
+                                                      industry='software') for idx in range(3)]
+        self.client.force_authenticate(self.user)
+
+    def _post(self, url, items):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, items, format='json')
+        # the savepoints come from the test's own transaction
+        queries = [query['sql'] for query in context.captured_queries
+                   if not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))]
+        return response, queries
+
+    def _experience(self, idx, **kwargs):
+        return {
+            'profession': self.professions[idx % 3].pk,
+            'start_date': f'20{idx:02d}-01-01',
+            'description': f'experience {idx}',
+            **kwargs
+        }
+
+    def test_profile_import(self):
+        """Should create 30 experiences in a handful of queries and answer their ids in order
+        """
+        url = reverse('experience-bulk', args=[self.user.pk])
+        response, queries = self._post(url, [self._experience(idx) for idx in range(30)])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), self.IMPORT_QUERIES, '\n'.join(queries))
+        results = response.data['results']
+        self.assertEqual({result['status'] for result in results}, {'created'})
+        experiences = Experience.objects.in_bulk([result['id'] for result in results])
+        self.assertEqual([experiences[result['id']].description for result in results],
+                         [f'experience {idx}' for idx in range(30)])
+        self.assertEqual({experience.user_id for experience in experiences.values()},
+                         {self.user.pk})
+
+    def test_create_and_update(self):
+        """Should update the items with an id and create the others in one request
+        """
+        education = Education.objects.create(user=self.user, degree='BSc', field='physics',
+                                             institute='MIT', start_date=date(2010, 1, 1))
+        updated_at = education.updated_at
+        url = reverse('education-bulk', args=[self.user.pk])
+        response, queries = self._post(url, [
+            {'id': education.pk, 'degree': 'MSc', 'field': 'physics', 'institute': 'MIT',
+             'start_date': '2012-01-01'},
+            {'degree': 'PhD', 'field': 'physics', 'institute': 'ETH',
+             'start_date': '2014-01-01'},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), 4, '\n'.join(queries))
+        self.assertEqual(response.data['results'][0], {'id': education.pk, 'status': 'updated'})
+        self.assertEqual(response.data['results'][1]['status'], 'created')
+
+        education.refresh_from_db()
+        self.assertEqual(education.degree, 'MSc')
+        self.assertEqual(education.start_date, date(2012, 1, 1))
+        self.assertGreater(education.updated_at, updated_at)
+        self.assertEqual(Education.objects.get(pk=response.data['results'][1]['id']).degree,
+                         'PhD')
+
+    def test_invalid_items(self):
+        """Should write nothing and tell which items are wrong
+        """
+        other_user = User.objects.create(username='hs', email='hs@hs.cm')
+        others_experience = Experience.objects.create(
+            user=other_user, profession=self.professions[0], start_date=date(2010, 1, 1))
+        url = reverse('experience-bulk', args=[self.user.pk])
+        response, _ = self._post(url, [
+            self._experience(0),
+            self._experience(1, profession=0),
+            self._experience(2, id=others_experience.pk),
+            self._experience(3, start_date='yesterday'),
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results],
+                         ['skipped', 'invalid', 'invalid', 'invalid'])
+        self.assertIn('profession', results[1]['errors'])
+        self.assertEqual(list(results[2]['errors']), ['id'])
+        self.assertIn('start_date', results[3]['errors'])
+        self.assertFalse(Experience.objects.filter(user=self.user).exists())
+
+    def test_bad_requests(self):
+        """Should refuse other users' rows and requests that are not a list of items
+        """
+        other_user = User.objects.create(username='hs', email='hs@hs.cm')
+        response, _ = self._post(reverse('experience-bulk', args=[other_user.pk]),
+                                 [self._experience(0)])
+        self.assertEqual(response.status_code, 403)
+
+        url = reverse('experience-bulk', args=[self.user.pk])
+        for items in ([], {'profession': 1}, [1], [self._experience(0)] * (BULK_MAX_ITEMS + 1)):
+            with self.subTest(items=str(items)[:20]):
+                response, _ = self._post(url, items)
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Experience.objects.exists())
+
+    def test_skills(self):
+        """Should find skills by name and create only the missing ones, once each
+        """
+        python = Skill.objects.create(name='python')
+        response, queries = self._post(reverse('skill-bulk'), [
+            {'name': 'python'}, {'name': 'django'}, {'name': 'celery'}, {'name': 'django'}
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), 4, '\n'.join(queries))
+        results = response.data['results']
+        self.assertEqual(results[0], {'id': python.pk, 'status': 'existing'})
+        self.assertEqual(results[1], results[3])
+        self.assertEqual(Skill.objects.get(pk=results[1]['id']).name, 'django')
+        self.assertEqual(Skill.objects.get(pk=results[2]['id']).name, 'celery')
+        self.assertEqual(Skill.objects.count(), 3)
+
+        response, _ = self._post(reverse('skill-bulk'), [{'name': 'go'}, {}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result['status'] for result in response.data['results']],
+                         ['skipped', 'invalid'])
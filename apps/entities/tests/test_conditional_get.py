@@ -0,0 +1,94 @@
+from django.shortcuts import reverse
+from rest_framework.test import APITestCase
+from apps.user.models import User
+from ..models import Skill, Profession, Company
+from .test_job_views import create_jobs
+
+
+class ConditionalGetTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='oort', email='oort@oort.com')
+        self.job = create_jobs(self.user, 2)[0]
+        self.client.force_authenticate(self.user)
+
+    def _get(self, url, **headers):
+        response = self.client.get(url, **headers)
+        self.assertIn(response.status_code, (200, 304))
+        return response
+
+    def test_detail(self):
+        """Should answer 304 from one query while the row is unchanged
+        """
+        url = reverse('company-rud', args=[self.job.company_id])
+        response = self._get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        with self.assertNumQueries(1):
+            response = self._get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self._get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        self.job.company.name = 'Initech'
+        self.job.company.save()
+        response = self._get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Initech')
+
+    def test_detail_nested_rows(self):
+        """Should change a job's ETag with the rows its body nests
+        """
+        url = reverse('job-rud', args=[self.job.pk])
+        etag = self._get(url)['ETag']
+
+        self.job.profession.name = 'plumber'
+        self.job.profession.save()
+        changed_etag = self._get(url)['ETag']
+        self.assertNotEqual(changed_etag, etag)
+
+        self.job.skills_required.add(Skill.objects.create(name='django'))
+        self.assertNotEqual(self._get(url)['ETag'], changed_etag)
+
+    def test_keyset_list(self):
+        """Should change a keyset page's ETag when its rows change
+        """
+        url = reverse('company-cl')
+        etag = self._get(url)['ETag']
+        self.assertEqual(self._get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Company.objects.filter(pk=self.job.company_id).update(name='Initech')
+        self.assertEqual(self._get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.job.company.save()
+        changed_etag = self._get(url)['ETag']
+        self.assertNotEqual(changed_etag, etag)
+
+        self.job.delete()
+        Company.objects.filter(pk=self.job.company_id).delete()
+        self.assertNotEqual(self._get(url)['ETag'], changed_etag)
+        self.assertNotEqual(self._get(url + '?page=1')['ETag'], changed_etag)
+
+    def test_counted_list(self):
+        """Should change a counted list's ETag when a row goes away
+        """
+        url = reverse('profession-cl')
+        response = self._get(url)
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self._get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Profession.objects.create(name='plumber', industry='construction').delete()
+        self.assertEqual(self._get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.job.delete()
+        Profession.objects.filter(pk=self.job.profession_id).delete()
+        self.assertEqual(self._get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_not_found(self):
+        """Should leave missing rows to the view
+        """
+        response = self.client.get(reverse('company-rud', args=[0]))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
@@ -0,0 +1,228 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+from django.core.files.storage import default_storage
+from django.shortcuts import reverse
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.user.models import User
+from ..models import DocumentBlob, DocumentUpload, UserDocument
+from ..tasks import remove_expired_document_uploads
+from ..uploads import HashingReader
+
+CONTENT = b'%PDF-1.4 ' + bytes(range(256)) * 4
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class DocumentUploadsTestCase(TransactionTestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.user = User.objects.create(username='oort', email='oort@oort.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def _start(self, content=CONTENT, **kwargs):
+        data = {'file_name': 'resume.PDF', 'size': len(content), 'checksum': sha256(content),
+                'doc_type': 'resume', **kwargs}
+        return self.client.post(reverse('document-upload'), data, format='json')
+
+    def _put(self, upload_id, offset, chunk, checksum=None):
+        return self.client.put(reverse('document-upload-chunks', args=[upload_id]), chunk,
+                               content_type='application/offset+octet-stream',
+                               HTTP_UPLOAD_OFFSET=str(offset),
+                               HTTP_UPLOAD_CHUNK_SHA256=checksum or sha256(chunk))
+
+    def _upload(self, content=CONTENT, chunk_size=300, upload_id=None):
+        upload_id = upload_id or self._start(content).data['id']
+        for offset in range(0, len(content), chunk_size):
+            response = self._put(upload_id, offset, content[offset:offset + chunk_size])
+            self.assertEqual(response.status_code, 200)
+        return upload_id, self.client.post(reverse('document-upload-complete', args=[upload_id]))
+
+    def _stored_files(self, directory):
+        return [name for _, _, names in os.walk(os.path.join(self.media_root, directory))
+                for name in names]
+
+    def _stored_chunks(self):
+        return self._stored_files('uploads')
+
+    def test_chunked_upload(self):
+        """Should store the chunks in order as one file and make the document from it
+        """
+        upload_id, response = self._upload()
+
+        self.assertEqual(response.status_code, 201)
+        document = UserDocument.objects.get(pk=response.data['id'])
+        self.assertEqual(document.owner, self.user)
+        self.assertEqual(document.doc_type, 'resume')
+        self.assertRegex(document.document.name, r'^documents/[0-9a-f]{2}/[0-9a-f]{32}\.pdf$')
+        self.assertNotIn(sha256(CONTENT)[:16], document.document.name)
+        with default_storage.open(document.document.name, 'rb') as stored:
+            self.assertEqual(stored.read(), CONTENT)
+
+        self.assertFalse(DocumentUpload.objects.exists())
+        self.assertEqual(self._stored_chunks(), [])
+        self.assertEqual(self.client.get(reverse('document-upload-chunks', args=[upload_id]))
+                         .status_code, 404)
+
+    def test_resume(self):
+        """Should take chunks only at the upload's offset and tell clients where to resume
+        """
+        upload_id = self._start().data['id']
+        url = reverse('document-upload-chunks', args=[upload_id])
+        self.assertEqual(self._put(upload_id, 0, CONTENT[:500]).data['offset'], 500)
+
+        # a retry of the chunk the client never heard back about
+        response = self._put(upload_id, 0, CONTENT[:500])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['offset'], 500)
+        self.assertEqual(self.client.get(url).data['offset'], 500)
+
+        response = self._put(upload_id, 500, CONTENT[500:], checksum=sha256(b'other'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(url).data['offset'], 500)
+        self.assertEqual(len(self._stored_chunks()), 1)
+
+        self.assertEqual(self._put(upload_id, 500, CONTENT[500:]).data['offset'], len(CONTENT))
+        response = self.client.post(reverse('document-upload-complete', args=[upload_id]))
+        self.assertEqual(response.status_code, 201)
+
+    def test_deduplication(self):
+        """Should share one stored file between documents with the same content
+        """
+        # both started before either one stored the file
+        upload_ids = [self._start().data['id'] for _ in range(2)]
+        _, first = self._upload(upload_id=upload_ids[0])
+        _, second = self._upload(chunk_size=1000, upload_id=upload_ids[1])
+        # an upload of a stored file still sends every byte
+        response = self._start(file_name='cv.pdf')
+        self.assertEqual(response.data['offset'], 0)
+        _, third = self._upload(upload_id=response.data['id'])
+
+        self.assertEqual(len({first.data['id'], second.data['id'], third.data['id']}), 3)
+        self.assertEqual(
+            set(UserDocument.objects.values_list('document', flat=True)),
+            {DocumentBlob.objects.get().file.name})
+        self.assertEqual(len(self._stored_files('documents')), 1)
+
+    def test_delete_unused_blob(self):
+        """Should delete a shared file along with the last document pointing at it
+        """
+        documents = [self._upload()[1].data['id'] for _ in range(2)]
+        blob = DocumentBlob.objects.get()
+
+        self.assertEqual(self.client.delete(
+            reverse('user-document-rud', args=[documents[0]])).status_code, 204)
+        self.assertTrue(DocumentBlob.objects.exists())
+        self.assertEqual(len(self._stored_files('documents')), 1)
+
+        UserDocument.objects.filter(pk=documents[1]).delete()
+        self.assertFalse(DocumentBlob.objects.exists())
+        self.assertFalse(default_storage.exists(blob.file.name))
+
+        # an upload of the same file stores it again
+        document = UserDocument.objects.get(pk=self._upload()[1].data['id'])
+        self.assertTrue(default_storage.exists(document.document.name))
+        self.assertEqual(DocumentBlob.objects.get().file.name, document.document.name)
+
+    def test_blob_deleted_while_completing(self):
+        """Should store a blob again that lost its last document after the upload found it
+        """
+        self._upload()
+        blob = DocumentBlob.objects.get()
+        upload_id = self._start().data['id']
+        self._put(upload_id, 0, CONTENT)
+
+        def find_blob(sha256, size):
+            UserDocument.objects.all().delete()
+            return blob
+
+        with mock.patch('apps.entities.uploads.find_blob', find_blob):
+            response = self.client.post(reverse('document-upload-complete', args=[upload_id]))
+
+        self.assertEqual(response.status_code, 201)
+        document = UserDocument.objects.get()
+        self.assertNotEqual(document.document.name, blob.file.name)
+        with default_storage.open(document.document.name, 'rb') as stored:
+            self.assertEqual(stored.read(), CONTENT)
+
+    def test_no_deduplication_by_hash(self):
+        """Should not hand out a stored file for its hash, without its bytes
+        """
+        self._upload()
+        other = bytes(reversed(CONTENT))
+        upload_id = self._start(checksum=sha256(CONTENT)).data['id']
+        self.assertEqual(self._put(upload_id, 0, other).status_code, 200)
+
+        response = self.client.post(reverse('document-upload-complete', args=[upload_id]))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UserDocument.objects.count(), 1)
+
+    def test_file_checksum_mismatch(self):
+        """Should refuse to complete an upload whose chunks are not the declared file
+        """
+        upload_id = self._start(checksum=sha256(b'other')).data['id']
+        self._put(upload_id, 0, CONTENT)
+
+        response = self.client.post(reverse('document-upload-complete', args=[upload_id]))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(DocumentUpload.objects.exists())
+        self.assertFalse(DocumentBlob.objects.exists())
+        self.assertEqual(self._stored_chunks(), [])
+
+    def test_bad_requests(self):
+        """Should refuse bad uploads and chunks, and other users' uploads
+        """
+        self.assertEqual(self._start(checksum='xyz').status_code, 400)
+        self.assertEqual(self._start(size=0).status_code, 400)
+
+        upload_id = self._start().data['id']
+        self.assertEqual(self._put(upload_id, 0, CONTENT[:10], checksum='xyz').status_code, 400)
+        self.assertEqual(self._put(upload_id, 0, CONTENT + b'!').status_code, 400)
+        with mock.patch('apps.entities.uploads.UPLOAD_MAX_CHUNK_SIZE', 100):
+            self.assertEqual(self._put(upload_id, 0, CONTENT[:101]).status_code, 413)
+        response = self.client.post(reverse('document-upload-complete', args=[upload_id]))
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_authenticate(User.objects.create(username='hs', email='hs@hs.cm'))
+        self.assertEqual(self._put(upload_id, 0, CONTENT).status_code, 404)
+
+    def test_hashing_reader(self):
+        """Should read no more than its limit, in the sizes asked for
+        """
+        reader = HashingReader(BytesIO(CONTENT), 100)
+        self.assertEqual(len(reader.read(64)), 64)
+        self.assertEqual(len(reader.read(64)), 36)
+        self.assertEqual(reader.read(64), b'')
+        self.assertEqual((reader.size, reader.hexdigest()), (100, sha256(CONTENT[:100])))
+
+    def test_remove_expired_uploads(self):
+        """Should delete uploads past their expiry along with their chunks
+        """
+        expired_id = self._start().data['id']
+        self._put(expired_id, 0, CONTENT[:100])
+        pending_id = self._start().data['id']
+        self._put(pending_id, 0, CONTENT[:100])
+        DocumentUpload.objects.filter(pk=expired_id).update(
+            expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self._put(expired_id, 100, CONTENT[100:200]).status_code, 404)
+        self.assertEqual(remove_expired_document_uploads(), 1)
+        self.assertEqual(str(DocumentUpload.objects.get().pk), pending_id)
+        self.assertEqual(len(self._stored_chunks()), 1)
@@ -0,0 +1,40 @@
+from io import StringIO
+from contextlib import redirect_stdout
+from django.core.management import call_command
+from django.test import TestCase
+from commands.management.commands.explain_queries import Command
+
+
+class ExplainQueriesTestCase(TestCase):
+
+    def test_sequential_scans(self):
+        """Should pick scanned tables out of PostgreSQL and SQLite plans
+        """
+        command = Command()
+
+        self.assertEqual(command._sequential_scans(
+            'Limit  (cost=0.00..1.21 rows=21 width=8)\n'
+            '  ->  Seq Scan on entities_job  (cost=0.00..17.50 rows=750 width=8)'
+        ), ['entities_job'])
+        self.assertEqual(command._sequential_scans(
+            '3 0 0 SCAN TABLE entities_skill\n'
+            '8 0 0 SCAN TABLE entities_job USING INDEX entities_jo_created_02536f_idx'
+        ), ['entities_skill'])
+        self.assertEqual(command._sequential_scans(
+            '4 0 0 SEARCH entities_user USING INDEX entities_user_email_idx (email=?)'
+        ), [])
+
+    def test_view_queries_use_indexes(self):
+        """Should find the indexes behind the job and per-user listings
+        """
+        output = StringIO()
+        with redirect_stdout(output):
+            call_command('explain_queries')
+
+        lines = output.getvalue().splitlines()
+        for route in ('entities/job/', 'entities/job-application/',
+                      'entities/user/<int:user_id>/experience/',
+                      'entities/user/<int:user_id>/education/',
+                      'expired otps'):
+            self.assertIn(f'{route}: ok', lines)
+        self.assertFalse([line for line in lines if 'skipped' in line])
@@ -0,0 +1,186 @@
+from array import array
+from unittest import mock
+from django.core.cache import cache
+from django.db.models import Count
+from django.shortcuts import reverse
+from django.test import TransactionTestCase
+from rest_framework.test import APITestCase
+from apps.globals.managers.test_managers import authenticated_user_api_client
+from apps.user.models import User
+from ..facets import FACET_INDEX_VERSION_KEY, FacetIndex, facet_index, _add_pks, \
+    _remove_pks, _to_postings
+from ..models import Skill, Job
+from .test_job_views import create_jobs
+
+
+class JobFacetTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        facet_index.clear()
+        self.user = User.objects.create(username='oort', email='oort@oort.com')
+        self.jobs = create_jobs(self.user, 4)
+        Job.objects.filter(pk__in=[self.jobs[0].pk, self.jobs[1].pk]).update(
+            employment_type='part time')
+        Job.objects.filter(pk=self.jobs[1].pk).update(location='Berlin', open_to_all=True)
+        self.python = Skill.objects.create(name='python')
+        self.jobs[1].skills_required.add(self.python)
+
+    def _get(self, params):
+        with authenticated_user_api_client(self.client, self.user):
+            response = self.client.get(reverse('job-facets'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_filter_and_counts(self):
+        """Should AND facets, OR values within a facet, and keep sibling counts
+        """
+        data = self._get({'employment_type': 'part time'})
+
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([job['id'] for job in data['results']],
+                         [self.jobs[1].pk, self.jobs[0].pk])
+        self.assertEqual(data['facets']['employment_type'], {'part time': 2, 'full time': 2})
+        self.assertEqual(data['facets']['location'], {'remote': 1, 'Berlin': 1})
+        self.assertEqual(data['facets']['open_to_all'], {'true': 1, 'false': 1})
+        self.assertEqual(data['facets']['skills'][str(self.python.pk)], 1)
+
+        data = self._get({'employment_type': ['part time', 'full time'],
+                          'skills': str(self.python.pk)})
+        self.assertEqual([job['id'] for job in data['results']], [self.jobs[1].pk])
+        self.assertEqual(data['facets']['employment_type'], {'part time': 1})
+        self.assertEqual(data['facets']['industry'], {'software': 1})
+
+    def test_counts_match_group_by(self):
+        """Should count like a GROUP BY over the jobs
+        """
+        facets = self._get({})['facets']
+
+        for field in ('employment_type', 'location'):
+            expected = {row[field]: row['count']
+                        for row in Job.objects.values(field).annotate(count=Count('pk'))}
+            self.assertEqual(facets[field], expected)
+
+    def test_picked_facet_counts(self):
+        """Should count a picked facet's values as if only the other facets were picked
+        """
+        filters = {'employment_type': ['part time'], 'location': ['Berlin', 'remote']}
+        facet_counts = facet_index.query(filters)[2]
+
+        for facet in filters:
+            others = {other: values for other, values in filters.items() if other != facet}
+            self.assertEqual(facet_counts[facet], facet_index.query(others)[2][facet])
+
+    def test_sparse_and_dense_postings(self):
+        """Should answer the same whether values keep arrays of pks or bitmaps
+        """
+        queries = [
+            ({}, None),
+            ({'employment_type': ['part time']}, None),
+            ({'employment_type': ['part time', 'full time'],
+              'skills': [str(self.python.pk)]}, None),
+            ({'location': ['Berlin', 'remote'], 'employment_type': ['full time']}, None),
+            ({'location': ['remote', 'nowhere']}, self.jobs[3].pk),
+            ({'location': ['nowhere']}, None),
+        ]
+        answers = {}
+        for density, postings_type in ((0, int), (1, array)):
+            index = FacetIndex()
+            with mock.patch('apps.entities.facets.FACET_BITMAP_DENSITY', density):
+                index.rebuild()
+            self.assertIsInstance(index._postings['location']['remote'], postings_type)
+
+            answers[density] = [index.query(filters, cursor=cursor, limit=2)
+                                for filters, cursor in queries]
+
+        expected = answers.pop(0)
+        self.assertEqual(expected[4][:2], (3, [self.jobs[2].pk, self.jobs[0].pk]))
+        for answer in answers.values():
+            self.assertEqual(answer, expected)
+
+    def test_postings_turn_dense(self):
+        """Should keep a value's pks in order, and turn them into a bitmap once dense
+        """
+        with mock.patch('apps.entities.facets.FACET_BITMAP_DENSITY', 1 / 32):
+            postings = _add_pks(_to_postings([9], 128), {3, 9, 5}, 128)
+            self.assertEqual(postings, array('I', [3, 5, 9]))
+
+            postings = _add_pks(_remove_pks(postings, {5}), {7}, 128)
+            self.assertEqual(postings, array('I', [3, 7, 9]))
+            postings = _add_pks(postings, {1}, 100)
+            self.assertEqual(postings, 1 << 1 | 1 << 3 | 1 << 7 | 1 << 9)
+            self.assertEqual(_remove_pks(postings, {9, 11}), 1 << 1 | 1 << 3 | 1 << 7)
+
+    def test_cursor(self):
+        """Should page through matches newest first
+        """
+        data = self._get({'limit': 3})
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(data['next'], self.jobs[1].pk)
+
+        data = self._get({'limit': 3, 'cursor': data['next']})
+        self.assertEqual([job['id'] for job in data['results']], [self.jobs[0].pk])
+        self.assertIsNone(data['next'])
+
+    def test_bad_request(self):
+        """Should refuse a malformed limit or cursor
+        """
+        with authenticated_user_api_client(self.client, self.user):
+            self.assertEqual(self.client.get(reverse('job-facets'), {'limit': 0}).status_code,
+                             400)
+            self.assertEqual(self.client.get(reverse('job-facets'), {'cursor': 'x'}).status_code,
+                             400)
+
+
+class FacetIndexSyncTestCase(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='oort', email='oort@oort.com')
+        self.jobs = create_jobs(self.user, 2)
+
+    def test_incremental_update(self):
+        """Should apply committed job changes without a rebuild
+        """
+        self._check_incremental_update()
+
+    def test_incremental_update_sparse(self):
+        """Should apply committed job changes to arrays of pks without a rebuild
+        """
+        with mock.patch('apps.entities.facets.FACET_BITMAP_DENSITY', 1):
+            self._check_incremental_update()
+
+    def _check_incremental_update(self):
+        index = FacetIndex(sync_seconds=0)
+        index.rebuild()
+        first_pk = self.jobs[0].pk
+
+        with mock.patch('apps.entities.signals.facet_index', index), \
+                mock.patch.object(index, 'rebuild', wraps=index.rebuild) as rebuild:
+            self.jobs[0].location = 'Berlin'
+            self.jobs[0].save()
+            self.jobs[1].company.industry = 'finance'
+            self.jobs[1].company.save()
+            self.jobs[1].skills_required.clear()
+            count, pks, facets = index.query({'location': ['Berlin']})
+            self.jobs[0].delete()
+            remaining, _, _ = index.query({})
+
+        self.assertFalse(rebuild.called)
+        self.assertEqual((count, pks), (1, [first_pk]))
+        self.assertEqual(facets['industry'], {'software': 1})
+        self.assertEqual(remaining, 1)
+        self.assertEqual(index.query({'industry': ['finance']})[1], [self.jobs[1].pk])
+        self.assertEqual(index.query({})[2]['skills'], {})
+
+    def test_rebuild_on_other_process_change(self):
+        """Should rebuild once another process moved the version stamp
+        """
+        index = FacetIndex(sync_seconds=0)
+        index.query({})
+
+        Job.objects.filter(pk=self.jobs[0].pk).update(location='Berlin')
+        self.assertEqual(index.query({'location': ['Berlin']})[0], 0)
+
+        cache.incr(FACET_INDEX_VERSION_KEY)
+        self.assertEqual(index.query({'location': ['Berlin']})[0], 1)
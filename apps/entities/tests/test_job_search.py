@@ -0,0 +1,114 @@
+from unittest import mock
+from django.core.management import call_command
+from django.shortcuts import reverse
+from rest_framework.test import APITestCase
+from apps.globals.managers.test_managers import (authenticated_user_api_client,
+                                                 assert_max_queries)
+from apps.user.models import OutboxMessage, User
+from apps.user.outbox import relay_pending
+from ..models import Skill, Job, JobSearchDocument, JobSearchPosting
+from ..search import search, tokenize
+from .test_job_views import create_jobs
+
+
+class JobSearchTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='oort', email='oort@oort.com')
+        self.jobs = create_jobs(self.user, 3)
+        self.jobs[0].description = 'Backend engineer for our python and django services'
+        self.jobs[0].save()
+        self.jobs[1].description = 'Python python python data pipelines'
+        self.jobs[1].location = 'Berlin'
+        self.jobs[1].save()
+
+    def _search(self, query, **params):
+        with authenticated_user_api_client(self.client, self.user):
+            return self.client.get(reverse('job-search'), {'q': query, **params})
+
+    def test_tokenize(self):
+        """Should lowercase words and drop stop words
+        """
+        self.assertEqual(tokenize('The Django-REST engineer, in Berlin!'),
+                         ['django', 'rest', 'engineer', 'berlin'])
+
+    def test_ranking(self):
+        """Should rank jobs by BM25, matching every indexed field
+        """
+        response = self._search('python django')
+
+        results = response.data.get('results')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['id'] for result in results], [self.jobs[0].pk, self.jobs[1].pk])
+        self.assertGreater(results[0]['score'], results[1]['score'])
+        self.assertEqual(results[0]['company']['id'], self.jobs[0].company_id)
+
+        self.assertEqual([job_id for job_id, _ in search('berlin', 10)], [self.jobs[1].pk])
+        self.assertEqual(len(search('company', 10)), 3)
+        self.assertEqual(search('skill', 1)[0][0], self.jobs[2].pk)
+
+    def test_incremental_index(self):
+        """Should follow changes of jobs and their related names
+        """
+        self.jobs[2].company.name = 'Initech'
+        self.jobs[2].company.save()
+        # the company's jobs are left to a task
+        self.assertEqual(search('initech', 10), [])
+        self.assertEqual(OutboxMessage.objects.get().get_arguments(), ([[self.jobs[2].pk]], {}))
+        relay_pending()
+        self.assertEqual([job_id for job_id, _ in search('initech', 10)], [self.jobs[2].pk])
+
+        skill = Skill.objects.create(name='kubernetes')
+        self.jobs[1].skills_required.add(skill)
+        self.assertEqual([job_id for job_id, _ in search('kubernetes', 10)], [self.jobs[1].pk])
+
+        skill.job_set.clear()
+        relay_pending()
+        self.assertEqual(search('kubernetes', 10), [])
+
+        self.jobs[0].delete()
+        self.assertFalse(JobSearchDocument.objects.filter(job_id=self.jobs[0].pk).exists())
+        self.assertEqual(search('django', 10), [])
+
+    def test_query_budget(self):
+        """Should search in a fixed number of queries
+        """
+        # stats, postings of each of the 2 terms, jobs and their skills
+        with authenticated_user_api_client(self.client, self.user):
+            with assert_max_queries(self, 5):
+                self.client.get(reverse('job-search'), {'q': 'python django'})
+
+    def test_bad_request(self):
+        """Should refuse an empty query or an out of range limit
+        """
+        self.assertEqual(self._search('').status_code, 400)
+        self.assertEqual(self._search('python', limit=0).status_code, 400)
+        self.assertEqual(self._search('python', limit='many').status_code, 400)
+
+    def test_rebuild(self):
+        """Should rebuild the same index from scratch
+        """
+        postings = set(JobSearchPosting.objects.values_list('term', 'document_id', 'frequency'))
+        Job.objects.filter(pk=self.jobs[2].pk).update(location='Lisbon')
+
+        call_command('rebuild_job_search_index', batch_size=2)
+
+        postings.add(('lisbon', self.jobs[2].pk, 1))
+        postings.discard(('remote', self.jobs[2].pk, 1))
+        self.assertEqual(
+            set(JobSearchPosting.objects.values_list('term', 'document_id', 'frequency')),
+            postings)
+        self.assertEqual(JobSearchDocument.objects.count(), 3)
+
+    def test_postings_per_term(self):
+        """Should read only the highest impact postings of a term, and still count them all
+        """
+        self.jobs[2].description = 'python'
+        self.jobs[2].save()
+
+        with mock.patch('apps.entities.search.SEARCH_MAX_POSTINGS_PER_TERM', 1):
+            results = search('python', 10)
+
+        # the job naming python most often for its length, scored as if all 3 were read
+        self.assertEqual([job_id for job_id, _ in results], [self.jobs[1].pk])
+        self.assertEqual(results[0][1], search('python', 1)[0][1])
@@ -0,0 +1,134 @@
+from datetime import date
+from django.shortcuts import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from apps.globals.managers.test_managers import (authenticated_user_api_client,
+                                                 assert_max_queries)
+from apps.user.models import User
+from ..models import Skill, Profession, Company, Job, JobApplication
+
+
+def create_jobs(poster, num_jobs):
+    skills = [Skill.objects.create(name=f'skill {idx}') for idx in range(3)]
+    jobs = []
+    for idx in range(num_jobs):
+        company = Company.objects.create(
+            name=f'company {idx}', established_on=date(2000, 1, 1), about='about',
+            industry='software', size=10, phone='123', headquarters='hq', type='private')
+        profession = Profession.objects.create(name=f'profession {idx}', industry='software')
+        job = Job.objects.create(
+            company=company, profession=profession, poster=poster, description='description',
+            end_date=timezone.now(), location='remote', employment_type='full time',
+            seniority_level='senior')
+        job.skills_required.set(skills)
+        jobs.append(job)
+    return jobs
+
+
+def create_job_applications(jobs):
+    return [
+        JobApplication.objects.create(
+            job=job,
+            applicant=User.objects.create(username=f'applicant{job.pk}',
+                                          email=f'applicant{job.pk}@hs.cm'),
+            status='applied',
+            feedback='')
+        for job in jobs
+    ]
+
+
+class JobViewsQueryBudgetTestCase(APITestCase):
+    # the conditional GET validators, one keyset page, and one more query for the skills
+    JOB_LIST_QUERIES = 3
+    JOB_DETAIL_QUERIES = 3
+    JOB_APPLICATION_LIST_QUERIES = 2
+    JOB_APPLICATION_DETAIL_QUERIES = 2
+
+    def setUp(self):
+        self.user = User.objects.create(username='oort', email='oort@oort.com')
+
+    def _get(self, url, max_queries):
+        with authenticated_user_api_client(self.client, self.user):
+            with assert_max_queries(self, max_queries) as context:
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def test_job_list(self):
+        """Should list jobs with nested relations in the same queries for any page size
+        """
+        create_jobs(self.user, 1)
+        _, num_queries = self._get(reverse('job-cl'), self.JOB_LIST_QUERIES)
+
+        create_jobs(self.user, 5)
+        response, more_num_queries = self._get(reverse('job-cl'), self.JOB_LIST_QUERIES)
+
+        job = response.data.get('results')[0]
+        self.assertEqual(num_queries, more_num_queries)
+        self.assertEqual(len(response.data.get('results')), 6)
+        self.assertEqual(job['poster']['username'], 'oort')
+        self.assertNotIn('email', job['poster'])
+        self.assertIn('name', job['company'])
+        self.assertIn('industry', job['profession'])
+        self.assertEqual(len(job['skills_required']), 3)
+
+    def test_job_detail(self):
+        """Should read one job with nested relations within its budget
+        """
+        job = create_jobs(self.user, 1)[0]
+        response, _ = self._get(reverse('job-rud', args=[job.pk]), self.JOB_DETAIL_QUERIES)
+
+        self.assertEqual(response.data['company']['id'], job.company_id)
+        self.assertEqual(len(response.data['skills_required']), 3)
+
+    def test_job_application_list(self):
+        """Should list applications with their job and applicant in the same queries
+        """
+        create_job_applications(create_jobs(self.user, 1))
+        _, num_queries = self._get(reverse('job-application-cl'),
+                                   self.JOB_APPLICATION_LIST_QUERIES)
+
+        create_job_applications(create_jobs(self.user, 5))
+        response, more_num_queries = self._get(reverse('job-application-cl'),
+                                               self.JOB_APPLICATION_LIST_QUERIES)
+
+        job_application = response.data.get('results')[0]
+        self.assertEqual(num_queries, more_num_queries)
+        self.assertEqual(len(response.data.get('results')), 6)
+        self.assertIn('name', job_application['job']['company'])
+        self.assertIn('username', job_application['applicant'])
+
+    def test_job_application_detail(self):
+        """Should read one application with nested relations within its budget
+        """
+        job_application = create_job_applications(create_jobs(self.user, 1))[0]
+        response, _ = self._get(reverse('job-application-rud', args=[job_application.pk]),
+                                self.JOB_APPLICATION_DETAIL_QUERIES)
+
+        self.assertEqual(response.data['job']['id'], job_application.job_id)
+
+    def test_write_takes_ids(self):
+        """Should keep accepting related ids on writes
+        """
+        job = create_jobs(self.user, 1)[0]
+        with authenticated_user_api_client(self.client, self.user):
+            response = self.client.patch(reverse('job-rud', args=[job.pk]), format='json',
+                                         data={'location': 'berlin'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['company'], job.company_id)
+        self.assertEqual(Job.objects.get(pk=job.pk).location, 'berlin')
+
+
+class AssertMaxQueriesTestCase(APITestCase):
+
+    def test_over_budget(self):
+        """Should fail listing the queries that went over budget
+        """
+        with self.assertRaises(AssertionError) as context:
+            with assert_max_queries(self, 1):
+                list(User.objects.all())
+                list(Skill.objects.all())
+
+        self.assertIn('2 queries executed, 1 allowed', str(context.exception))
+        self.assertIn('entities_skill', str(context.exception))
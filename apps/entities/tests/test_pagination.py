@@ -0,0 +1,94 @@
+import warnings
+from datetime import date
+from django.shortcuts import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from apps.globals.managers.test_managers import (authenticated_user_api_client,
+                                                 assert_max_queries)
+from apps.globals.pagination import KeysetPagination
+from apps.user.models import User
+from ..models import Company, JobApplication
+from .test_job_views import create_job_applications, create_jobs
+
+
+class KeysetPaginationTestCase(APITestCase):
+    NUM_COMPANIES = 5
+
+    def setUp(self):
+        self.user = User.objects.create(username='oort', email='oort@oort.com')
+        for idx in range(self.NUM_COMPANIES):
+            Company.objects.create(
+                name=f'company {idx}', established_on=date(2000, 1, 1), about='about',
+                industry='software', size=10, phone='123', headquarters='hq', type='private')
+        # ties on created_at have to be broken by id
+        Company.objects.filter(pk__in=Company.objects.order_by('id')[:3].values('pk')) \
+            .update(created_at=timezone.now())
+
+        self.page_size = KeysetPagination.page_size
+        KeysetPagination.page_size = 2
+
+    def tearDown(self):
+        KeysetPagination.page_size = self.page_size
+
+    def _get(self, url):
+        with authenticated_user_api_client(self.client, self.user):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_walk_forward_and_back(self):
+        """Should visit every row once, newest first, and step back to the same pages
+        """
+        pages = [self._get(reverse('company-cl'))]
+        while pages[-1]['next']:
+            pages.append(self._get(pages[-1]['next']))
+
+        ids = [company['id'] for page in pages for company in page['results']]
+        expected_ids = list(Company.objects.order_by('-created_at', '-id')
+                            .values_list('id', flat=True))
+        self.assertEqual(ids, expected_ids)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['previous'])
+
+        previous_page = self._get(pages[-1]['previous'])
+        self.assertEqual(previous_page['results'], pages[-2]['results'])
+        self.assertEqual(self._get(previous_page['previous'])['results'], pages[0]['results'])
+
+    def test_no_count(self):
+        """Should fetch a page and its validators without counting the table
+        """
+        with authenticated_user_api_client(self.client, self.user):
+            with assert_max_queries(self, 2) as context:
+                self.client.get(reverse('company-cl'))
+
+        for query in context.captured_queries:
+            self.assertNotIn('COUNT', query['sql'].upper())
+
+    def test_page_number_mode(self):
+        """Should answer with totals when a page number is asked for
+        """
+        data = self._get(reverse('company-cl') + '?page=2')
+
+        self.assertEqual(data['count'], self.NUM_COMPANIES)
+        self.assertEqual(len(data['results']), 2)
+
+    def test_page_number_mode_order(self):
+        """Should number the pages of a queryset in the order the cursors walk it
+        """
+        create_job_applications(create_jobs(self.user, 5))
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            data = self._get(reverse('job-application-cl') + '?page=2')
+
+        expected_ids = list(JobApplication.objects.order_by('-created_at', '-id')
+                            .values_list('id', flat=True)[2:4])
+        self.assertEqual([application['id'] for application in data['results']], expected_ids)
+        self.assertEqual([warning.category.__name__ for warning in caught], [])
+
+    def test_invalid_cursor(self):
+        """Should answer 404 for a cursor it did not hand out
+        """
+        with authenticated_user_api_client(self.client, self.user):
+            response = self.client.get(reverse('company-cl') + '?cursor=boofar')
+
+        self.assertEqual(response.status_code, 404)
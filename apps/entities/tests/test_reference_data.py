@@ -0,0 +1,113 @@
+from datetime import date
+from django.core.cache import cache
+from django.db import transaction
+from django.shortcuts import reverse
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+from apps.globals.pagination import KeysetPagination
+from apps.user.models import User
+from ..models import Company, Profession
+from ..reference_data import ReferenceDataCache, reference_data
+
+
+def create_companies(num_companies):
+    return [
+        Company.objects.create(
+            name=f'company {idx}', established_on=date(2000, 1, 1), about='about',
+            industry='software', size=10, phone='123', headquarters='hq', type='private')
+        for idx in range(num_companies)
+    ]
+
+
+class ReferenceDataTestCase(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        reference_data.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='oort',
+                                                           email='oort@oort.com'))
+        self.companies = create_companies(3)
+        self.profession = Profession.objects.create(name='plumber', industry='construction')
+
+    def tearDown(self):
+        # the snapshots would outlive the flushed tables
+        reference_data.clear()
+
+    def test_reads_from_memory(self):
+        """Should answer lists and details without queries once the snapshot is loaded
+        """
+        for url in (reverse('company-cl'), reverse('company-rud', args=[self.companies[0].pk]),
+                    reverse('profession-cl'), reverse('profession-rud', args=[self.profession.pk])):
+            with self.subTest(url=url):
+                expected = self.client.get(url).data
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data, expected)
+
+        response = self.client.get(reverse('company-rud', args=[self.companies[0].pk]))
+        self.assertEqual(response.data['name'], 'company 0')
+        self.assertEqual(response['Last-Modified'][-3:], 'GMT')
+        self.assertEqual(self.client.get(reverse('company-rud', args=[0])).status_code, 404)
+
+    def test_writes_reload(self):
+        """Should reload a table on the next read after a write, in every process
+        """
+        other_process = ReferenceDataCache()
+        url = reverse('company-rud', args=[self.companies[0].pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(other_process.get(Company).by_pk[self.companies[0].pk]['name'],
+                         'company 0')
+
+        self.companies[0].name = 'Initech'
+        self.companies[0].save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Initech')
+        self.assertEqual(other_process.get(Company).by_pk[self.companies[0].pk]['name'],
+                         'Initech')
+
+        self.companies[1].delete()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('company-cl'))
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_uncommitted_rows_are_not_kept(self):
+        """Should not keep a snapshot that saw rows of an open transaction
+        """
+        class Rollback(Exception):
+            pass
+
+        try:
+            with transaction.atomic():
+                Profession.objects.create(name='welder', industry='construction')
+                self.assertEqual(len(reference_data.get(Profession).rows), 2)
+                raise Rollback()
+        except Rollback:
+            pass
+
+        self.assertEqual(len(reference_data.get(Profession).rows), 1)
+
+    def test_keyset_pages(self):
+        """Should page the snapshot like the table, newest first
+        """
+        self.companies += create_companies(KeysetPagination.page_size)
+        expected = [company.pk for company in reversed(self.companies)]
+
+        response = self.client.get(reverse('company-cl'))
+        pks = [company['id'] for company in response.data['results']]
+        response = self.client.get(response.data['next'])
+        pks += [company['id'] for company in response.data['results']]
+        self.assertEqual(pks, expected)
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([company['id'] for company in response.data['results']],
+                         expected[:KeysetPagination.page_size])
+
+        response = self.client.get(reverse('company-cl'), {'page': 2, 'fields': 'name'})
+        self.assertEqual(response.data['count'], len(expected))
+        self.assertEqual(response.data['results'],
+                         [{'name': 'company 2'}, {'name': 'company 1'}, {'name': 'company 0'}])
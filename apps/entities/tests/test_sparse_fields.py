@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection
+from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from apps.globals.serializers import get_serializer_with_fields
+from apps.user.models import User
+from apps.user.serializers import UserSerializer
+from ..serializers import JobReadSerializer
+from .test_job_views import create_jobs
+
+
+class SparseFieldsTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='oort', email='oort@oort.com')
+        self.jobs = create_jobs(self.user, 2)
+        self.client.force_authenticate(self.user)
+
+    def _get(self, url, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        return response, [query['sql'] for query in context.captured_queries]
+
+    def test_serializer_with_fields(self):
+        """Should make one class per field set and leave the serializer's Meta alone
+        """
+        public_class = get_serializer_with_fields(UserSerializer, User.get_public_fields())
+        owner_class = get_serializer_with_fields(UserSerializer, '__all__')
+
+        self.assertIs(public_class,
+                      get_serializer_with_fields(UserSerializer, User.get_public_fields()))
+        self.assertEqual(UserSerializer.Meta.exclude, ('created_at', 'updated_at'))
+        self.assertFalse(hasattr(UserSerializer.Meta, 'fields'))
+        self.assertEqual(list(public_class(self.user).data), User.get_public_fields())
+        self.assertIn('email', owner_class(self.user).data)
+        self.assertNotIn('created_at', UserSerializer(self.user).data)
+
+        job_class = get_serializer_with_fields(JobReadSerializer, ('id', 'company'))
+        self.assertEqual(list(job_class(self.jobs[0]).data), ['id', 'company'])
+
+    def test_concurrent_field_sets(self):
+        """Should render every request's own fields while others render theirs
+        """
+        field_sets = [User.get_public_fields(), ['id', 'email'], '__all__'] * 30
+
+        def render(fields):
+            data = get_serializer_with_fields(UserSerializer, fields)(self.user).data
+            return fields == '__all__' or list(data) == list(fields)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            self.assertTrue(all(executor.map(render, field_sets)))
+
+    def test_list(self):
+        """Should list only the requested fields and read only their columns
+        """
+        response, queries = self._get(reverse('job-cl'), {'fields': 'location,id'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0], {'id': self.jobs[1].pk,
+                                                       'location': 'remote'})
+        page_sql = queries[-1]
+        self.assertIn('"entities_job"."location"', page_sql)
+        self.assertNotIn('"entities_job"."description"', page_sql)
+        self.assertFalse([sql for sql in queries if 'FROM "entities_job_skills_required"' in sql])
+
+    def test_detail(self):
+        """Should load only the requested columns, joins and prefetches
+        """
+        url = reverse('job-rud', args=[self.jobs[0].pk])
+        response, queries = self._get(url, {'fields': 'id,company,end_date'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data), ['id', 'company', 'end_date'])
+        self.assertEqual(response.data['company']['name'], 'company 0')
+        object_sql = queries[-1]
+        self.assertIn('"entities_company"."name"', object_sql)
+        self.assertNotIn('"entities_job"."description"', object_sql)
+        self.assertNotIn('entities_profession', object_sql)
+
+        response, _ = self._get(url, {'fields': 'skills_required'})
+        self.assertEqual(len(response.data['skills_required']), 3)
+
+    def test_detail_etag_per_field_set(self):
+        """Should not answer 304 for a copy with other fields
+        """
+        url = reverse('job-rud', args=[self.jobs[0].pk])
+        etag = self.client.get(url, {'fields': 'id'})['ETag']
+
+        self.assertEqual(self.client.get(url, {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag)
+                         .status_code, 304)
+        self.assertEqual(self.client.get(url, {'fields': 'location'}, HTTP_IF_NONE_MATCH=etag)
+                         .status_code, 200)
+
+    def test_bad_fields(self):
+        """Should refuse unknown or empty field lists
+        """
+        for fields in ('id,salary', ',', ''):
+            with self.subTest(fields=fields):
+                response = self.client.get(reverse('job-cl'), {'fields': fields})
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,131 @@
+from datetime import date
+from io import StringIO
+from contextlib import redirect_stdout
+from django.core.management import call_command
+from django.shortcuts import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from apps.globals.exceptions import HSBadArgumentException
+from apps.globals.managers.test_managers import authenticated_user_api_client
+from apps.globals.serializers import ValuesSerializer
+from apps.user.models import User
+from ..models import Skill, Profession, Company, Experience, Education, Job, JobApplication
+from ..serializers import (ProfessionSerializer, CompanySerializer, ExperienceSerializer,
+                           EducationSerializer, UserDocumentSerializer, JobSerializer,
+                           JobApplicationSerializer, JobSummarySerializer, JobReadSerializer,
+                           JobApplicationReadSerializer, ProfileExperienceSerializer,
+                           ProfileEducationSerializer)
+from .test_job_views import create_jobs, create_job_applications
+
+
+class ValuesSerializerTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='oort', email='oort@oort.com')
+        self.jobs = create_jobs(self.user, 3)
+        self.job_applications = create_job_applications(self.jobs)
+
+        # a job without company, profession or skills
+        self.jobs.append(Job.objects.create(
+            poster=self.user, description='description', end_date=self.jobs[0].end_date,
+            location='remote', employment_type='part time', seniority_level='junior'))
+        self.jobs[0].skills_required.add(Skill.objects.create(name='skill 3'))
+        Company.objects.filter(pk=self.jobs[1].company_id).update(logo='https://hs.cm/logo.png')
+
+        profession = Profession.objects.first()
+        Experience.objects.create(user=self.user, profession=profession,
+                                  start_date=date(2015, 1, 1), description='experience')
+        Experience.objects.create(user=self.user, profession=profession,
+                                  start_date=date(2018, 1, 1), end_date=date(2019, 1, 1))
+        Education.objects.create(user=self.user, degree='degree', field='field',
+                                 institute='institute', start_date=date(2010, 1, 1))
+
+    def _assert_parity(self, serializer_class, queryset):
+        queryset = queryset.order_by('pk')
+        values_serializer = ValuesSerializer(serializer_class)
+        data = values_serializer.serialize(values_serializer.get_values_queryset(queryset))
+
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(data),
+                         renderer.render(serializer_class(queryset, many=True).data))
+        return data
+
+    def test_parity(self):
+        """Should render the same JSON as the model serializers, key order included
+        """
+        for serializer_class, queryset in (
+                (ProfessionSerializer, Profession.objects.all()),
+                (CompanySerializer, Company.objects.all()),
+                (ExperienceSerializer, Experience.objects.all()),
+                (EducationSerializer, Education.objects.all()),
+                (ProfileExperienceSerializer, Experience.objects.all()),
+                (ProfileEducationSerializer, Education.objects.all()),
+                (JobSerializer, Job.objects.all()),
+                (JobSummarySerializer, Job.objects.all()),
+                (JobReadSerializer, Job.get_all_with_relations()),
+                (JobApplicationSerializer, JobApplication.objects.all()),
+                (JobApplicationReadSerializer, JobApplication.get_all_with_relations())):
+            with self.subTest(serializer_class.__name__):
+                self.assertTrue(self._assert_parity(serializer_class, queryset))
+
+    def test_nullable_and_many_related(self):
+        """Should render missing related rows as None and a row's own many-to-many items
+        """
+        data = self._assert_parity(JobReadSerializer, Job.get_all_with_relations())
+
+        self.assertEqual([skill['name'] for skill in data[0]['skills_required']],
+                         ['skill 0', 'skill 1', 'skill 2', 'skill 3'])
+        self.assertEqual(len(data[1]['skills_required']), 3)
+        self.assertEqual(data[1]['company']['logo'], 'https://hs.cm/logo.png')
+        self.assertIsNone(data[3]['company'])
+        self.assertIsNone(data[3]['profession'])
+        self.assertEqual(data[3]['skills_required'], [])
+        self.assertEqual(ValuesSerializer(JobReadSerializer).serialize([]), [])
+
+    def test_plan_is_compiled_once(self):
+        """Should share one plan per serializer class
+        """
+        self.assertIs(ValuesSerializer(JobReadSerializer).plan,
+                      ValuesSerializer(JobReadSerializer).plan)
+        self.assertIsNot(ValuesSerializer(JobReadSerializer).plan,
+                         ValuesSerializer(JobSerializer).plan)
+
+    def test_unsupported_fields(self):
+        """Should refuse serializers with fields a `.values()` row cannot give
+        """
+        with self.assertRaises(HSBadArgumentException):
+            ValuesSerializer(UserDocumentSerializer)
+
+    def test_list_views(self):
+        """Should answer list endpoints like the model serializers, pages included
+        """
+        with authenticated_user_api_client(self.client, self.user):
+            response = self.client.get(reverse('job-cl'), {'cursor': ''})
+            self.assertEqual(response.status_code, 200)
+            jobs = Job.get_all_with_relations().order_by('-created_at', '-id')
+            self.assertEqual(JSONRenderer().render(response.data['results']),
+                             JSONRenderer().render(JobReadSerializer(jobs, many=True).data))
+
+            response = self.client.get(reverse('job-application-cl'), {'page': 1})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 3)
+            self.assertEqual(
+                sorted(result['job']['company']['name'] for result in response.data['results']),
+                ['company 0', 'company 1', 'company 2'])
+
+            response = self.client.get(reverse('experience-cl', args=[self.user.pk]))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 2)
+            self.assertEqual(response.data['results'][0]['start_date'], '2018-01-01')
+
+    def test_benchmark(self):
+        """Should benchmark both paths over the same page
+        """
+        output = StringIO()
+        with redirect_stdout(output):
+            call_command('benchmark_serializers', rows=5, runs=1)
+
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('JobReadSerializer, 5 rows: '))
+        self.assertEqual(Job.objects.count(), 4)
@@ -0,0 +1,246 @@
+"""
+Chunked, resumable uploads of `UserDocument` files.
+
+An upload is started with the file's size and SHA-256. Its bytes are then
+sent in order, each chunk at the offset the upload has reached and with a
+SHA-256 of its own, so a client that lost a response asks for the offset
+and resumes from there. Completing the upload checks the chunks add up to
+the declared SHA-256 and joins them into a `DocumentBlob` with a random name,
+so a document's URL does not give away its hash.
+
+Blobs are shared: documents with the same content point at the same stored
+file. Only an upload whose bytes were received and checked is matched with
+an existing blob, so knowing a file's hash is no way to get hold of it.
+A blob and its file are deleted once the last document pointing at it is.
+Request bodies and chunks are streamed to storage `UPLOAD_STREAM_BLOCK_SIZE`
+bytes at a time, so no file is held in memory.
+"""
+import hashlib
+import os
+import uuid
+from datetime import timedelta
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from rest_framework import status
+
+from .constants import UPLOAD_EXPIRE_SECONDS, UPLOAD_MAX_CHUNK_SIZE, UPLOAD_STREAM_BLOCK_SIZE
+from .exceptions import DocumentUploadException, DocumentUploadOffsetConflict
+from .models import DocumentBlob, DocumentUpload, DocumentUploadChunk, UserDocument
+
+
+class HashingReader(object):
+    """Reads at most `limit` bytes of `stream`, counting and hashing them on the way"""
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.size = 0
+        self._remaining = limit
+        self._hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        if not size:
+            return b''
+
+        data = self.stream.read(size)
+        self._remaining -= len(data)
+        self.size += len(data)
+        self._hash.update(data)
+        return data
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+class ChunkStream(object):
+    """The stored chunks `names`, read one after the other"""
+
+    def __init__(self, names):
+        self._names = iter(names)
+        self._file = None
+
+    def read(self, size=UPLOAD_STREAM_BLOCK_SIZE):
+        while True:
+            if self._file is None:
+                name = next(self._names, None)
+                if name is None:
+                    return b''
+                self._file = default_storage.open(name, 'rb')
+
+            data = self._file.read(size)
+            if data:
+                return data
+            self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def get_blob_name(file_name):
+    """Blobs get a random name, with the extension they were first uploaded with"""
+    extension = os.path.splitext(get_valid_filename(file_name))[1].lower()[:10]
+    name = uuid.uuid4().hex
+    return f'documents/{name[:2]}/{name}{extension}'
+
+
+def get_chunk_name(upload, offset):
+    return f'uploads/{upload.pk.hex}/{offset:012d}'
+
+
+def get_expires_at():
+    return timezone.now() + timedelta(seconds=UPLOAD_EXPIRE_SECONDS)
+
+
+def delete_files(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+def find_blob(sha256, size):
+    return DocumentBlob.objects.filter(sha256=sha256, size=size).first()
+
+
+def delete_unused_blobs(names):
+    """
+    Deletes the blobs stored as `names` that no document points at any more,
+    with their files. The blob row stays locked until it is gone, so an upload
+    completing with it meanwhile either gets in first or stores another one,
+    see `complete_upload`.
+    """
+    for name in names:
+        with transaction.atomic():
+            blob = DocumentBlob.objects.select_for_update().filter(file=name).first()
+            if blob is None or UserDocument.objects.filter(document=name).exists():
+                continue
+            blob.delete()
+        default_storage.delete(name)
+
+
+def create_document(owner, blob, doc_type, experience=None, education=None):
+    return UserDocument.objects.create(owner=owner, experience=experience, education=education,
+                                       doc_type=doc_type, document=blob.file.name)
+
+
+def start_upload(owner, file_name, size, checksum, doc_type, experience=None, education=None):
+    """
+    Returns a new upload. Its bytes are always sent, even if a file with the
+    same content is stored already, see `complete_upload`.
+    """
+    return DocumentUpload.objects.create(
+        owner=owner, experience=experience, education=education, doc_type=doc_type,
+        file_name=file_name, size=size, checksum=checksum, expires_at=get_expires_at())
+
+
+def save_chunk(upload, offset, stream, length, sha256):
+    """
+    Streams `length` bytes of `stream` to storage as the chunk of `upload`
+    at `offset`, checks them against `sha256` and moves the upload's offset
+    past them.
+    """
+    if offset != upload.offset:
+        raise DocumentUploadOffsetConflict(upload.offset)
+    if not 0 < length <= upload.size - offset:
+        raise DocumentUploadException('Chunk does not fit the upload.')
+    if length > UPLOAD_MAX_CHUNK_SIZE:
+        raise DocumentUploadException('Chunk is too large.',
+                                      status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    reader = HashingReader(stream, length)
+    name = default_storage.save(get_chunk_name(upload, offset), reader)
+    if reader.size != length or reader.hexdigest() != sha256:
+        default_storage.delete(name)
+        raise DocumentUploadException('Chunk does not match its checksum.')
+
+    # requests sending the same chunk at once all store it, only one moves the offset
+    with transaction.atomic():
+        moved = DocumentUpload.objects.filter(pk=upload.pk, offset=offset).update(
+            offset=offset + length, expires_at=get_expires_at(), updated_at=timezone.now())
+        if moved:
+            DocumentUploadChunk.objects.create(upload=upload, offset=offset, size=length,
+                                               file=name)
+
+    if not moved:
+        default_storage.delete(name)
+        upload.refresh_from_db(fields=['offset'])
+        raise DocumentUploadOffsetConflict(upload.offset)
+
+    upload.offset += length
+    return upload
+
+
+def verify_upload(upload, chunk_names):
+    """Reads the chunks of `upload` through, and fails it unless they add up to the file it declared
+    """
+    stream = ChunkStream(chunk_names)
+    reader = HashingReader(stream, upload.size)
+    try:
+        while reader.read(UPLOAD_STREAM_BLOCK_SIZE):
+            pass
+    finally:
+        stream.close()
+
+    if reader.size != upload.size or reader.hexdigest() != upload.checksum:
+        # every chunk matched its own checksum, so the upload cannot be fixed by resending one
+        delete_uploads([upload.pk])
+        raise DocumentUploadException('File does not match its checksum.')
+
+
+def store_blob(upload, chunk_names):
+    """Joins the verified chunks of `upload` into a blob
+    """
+    stream = ChunkStream(chunk_names)
+    try:
+        name = default_storage.save(get_blob_name(upload.file_name), stream)
+    finally:
+        stream.close()
+
+    try:
+        with transaction.atomic():
+            return DocumentBlob.objects.create(sha256=upload.checksum, size=upload.size, file=name)
+    except IntegrityError:
+        # a concurrent upload of the same file stored it first
+        default_storage.delete(name)
+        return DocumentBlob.objects.get(sha256=upload.checksum)
+
+
+def complete_upload(upload):
+    """
+    Turns a fully received `upload` into a `UserDocument`. Once its bytes
+    are checked against its checksum, an existing blob with the same content
+    is used rather than storing another copy. Returns the document.
+    """
+    if upload.offset != upload.size:
+        raise DocumentUploadException('Upload is not complete.')
+
+    chunk_names = list(upload.chunks.order_by('offset').values_list('file', flat=True))
+    verify_upload(upload, chunk_names)
+    blob = find_blob(upload.checksum, upload.size) or store_blob(upload, chunk_names)
+
+    with transaction.atomic():
+        # of concurrent requests completing the upload, the one deleting its row makes the document
+        _, num_deleted_per_model = DocumentUpload.objects.filter(pk=upload.pk).delete()
+        if not num_deleted_per_model.get(DocumentUpload._meta.label):
+            raise DocumentUploadException('Upload does not exist.', status.HTTP_404_NOT_FOUND)
+
+        # the blob may have lost its last document meanwhile, see `delete_unused_blobs`
+        if not DocumentBlob.objects.select_for_update().filter(pk=blob.pk).exists():
+            blob = store_blob(upload, chunk_names)
+        document = create_document(upload.owner, blob, upload.doc_type,
+                                   upload.experience, upload.education)
+        transaction.on_commit(lambda: delete_files(chunk_names))
+    return document
+
+
+def delete_uploads(pks):
+    """Deletes uploads with their chunks, the stored ones once the transaction commits
+    """
+    chunk_names = list(DocumentUploadChunk.objects.filter(upload__in=pks)
+                       .values_list('file', flat=True))
+    _, num_deleted_per_model = DocumentUpload.objects.filter(pk__in=pks).delete()
+    transaction.on_commit(lambda: delete_files(chunk_names))
+    return num_deleted_per_model.get(DocumentUpload._meta.label, 0)
@@ -2,10 +2,14 @@ from django.urls import path
 from .views import (ProfessionCreateListView, ProfessionRUDView,
                     CompanyCreateListView, CompanyRUDView,
                     UserExperienceCreateListView, UserExperienceRUDView,
-                    UserEducationCreateListView, UserEducationRUDView,
+                    UserExperienceBulkView, UserEducationCreateListView,
+                    UserEducationRUDView, UserEducationBulkView, SkillBulkView,
                     UserDocumentCreateListView, UserDocumentRUDView,
+                    DocumentUploadView, DocumentUploadChunkView,
+                    DocumentUploadCompleteView,
                     JobApplicationCreateListView, JobApplicationRUDView,
-                    JobCreateListView, JobRUDView)
+                    JobCreateListView, JobRUDView, JobSearchView,
+                    JobFacetView)
 
 
 urlpatterns = [
@@ -15,23 +19,36 @@ urlpatterns = [
     path('company/', CompanyCreateListView.as_view(), name='company-cl'),
     path('company/<int:pk>/', CompanyRUDView.as_view(), name='company-rud'),
 
+    path('skill/bulk/', SkillBulkView.as_view(), name='skill-bulk'),
+
     path('user/<int:user_id>/experience/', UserExperienceCreateListView.as_view(),
          name='experience-cl'),
     path('user/<int:user_id>/experiece/<int:pk>/', UserExperienceRUDView.as_view(),
          name='experience-rud'),
+    path('user/<int:user_id>/experience/bulk/', UserExperienceBulkView.as_view(),
+         name='experience-bulk'),
 
     path('user/<int:user_id>/education/', UserEducationCreateListView.as_view(),
          name='education-cl'),
     path('user/<int:user_id>/education/<int:pk>/', UserEducationRUDView.as_view(),
          name='education-rud'),
+    path('user/<int:user_id>/education/bulk/', UserEducationBulkView.as_view(),
+         name='education-bulk'),
 
     path('user-document/', UserDocumentCreateListView.as_view(), name='user-document-cl'),
     path('user-document/<int:pk>/', UserDocumentRUDView.as_view(), name='user-document-rud'),
+    path('user-document/upload/', DocumentUploadView.as_view(), name='document-upload'),
+    path('user-document/upload/<uuid:pk>/', DocumentUploadChunkView.as_view(),
+         name='document-upload-chunks'),
+    path('user-document/upload/<uuid:pk>/complete/', DocumentUploadCompleteView.as_view(),
+         name='document-upload-complete'),
 
     path('job-application/', JobApplicationCreateListView.as_view(), name='job-application-cl'),
     path('job-application/<int:pk>/', JobApplicationRUDView.as_view(),
          name='job-application-rud'),
 
     path('job/', JobCreateListView.as_view(), name='job-cl'),
-    path('job/<int:pk>/', JobRUDView.as_view(), name='job-rud')
+    path('job/<int:pk>/', JobRUDView.as_view(), name='job-rud'),
+    path('job/search/', JobSearchView.as_view(), name='job-search'),
+    path('job/facets/', JobFacetView.as_view(), name='job-facets')
 ]
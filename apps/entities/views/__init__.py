@@ -1,7 +1,11 @@
 from .company_views import CompanyCreateListView, CompanyRUDView
-from .education_views import UserEducationCreateListView, UserEducationRUDView
-from .experience_views import UserExperienceCreateListView, UserExperienceRUDView
-from .job_views import (JobCreateListView, JobRUDView,
+from .education_views import (UserEducationCreateListView, UserEducationRUDView,
+    UserEducationBulkView)
+from .experience_views import (UserExperienceCreateListView, UserExperienceRUDView,
+    UserExperienceBulkView)
+from .job_views import (JobCreateListView, JobRUDView, JobSearchView, JobFacetView,
     JobApplicationCreateListView, JobApplicationRUDView)
 from .profession_views import ProfessionCreateListView, ProfessionRUDView
-from .user_document_views import UserDocumentCreateListView, UserDocumentRUDView
\ No newline at end of file
+from .skill_views import SkillBulkView
+from .user_document_views import (UserDocumentCreateListView, UserDocumentRUDView,
+    DocumentUploadView, DocumentUploadChunkView, DocumentUploadCompleteView)
\ No newline at end of file
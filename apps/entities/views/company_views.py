@@ -1,18 +1,23 @@
-from rest_framework import generics, pagination
+from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
+from apps.globals.views import ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin
+from apps.globals.pagination import KeysetPagination
+from apps.entities.views.mixins import ReferenceDataMixin
 from apps.entities.models import Company
 from apps.entities.serializers import CompanySerializer
 
 
-class CompanyCreateListView(generics.ListCreateAPIView):
+class CompanyCreateListView(ReferenceDataMixin, ConditionalGetMixin, SparseFieldsMixin,
+                            ValuesListMixin, generics.ListCreateAPIView):
     queryset = Company.get_all()
     serializer_class = CompanySerializer
-    pagination_class = pagination.PageNumberPagination
+    pagination_class = KeysetPagination
     permission_classes = (IsAuthenticated,)
 
 
-class CompanyRUDView(generics.RetrieveUpdateDestroyAPIView):
+class CompanyRUDView(ReferenceDataMixin, ConditionalGetMixin, SparseFieldsMixin,
+                     generics.RetrieveUpdateDestroyAPIView):
     lookup_field = 'pk'
     queryset = Company.get_all()
     serializer_class = CompanySerializer
@@ -1,11 +1,14 @@
-from rest_framework import generics, pagination
+from rest_framework import generics, pagination, views
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
+from apps.globals.views import ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin
 from apps.entities.models import Education
-from apps.entities.serializers import EducationSerializer
+from apps.entities.views.mixins import BulkWriteMixin
+from apps.entities.serializers import EducationSerializer, EducationBulkItemSerializer
 
 
-class UserEducationCreateListView(generics.ListCreateAPIView):
+class UserEducationCreateListView(ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin,
+                                  generics.ListCreateAPIView):
     serializer_class = EducationSerializer
     pagination_class = pagination.PageNumberPagination
     permission_classes = (IsAuthenticated,)
@@ -23,16 +26,22 @@ class UserEducationCreateListView(generics.ListCreateAPIView):
         raise PermissionDenied('You are not allowed to perform this action.')
 
 
-class UserEducationRUDView(generics.RetrieveUpdateDestroyAPIView):
+class UserEducationRUDView(ConditionalGetMixin, SparseFieldsMixin,
+                           generics.RetrieveUpdateDestroyAPIView):
     lookup_field = 'pk'
     serializer_class = EducationSerializer
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
         user_id = self.kwargs.get('user_id')
-        return Education.get_user_experiences(user_id)
+        return Education.get_user_education(user_id)
 
     def perform_destroy(self, instance):
         if Education.is_users_education(instance, self.request.user) \
            or self.request.user.is_admin():
             return super().perform_destroy(instance)
+
+
+class UserEducationBulkView(BulkWriteMixin, views.APIView):
+    model = Education
+    serializer_class = EducationBulkItemSerializer
@@ -1,11 +1,14 @@
-from rest_framework import generics, pagination
+from rest_framework import generics, pagination, views
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
+from apps.globals.views import ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin
 from apps.entities.models import Experience
-from apps.entities.serializers import ExperienceSerializer
+from apps.entities.views.mixins import BulkWriteMixin
+from apps.entities.serializers import ExperienceSerializer, ExperienceBulkItemSerializer
 
 
-class UserExperienceCreateListView(generics.ListCreateAPIView):
+class UserExperienceCreateListView(ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin,
+                                   generics.ListCreateAPIView):
     serializer_class = ExperienceSerializer
     pagination_class = pagination.PageNumberPagination
     permission_classes = (IsAuthenticated,)
@@ -23,7 +26,8 @@ class UserExperienceCreateListView(generics.ListCreateAPIView):
         raise PermissionDenied('You are not allowed to perform this action.')
 
 
-class UserExperienceRUDView(generics.RetrieveUpdateDestroyAPIView):
+class UserExperienceRUDView(ConditionalGetMixin, SparseFieldsMixin,
+                            generics.RetrieveUpdateDestroyAPIView):
     lookup_field = 'pk'
     serializer_class = ExperienceSerializer
     permission_classes = (IsAuthenticated,)
@@ -36,3 +40,8 @@ class UserExperienceRUDView(generics.RetrieveUpdateDestroyAPIView):
         if self.request.user and self.request.user.is_admin:
             return super().perform_destroy(instance)
         raise PermissionDenied('You are not allowed to perform this action.')
+
+
+class UserExperienceBulkView(BulkWriteMixin, views.APIView):
+    model = Experience
+    serializer_class = ExperienceBulkItemSerializer
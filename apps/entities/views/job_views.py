@@ -1,20 +1,53 @@
-from rest_framework import generics, pagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import generics, status, views
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
+from rest_framework.response import Response
+from apps.globals.constants import ResponseMessages
+from apps.globals.pagination import KeysetPagination
+from apps.globals.views import ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin
+from apps.entities.constants import (FACET_DEFAULT_LIMIT, FACET_MAX_LIMIT,
+                                     SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT)
+from apps.entities.facets import FACET_LOOKUPS, facet_index
 from apps.entities.models import Job, JobApplication
-from apps.entities.serializers import JobSerializer, JobApplicationSerializer
+from apps.entities.search import search
+from apps.entities.serializers import (JobSerializer, JobReadSerializer,
+                                       JobApplicationSerializer, JobApplicationReadSerializer)
 
 
-class JobCreateListView(generics.ListCreateAPIView):
-    queryset = Job.get_all()
+# the rows the read serializers nest
+JOB_LAST_MODIFIED_FIELDS = ('updated_at', 'company__updated_at', 'profession__updated_at',
+                            'poster__updated_at', 'skills_required__updated_at')
+JOB_APPLICATION_LAST_MODIFIED_FIELDS = ('updated_at', 'applicant__updated_at', 'job__updated_at',
+                                        'job__company__updated_at', 'job__profession__updated_at')
+
+
+class ReadSerializerMixin(object):
+    """Serializes reads with `read_serializer_class` and writes with `serializer_class`
+    """
+    read_serializer_class = None
+
+    def get_serializer_class(self):
+        if self.request.method in SAFE_METHODS:
+            return self.read_serializer_class
+        return super().get_serializer_class()
+
+
+class JobCreateListView(ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin,
+                        ReadSerializerMixin, generics.ListCreateAPIView):
+    last_modified_fields = JOB_LAST_MODIFIED_FIELDS
+    queryset = Job.get_all_with_relations()
     serializer_class = JobSerializer
-    pagination_class = pagination.PageNumberPagination
+    read_serializer_class = JobReadSerializer
+    pagination_class = KeysetPagination
     permission_classes = (IsAuthenticated,)
 
 
-class JobRUDView(generics.RetrieveUpdateDestroyAPIView):
+class JobRUDView(ConditionalGetMixin, SparseFieldsMixin, ReadSerializerMixin,
+                 generics.RetrieveUpdateDestroyAPIView):
+    last_modified_fields = JOB_LAST_MODIFIED_FIELDS
     lookup_field = 'pk'
-    queryset = Job.get_all()
+    queryset = Job.get_all_with_relations()
     serializer_class = JobSerializer
+    read_serializer_class = JobReadSerializer
     permission_classes = (IsAuthenticated,)
 
     def perform_destroy(self, instance):
@@ -22,17 +55,89 @@ class JobRUDView(generics.RetrieveUpdateDestroyAPIView):
             super().perform_destroy(instance)
 
 
-class JobApplicationCreateListView(generics.ListCreateAPIView):
-    queryset = JobApplication.get_all()
+class JobSearchView(views.APIView):
+    """Jobs matching `?q=`, best match first, at most `?limit=` of them"""
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = int(request.query_params.get('limit', SEARCH_DEFAULT_LIMIT))
+        except ValueError:
+            limit = 0
+
+        if not query or not 0 < limit <= SEARCH_MAX_LIMIT:
+            return Response({
+                'message': ResponseMessages.BAD_REQUEST
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        ranked = search(query, limit)
+        jobs = Job.get_all_with_relations().in_bulk([job_id for job_id, _ in ranked])
+        ranked = [(jobs[job_id], score) for job_id, score in ranked if job_id in jobs]
+
+        results = JobReadSerializer([job for job, _ in ranked], many=True).data
+        for result, (_, score) in zip(results, ranked):
+            result['score'] = round(score, 4)
+        return Response({'results': results})
+
+
+class JobFacetView(views.APIView):
+    """
+    Jobs filtered by facets, newest first, with the number of jobs per facet
+    value. Repeat a facet to match any of its values, e.g.
+    `?employment_type=full time&skills=1&skills=2&open_to_all=true`.
+    Pass the `next` value back as `?cursor=` for the following page.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        filters = {
+            facet: request.query_params.getlist(facet)
+            for facet in FACET_LOOKUPS
+            if facet in request.query_params
+        }
+        try:
+            limit = int(request.query_params.get('limit', FACET_DEFAULT_LIMIT))
+            cursor = request.query_params.get('cursor')
+            cursor = int(cursor) if cursor else None
+        except ValueError:
+            limit = 0
+
+        if not 0 < limit <= FACET_MAX_LIMIT:
+            return Response({
+                'message': ResponseMessages.BAD_REQUEST
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        count, pks, facet_counts = facet_index.query(filters, cursor=cursor, limit=limit + 1)
+        next_cursor = pks[limit - 1] if len(pks) > limit else None
+        jobs = Job.get_all_with_relations().in_bulk(pks[:limit])
+
+        return Response({
+            'count': count,
+            'next': next_cursor,
+            'facets': facet_counts,
+            'results': JobReadSerializer([jobs[pk] for pk in pks[:limit] if pk in jobs],
+                                         many=True).data
+        })
+
+
+class JobApplicationCreateListView(ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin,
+                                   ReadSerializerMixin, generics.ListCreateAPIView):
+    last_modified_fields = JOB_APPLICATION_LAST_MODIFIED_FIELDS
+    queryset = JobApplication.get_all_with_relations()
     serializer_class = JobApplicationSerializer
-    pagination_class = pagination.PageNumberPagination
+    read_serializer_class = JobApplicationReadSerializer
+    pagination_class = KeysetPagination
     permission_classes = (IsAuthenticated,)
 
 
-class JobApplicationRUDView(generics.RetrieveUpdateDestroyAPIView):
+class JobApplicationRUDView(ConditionalGetMixin, SparseFieldsMixin, ReadSerializerMixin,
+                            generics.RetrieveUpdateDestroyAPIView):
+    last_modified_fields = JOB_APPLICATION_LAST_MODIFIED_FIELDS
     lookup_field = 'pk'
-    queryset = JobApplication.get_all()
+    queryset = JobApplication.get_all_with_relations()
     serializer_class = JobApplicationSerializer
+    read_serializer_class = JobApplicationReadSerializer
     permission_classes = (IsAuthenticated,)
 
     def perform_destroy(self, instance):
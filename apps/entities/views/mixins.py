@@ -0,0 +1,179 @@
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from apps.entities.constants import BULK_MAX_ITEMS
+from apps.entities.reference_data import reference_data
+from apps.entities.serializers import PrefetchedPrimaryKeyRelatedField
+from apps.globals.constants import ResponseMessages
+from apps.globals.pagination import KeysetPagination
+from apps.globals.serializers import ValuesSerializer
+from apps.globals.utils.db import bulk_create_with_pks
+
+
+class ReferenceDataMixin(object):
+    """
+    Answers reads of a table in `apps.entities.reference_data` from the
+    process's snapshot, validators included, without touching the DB. The
+    view's queryset has to be every row of the table. Writes go to the DB
+    as usual, and serializers that need more than the table's own columns
+    read from the DB as well.
+    """
+
+    def get_snapshot(self):
+        return reference_data.get(self.queryset.model)
+
+    def get_values_serializer(self, snapshot):
+        """A `ValuesSerializer` that renders snapshot rows, None if the serializer needs more
+        """
+        values_serializer = ValuesSerializer(self.get_serializer_class())
+        if values_serializer.plan.many or not snapshot.lookups.issuperset(
+                values_serializer.plan.lookups):
+            return None
+        return values_serializer
+
+    def get_validators(self, request, kwargs):
+        snapshot = self.get_snapshot()
+        label = snapshot.model._meta.label
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg not in kwargs:
+            return f'{label}:{snapshot.digest}:{request.get_full_path()}', None
+
+        row = snapshot.by_pk.get(kwargs[lookup_url_kwarg])
+        if row is None:
+            return None, None
+        return f'{label}:{row["updated_at"].isoformat()}:{request.get_full_path()}', \
+            row['updated_at']
+
+    def list(self, request, *args, **kwargs):
+        snapshot = self.get_snapshot()
+        values_serializer = self.get_values_serializer(snapshot)
+        if values_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = snapshot.rows
+        if self.pagination_class and issubclass(self.pagination_class, KeysetPagination):
+            rows = snapshot.newest_first
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.serialize(page))
+        return Response(values_serializer.serialize(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        snapshot = self.get_snapshot()
+        values_serializer = self.get_values_serializer(snapshot)
+        if values_serializer is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        row = snapshot.by_pk.get(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        if row is None:
+            raise Http404()
+        return Response(values_serializer.serialize([row])[0])
+
+
+class BulkWriteMixin(object):
+    """
+    Creates and updates up to `BULK_MAX_ITEMS` rows of the user in the URL
+    with one POST of a list. Items with an `id` update that row, the others
+    are created. Every item is validated before anything is written, with
+    one query per model the items reference through a
+    `PrefetchedPrimaryKeyRelatedField`. The rows are written with
+    `bulk_create` and `bulk_update` in one transaction.
+
+    The response has a result per item, in order. If any item is invalid
+    nothing is written, the invalid ones come back with their errors and
+    the rest as skipped.
+    """
+    permission_classes = (IsAuthenticated,)
+    model = None
+    serializer_class = None
+
+    def _get_pk(self, item, name):
+        try:
+            return int(item[name])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def get_prefetched(self, items):
+        """`{model: {pk: row}}` of the rows `items` reference
+        """
+        prefetched = {}
+        for name, field in self.serializer_class().fields.items():
+            if isinstance(field, PrefetchedPrimaryKeyRelatedField):
+                pks = {self._get_pk(item, name) for item in items} - {None}
+                prefetched[field.get_queryset().model] = field.get_queryset().in_bulk(pks)
+        return prefetched
+
+    def get_rows_to_update(self, user_id, ids):
+        """The user's rows `ids` point at, and an error per item whose `id` does not
+        """
+        pks = {pk for pk in ids if pk is not None}
+        rows = self.model.objects.filter(user_id=user_id).in_bulk(pks) if pks else {}
+
+        errors, seen = [], set()
+        for pk in ids:
+            if pk is not None and pk not in rows:
+                errors.append({'id': ['Not found.']})
+            elif pk is not None and pk in seen:
+                errors.append({'id': ['Duplicate id.']})
+            else:
+                errors.append({})
+            seen.add(pk)
+        return rows, errors
+
+    def post(self, request, user_id):
+        if request.user.id != user_id:
+            raise PermissionDenied('You are not allowed to perform this action.')
+
+        items = request.data
+        if not isinstance(items, list) or not 0 < len(items) <= BULK_MAX_ITEMS \
+           or not all(isinstance(item, dict) for item in items):
+            return Response({
+                'message': ResponseMessages.BAD_REQUEST
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        context = {'request': request, 'prefetched': self.get_prefetched(items)}
+        serializer = self.serializer_class(data=items, many=True, context=context)
+        is_valid = serializer.is_valid()
+        ids = [self._get_pk(item, 'id') for item in items]
+        rows, id_errors = self.get_rows_to_update(user_id, ids)
+
+        item_errors = serializer.errors if not is_valid else [{}] * len(items)
+        errors = [{**id_error, **item_error}
+                  for id_error, item_error in zip(id_errors, item_errors)]
+        if any(errors):
+            return Response({'results': [
+                {'status': 'invalid', 'errors': error} if error else {'status': 'skipped'}
+                for error in errors
+            ]}, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        update_fields = {'updated_at'}
+        to_create, to_update, results = [], [], []
+        for pk, data in zip(ids, serializer.validated_data):
+            data.pop('id', None)
+            if pk is None:
+                instance = self.model(user_id=user_id, **data)
+                to_create.append(instance)
+            else:
+                instance = rows[pk]
+                for name, value in data.items():
+                    setattr(instance, name, value)
+                instance.updated_at = now
+                update_fields.update(data)
+                to_update.append(instance)
+            results.append((instance, 'updated' if pk else 'created'))
+
+        with transaction.atomic():
+            bulk_create_with_pks(self.model, to_create)
+            if to_update:
+                self.model.objects.bulk_update(to_update, sorted(update_fields))
+
+        return Response({'results': [
+            {'id': instance.pk, 'status': item_status} for instance, item_status in results
+        ]})
@@ -1,18 +1,22 @@
 from rest_framework import generics, pagination
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
+from apps.globals.views import ConditionalGetMixin, SparseFieldsMixin, ValuesListMixin
+from apps.entities.views.mixins import ReferenceDataMixin
 from apps.entities.models import Profession
 from apps.entities.serializers import ProfessionSerializer
 
 
-class ProfessionCreateListView(generics.ListCreateAPIView):
+class ProfessionCreateListView(ReferenceDataMixin, ConditionalGetMixin, SparseFieldsMixin,
+                               ValuesListMixin, generics.ListCreateAPIView):
     queryset = Profession.get_all()
     serializer_class = ProfessionSerializer
     pagination_class = pagination.PageNumberPagination
     permission_classes = (IsAuthenticated,)
 
 
-class ProfessionRUDView(generics.RetrieveUpdateDestroyAPIView):
+class ProfessionRUDView(ReferenceDataMixin, ConditionalGetMixin, SparseFieldsMixin,
+                        generics.RetrieveUpdateDestroyAPIView):
     lookup_field = 'pk'
     queryset = Profession.get_all()
     serializer_class = ProfessionSerializer
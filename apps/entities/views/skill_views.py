@@ -0,0 +1,48 @@
+from rest_framework import status, views
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from apps.entities.constants import BULK_MAX_ITEMS
+from apps.entities.models import Skill
+from apps.entities.reference_data import reference_data
+from apps.entities.serializers import SkillSerializer
+from apps.globals.constants import ResponseMessages
+from apps.globals.utils.db import bulk_create_with_pks
+
+
+class SkillBulkView(views.APIView):
+    """
+    Finds or creates up to `BULK_MAX_ITEMS` skills by name with one POST of
+    `[{"name": ...}, ...]`, in two queries for names that all exist and
+    four otherwise. Answers with each item's skill id, in order.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list) or not 0 < len(items) <= BULK_MAX_ITEMS:
+            return Response({
+                'message': ResponseMessages.BAD_REQUEST
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = SkillSerializer(data=items, many=True)
+        if not serializer.is_valid():
+            return Response({'results': [
+                {'status': 'invalid', 'errors': errors} if errors else {'status': 'skipped'}
+                for errors in serializer.errors
+            ]}, status=status.HTTP_400_BAD_REQUEST)
+
+        names = [data['name'] for data in serializer.validated_data]
+        # the oldest skill wins where names repeat
+        skill_ids = dict(Skill.objects.filter(name__in=set(names)).order_by('-pk')
+                         .values_list('name', 'pk'))
+        new_names = [name for name in dict.fromkeys(names) if name not in skill_ids]
+        if new_names:
+            skills = bulk_create_with_pks(Skill, [Skill(name=name) for name in new_names])
+            skill_ids.update((skill.name, skill.pk) for skill in skills)
+            # bulk inserts send no signals
+            reference_data.invalidate(Skill)
+
+        return Response({'results': [
+            {'id': skill_ids[name], 'status': 'created' if name in new_names else 'existing'}
+            for name in names
+        ]})
@@ -1,17 +1,27 @@
-from rest_framework import generics, pagination
+import re
+from django.http import Http404
+from rest_framework import generics, pagination, status, views
 from rest_framework.permissions import IsAuthenticated
-from apps.entities.models import UserDocument
-from apps.entities.serializers import UserDocumentSerializer
+from rest_framework.response import Response
+from apps.globals.views import ConditionalGetMixin, SparseFieldsMixin
+from apps.entities.constants import SHA256_PATTERN
+from apps.entities.exceptions import DocumentUploadException
+from apps.entities.models import UserDocument, DocumentUpload
+from apps.entities.serializers import UserDocumentSerializer, DocumentUploadSerializer
+from apps.entities.uploads import start_upload, save_chunk, complete_upload, delete_uploads
+from apps.globals.constants import ResponseMessages
 
 
-class UserDocumentCreateListView(generics.ListCreateAPIView):
+class UserDocumentCreateListView(ConditionalGetMixin, SparseFieldsMixin,
+                                 generics.ListCreateAPIView):
     queryset = UserDocument.get_all()
     serializer_class = UserDocumentSerializer
     pagination_class = pagination.PageNumberPagination
     permission_classes = (IsAuthenticated,)
 
 
-class UserDocumentRUDView(generics.RetrieveUpdateDestroyAPIView):
+class UserDocumentRUDView(ConditionalGetMixin, SparseFieldsMixin,
+                          generics.RetrieveUpdateDestroyAPIView):
     lookup_field = 'pk'
     queryset = UserDocument.get_all()
     serializer_class = UserDocumentSerializer
@@ -21,3 +31,78 @@ class UserDocumentRUDView(generics.RetrieveUpdateDestroyAPIView):
         if UserDocument.is_users_document(self.request.user, instance) \
            or self.request.user.is_admin():
             return super().perform_destroy(instance)
+
+
+class DocumentUploadView(views.APIView):
+    """
+    Starts a chunked upload, see `apps.entities.uploads`. Answers with the
+    upload to send the chunks to.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        serializer = DocumentUploadSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+
+        upload = start_upload(request.user, **serializer.validated_data)
+        return Response(DocumentUploadSerializer(upload).data, status.HTTP_201_CREATED)
+
+
+class DocumentUploadMixin(object):
+    permission_classes = (IsAuthenticated,)
+
+    def get_upload(self, request, pk):
+        upload = DocumentUpload.get_users_upload(request.user, pk)
+        if upload is None:
+            raise Http404()
+        return upload
+
+
+class DocumentUploadChunkView(DocumentUploadMixin, views.APIView):
+    """
+    `GET` answers the upload with the offset to resume from, `DELETE` drops
+    it. `PUT` takes the request body as the chunk at the `Upload-Offset`
+    header, checked against the `Upload-Chunk-SHA256` header, and streams
+    it to storage without reading it into memory.
+    """
+
+    def get(self, request, pk):
+        return Response(DocumentUploadSerializer(self.get_upload(request, pk)).data)
+
+    def put(self, request, pk):
+        upload = self.get_upload(request, pk)
+        if not request.META.get('CONTENT_LENGTH'):
+            return Response({'message': 'Content-Length is required.'},
+                            status.HTTP_411_LENGTH_REQUIRED)
+
+        checksum = request.META.get('HTTP_UPLOAD_CHUNK_SHA256', '')
+        try:
+            offset = int(request.META['HTTP_UPLOAD_OFFSET'])
+            length = int(request.META['CONTENT_LENGTH'])
+        except (KeyError, ValueError):
+            return Response({'message': ResponseMessages.BAD_REQUEST},
+                            status.HTTP_400_BAD_REQUEST)
+        if not re.match(SHA256_PATTERN, checksum):
+            return Response({'message': ResponseMessages.BAD_REQUEST},
+                            status.HTTP_400_BAD_REQUEST)
+
+        try:
+            save_chunk(upload, offset, request.stream, length, checksum.lower())
+        except DocumentUploadException as ex:
+            return Response(ex.get_data(), ex.status_code)
+        return Response(DocumentUploadSerializer(upload).data)
+
+    def delete(self, request, pk):
+        delete_uploads([self.get_upload(request, pk).pk])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class DocumentUploadCompleteView(DocumentUploadMixin, views.APIView):
+    """Turns an upload whose chunks have all arrived into a `UserDocument`"""
+
+    def post(self, request, pk):
+        try:
+            document = complete_upload(self.get_upload(request, pk))
+        except DocumentUploadException as ex:
+            return Response(ex.get_data(), ex.status_code)
+        return Response(UserDocumentSerializer(document).data, status.HTTP_201_CREATED)
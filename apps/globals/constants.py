@@ -4,3 +4,10 @@ class ResponseMessages:
 
 
 MIN_PASSWORD_LENGTH = 8
+
+# serializer classes per sparse fieldset, and `.values()` plans per serializer class
+SERIALIZER_CACHE_SIZE = 256
+
+# a failed mail task is retried this many times, this far apart
+EMAIL_MAX_RETRIES = 5
+EMAIL_RETRY_DELAY_SECONDS = 60
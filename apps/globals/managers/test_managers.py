@@ -1,7 +1,26 @@
 from contextlib import contextmanager
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
 
 
 @contextmanager
 def authenticated_user_api_client(client, user):
     yield client.force_authenticate(user=user)
     client.force_authenticate(user=None)
+
+
+@contextmanager
+def assert_max_queries(test_case, max_queries, using='default'):
+    """
+    Fails `test_case` if the block runs more than `max_queries` queries,
+    listing every query it ran. Unlike `assertNumQueries` it allows fewer,
+    so a budget can pin an endpoint whatever the number of rows it returns.
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+
+    num_queries = len(context.captured_queries)
+    if num_queries > max_queries:
+        queries = '\n'.join(f'{idx}. {query["sql"]}'
+                            for idx, query in enumerate(context.captured_queries, start=1))
+        test_case.fail(f'{num_queries} queries executed, {max_queries} allowed:\n{queries}')
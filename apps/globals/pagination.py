@@ -0,0 +1,148 @@
+import base64
+import binascii
+import json
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Newest first, keyed on `(created_at, id)`, so a page costs an index range
+    scan whatever its depth and there is no `COUNT(*)`. Cursors are opaque
+    `?cursor=` values taken from the `next`/`previous` links.
+
+    Clients that need totals can opt in to page numbers with `?page=`,
+    which answers like `PageNumberPagination`.
+
+    Besides querysets, it pages in-memory sequences of `.values()` rows that
+    are already newest first.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    page_number_pagination_class = pagination.PageNumberPagination
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_number_pagination = None
+        if self.page_number_pagination_class.page_query_param in request.query_params:
+            self.page_number_pagination = self.page_number_pagination_class()
+            self.page_number_pagination.page_size = self.page_size
+            if isinstance(queryset, QuerySet):
+                # same order as the cursors, and no unordered slicing for the paginator
+                queryset = queryset.order_by('-created_at', '-id')
+            return self.page_number_pagination.paginate_queryset(queryset, request, view)
+
+        self.base_url = request.build_absolute_uri()
+        position, reverse = self.decode_cursor(request)
+
+        results = list(self._get_window(queryset, position, reverse)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page = results
+        return results
+
+    def _get_window(self, queryset, position, reverse):
+        if not isinstance(queryset, QuerySet):
+            return self._get_sequence_window(queryset, position, reverse)
+
+        if reverse:
+            queryset = queryset.order_by('created_at', 'id')
+            if position:
+                created_at, pk = position
+                queryset = queryset.filter(Q(created_at__gt=created_at)
+                                           | Q(created_at=created_at, id__gt=pk))
+        else:
+            queryset = queryset.order_by('-created_at', '-id')
+            if position:
+                created_at, pk = position
+                queryset = queryset.filter(Q(created_at__lt=created_at)
+                                           | Q(created_at=created_at, id__lt=pk))
+        return queryset
+
+    def _get_sequence_window(self, rows, position, reverse):
+        if reverse:
+            rows = rows[::-1]
+            if position:
+                rows = [row for row in rows if (row['created_at'], row['pk']) > position]
+        elif position:
+            rows = [row for row in rows if (row['created_at'], row['pk']) < position]
+        return rows
+
+    def get_page_pks(self, queryset, request):
+        """
+        The pks `paginate_queryset` would fetch, in an unevaluated queryset,
+        or None in page number mode. Lets callers look at a page without
+        loading its rows.
+        """
+        if self.page_number_pagination_class.page_query_param in request.query_params:
+            return None
+        position, reverse = self.decode_cursor(request)
+        return self._get_window(queryset, position, reverse).values('pk')[:self.page_size + 1]
+
+    def get_paginated_response(self, data):
+        if self.page_number_pagination:
+            return self.page_number_pagination.get_paginated_response(data)
+
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, reverse):
+        """`row` is a model instance or a `.values()` row with `created_at` and `pk`
+        """
+        if isinstance(row, dict):
+            created_at, pk = row['created_at'], row['pk']
+        else:
+            created_at, pk = row.created_at, row.pk
+
+        data = json.dumps({
+            'c': created_at.isoformat(),
+            'i': pk,
+            'r': reverse
+        }, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(data.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """Returns `((created_at, id), reverse)`, `(None, False)` for the first page
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            created_at = parse_datetime(data['c'])
+            pk = int(data['i'])
+            reverse = bool(data['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (created_at, pk), reverse
@@ -1,4 +1,9 @@
+from collections import OrderedDict
+from functools import lru_cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.constants import LOOKUP_SEP
 from rest_framework import serializers
+from .constants import SERIALIZER_CACHE_SIZE
 from .exceptions import HSBadArgumentException
 
 
@@ -23,12 +28,200 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
                 self.fields.pop(field_name)
 
 
+@lru_cache(maxsize=SERIALIZER_CACHE_SIZE)
+def _get_serializer_with_fields(model_serializer, fields):
+    meta = type('Meta', (model_serializer.Meta,), {'fields': fields, 'exclude': None})
+    serializer_class = type(model_serializer.__name__, (model_serializer,), {'Meta': meta})
+    if fields != serializers.ALL_FIELDS:
+        # DRF insists that declared fields are listed in `Meta.fields`
+        serializer_class._declared_fields = OrderedDict(
+            (name, field) for name, field in serializer_class._declared_fields.items()
+            if name in fields
+        )
+    return serializer_class
+
+
 def get_serializer_with_fields(model_serializer, fields):
-    if not model_serializer.Meta:
+    """
+    Returns a subclass of `model_serializer` rendering only `fields`, made
+    once per field set and kept in an LRU cache. `model_serializer.Meta`
+    is left alone, so concurrent requests cannot see each other's fields.
+    """
+    if not getattr(model_serializer, 'Meta', None):
         raise HSBadArgumentException('Serializer doesn\'t have Meta class.')
 
-    if hasattr(model_serializer.Meta, 'exclude'):
-        delattr(model_serializer.Meta, 'exclude')
-    setattr(model_serializer.Meta, 'fields', fields)
+    if fields != serializers.ALL_FIELDS:
+        fields = tuple(fields)
+    return _get_serializer_with_fields(model_serializer, fields)
+
+
+@lru_cache(maxsize=SERIALIZER_CACHE_SIZE)
+def get_readable_fields(serializer_class):
+    """Names of the fields `serializer_class` renders, in order"""
+    return tuple(name for name, field in serializer_class().fields.items() if not field.write_only)
+
+
+def _select_related_paths(tree, prefix=''):
+    for name, subtree in tree.items():
+        if subtree:
+            yield from _select_related_paths(subtree, f'{prefix}{name}__')
+        else:
+            yield prefix + name
+
+
+def get_sparse_queryset(queryset, serializer_class):
+    """
+    `queryset` loading only the columns of the fields `serializer_class`
+    renders, with the joins and prefetches of other fields dropped. It is
+    returned as it is if a field does not map to a model field.
+    """
+    model = queryset.model
+    select_related = queryset.query.select_related
+    if select_related is True:
+        return queryset
+
+    columns, relations = [model._meta.pk.name], set()
+    for name in get_readable_fields(serializer_class):
+        field = serializer_class._declared_fields.get(name)
+        source = field.source if field is not None and field.source else name
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return queryset
+
+        if model_field.concrete and not model_field.many_to_many:
+            columns.append(model_field.name)
+        relations.add(model_field.name)
+
+    queryset = queryset.only(*columns)
+    if select_related:
+        queryset = queryset.select_related(None).select_related(*_select_related_paths(
+            {name: tree for name, tree in select_related.items() if name in relations}))
+    lookups = [
+        lookup for lookup in queryset._prefetch_related_lookups
+        if getattr(lookup, 'prefetch_to', lookup).split(LOOKUP_SEP)[0] in relations
+    ]
+    return queryset.prefetch_related(None).prefetch_related(*lookups)
+
+
+class ValuesSerializer(object):
+    """
+    Read-only twin of a `ModelSerializer` that renders `.values()` rows
+    into the same data, without building model instances or going through
+    DRF's per-field dispatch. The serializer's fields are compiled into a
+    plan of `.values()` lookups and converters once per class and reused.
+
+    Nested serializers of forward relations are read through joined lookups,
+    many-to-many fields through one extra query over the whole batch.
+    Fields it cannot read from a row, like method fields, dotted sources or
+    files, raise `HSBadArgumentException` when the plan is compiled.
+    """
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.plan = self.get_plan(serializer_class)
+
+    @staticmethod
+    @lru_cache(maxsize=SERIALIZER_CACHE_SIZE)
+    def get_plan(serializer_class):
+        return _ValuesPlan(serializer_class)
+
+    def get_values_queryset(self, queryset, *extra_lookups):
+        """`queryset` as the rows `serialize` expects, `extra_lookups` ride along unrendered
+        """
+        return queryset.prefetch_related(None).values('pk', *self.plan.lookups, *extra_lookups)
+
+    def serialize(self, rows):
+        rows = list(rows)
+        related = self.plan.fetch_related(rows)
+        return [self.plan.build(row, related) for row in rows]
+
+
+# `to_representation` of these fields returns database values as they are
+_AS_IS_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+                 serializers.PrimaryKeyRelatedField)
+_VALUE, _NESTED, _MANY = range(3)
+
+
+class _ValuesPlan(object):
+    def __init__(self, serializer_class, prefix=''):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.lookups = []
+        self.fields = []
+        self.many = {}
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+
+            if len(field.source_attrs) != 1 or isinstance(field, serializers.FileField):
+                self._unsupported(serializer_class, name)
+            try:
+                model_field = self.model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                self._unsupported(serializer_class, name)
+            lookup = prefix + field.source
+
+            if isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+                if prefix or not model_field.many_to_many or model_field.auto_created:
+                    self._unsupported(serializer_class, name)
+                self.many[name] = self._get_many_plan(model_field, field)
+                self.fields.append((name, _MANY, None, None))
+            elif isinstance(field, serializers.BaseSerializer):
+                if not (model_field.many_to_one or model_field.one_to_one and model_field.concrete):
+                    self._unsupported(serializer_class, name)
+                nested = _ValuesPlan(type(field), prefix=lookup + '__')
+                self.lookups.append(lookup)
+                self.lookups.extend(nested.lookups)
+                self.fields.append((name, _NESTED, lookup, nested))
+            else:
+                converter = None if isinstance(field, _AS_IS_FIELDS) else field.to_representation
+                self.lookups.append(lookup)
+                self.fields.append((name, _VALUE, lookup, converter))
+
+    def _unsupported(self, serializer_class, name):
+        raise HSBadArgumentException(
+            f'{serializer_class.__name__}.{name} cannot be read from `.values()` rows.')
+
+    def _get_many_plan(self, model_field, field):
+        through = model_field.remote_field.through
+        source = model_field.m2m_field_name()
+        target = model_field.m2m_reverse_field_name()
+        nested = None
+        lookups = [f'{target}_id']
+        if isinstance(field, serializers.ListSerializer):
+            nested = _ValuesPlan(type(field.child), prefix=target + '__')
+            lookups = nested.lookups
+        return through, source, target, lookups, nested
+
+    def fetch_related(self, rows):
+        """Returns `{field name: {row pk: [item, ...]}}` of the many-to-many fields
+        """
+        related = {}
+        pks = [row['pk'] for row in rows]
+        for name, (through, source, target, lookups, nested) in self.many.items():
+            items = related[name] = {}
+            if not pks:
+                continue
+
+            links = through.objects.filter(**{f'{source}__in': pks}) \
+                .order_by(f'{source}_id', f'{target}_id')
+            if nested is None:
+                for pk, target_pk in links.values_list(f'{source}_id', *lookups):
+                    items.setdefault(pk, []).append(target_pk)
+            else:
+                for link in links.values(f'{source}_id', *lookups):
+                    items.setdefault(link[f'{source}_id'], []).append(nested.build(link))
+        return related
 
-    return model_serializer
+    def build(self, row, related=None):
+        data = {}
+        for name, kind, lookup, extra in self.fields:
+            if kind == _VALUE:
+                value = row[lookup]
+                data[name] = value if extra is None or value is None else extra(value)
+            elif kind == _NESTED:
+                data[name] = None if row[lookup] is None else extra.build(row)
+            else:
+                data[name] = related[name].get(row['pk'], [])
+        return data
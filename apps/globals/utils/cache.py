@@ -0,0 +1,51 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStats(object):
+    """
+    Thread-safe hit/miss counters for an in-process or shared cache layer.
+    With `log_every`, the counts and hit rate are logged as `name` every
+    that many lookups.
+    """
+
+    def __init__(self, name=None, log_every=0):
+        self._lock = threading.Lock()
+        self.name = name
+        self.log_every = log_every
+        self.hits = 0
+        self.misses = 0
+
+    def _log(self):
+        stats = self.as_dict()
+        logger.info(f'{self.name} cache: {stats["hits"]} hits, {stats["misses"]} misses, '
+                    f'{stats["hit_rate"]:.1%} hit rate')
+
+    def _count(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            should_log = self.log_every and (self.hits + self.misses) % self.log_every == 0
+        if should_log:
+            self._log()
+
+    def hit(self):
+        self._count(1, 0)
+
+    def miss(self):
+        self._count(0, 1)
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,77 @@
+import time
+from django.db import connections, router, transaction
+
+
+def raw_delete(model, pks):
+    """
+    Deletes rows by primary key with a single DELETE statement.
+    Skips Django's collector: no rows are loaded, no signals sent and no
+    cascades followed, so callers must deal with referencing rows themselves.
+    """
+    if not pks:
+        return 0
+
+    db_alias = router.db_for_write(model)
+    connection = connections[db_alias]
+    quote_name = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(pks))
+    sql = (f'DELETE FROM {quote_name(model._meta.db_table)} '
+           f'WHERE {quote_name(model._meta.pk.column)} IN ({placeholders})')
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, list(pks))
+        return cursor.rowcount
+
+
+def delete_in_batches(queryset, batch_size=500, time_budget=30, before_delete=None, delete=None):
+    """
+    Deletes the rows matched by `queryset` in primary key order, `batch_size`
+    rows per transaction, until none are left or `time_budget` seconds pass.
+
+    `before_delete(pks)` runs in each batch's transaction ahead of the delete,
+    e.g. to detach referencing rows. `delete(model, pks)` defaults to `raw_delete`.
+
+    Returns a `(num_deleted, elapsed_seconds)` tuple.
+    """
+    model = queryset.model
+    delete = delete or raw_delete
+    queryset = queryset.order_by('pk')
+
+    started_at = time.monotonic()
+    num_deleted = 0
+    last_pk = None
+    while time.monotonic() - started_at < time_budget:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        pks = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+
+        with transaction.atomic(using=router.db_for_write(model)):
+            if before_delete:
+                before_delete(pks)
+            num_deleted += delete(model, pks)
+
+        last_pk = pks[-1]
+        if len(pks) < batch_size:
+            break
+
+    return num_deleted, time.monotonic() - started_at
+
+
+def bulk_create_with_pks(model, objs, batch_size=None):
+    """
+    `bulk_create` that leaves every object with its pk, also on databases
+    that cannot return pks from a bulk insert, like SQLite. There the
+    highest pks are read back in the same transaction, which is only right
+    while nobody else inserts into the table meanwhile, as SQLite's
+    database-wide write lock makes sure.
+    """
+    db_alias = router.db_for_write(model)
+    with transaction.atomic(using=db_alias, savepoint=False):
+        model.objects.using(db_alias).bulk_create(objs, batch_size=batch_size)
+        if objs and objs[-1].pk is None:
+            pks = model.objects.using(db_alias).order_by('-pk') \
+                .values_list('pk', flat=True)[:len(objs)]
+            for obj, pk in zip(objs, reversed(list(pks))):
+                obj.pk = pk
+    return objs
@@ -1,22 +1,157 @@
+import time
+from smtplib import SMTPDataError, SMTPRecipientsRefused
 from django.conf import settings
-from django.core.mail import send_mail as django_send_mail
+from django.core.cache import caches
+from django.core.mail import EmailMessage, get_connection
 from celery import shared_task
+from celery.utils.log import get_task_logger
 
+from apps.globals.constants import EMAIL_MAX_RETRIES, EMAIL_RETRY_DELAY_SECONDS
 
-# TODO: add logging on success/error of the sending email
-@shared_task
-def send_mail(subject, message, recipients):
+logging = get_task_logger(__name__)
+
+# acked once the mails are out, so a worker that dies mid-send leaves the task to another
+MAIL_TASK_OPTIONS = {
+    'bind': True,
+    'acks_late': True,
+    'reject_on_worker_lost': True,
+    'max_retries': EMAIL_MAX_RETRIES,
+    'default_retry_delay': EMAIL_RETRY_DELAY_SECONDS
+}
+
+
+class RateLimiter(object):
+    """
+    Lets through `rate` messages a second across every process sharing the
+    cache of `EMAIL_RATE_CACHE_ALIAS`, counted in one-second slots.
     """
-    Returns a boolean response to indicate status
+    KEY_PREFIX = 'hs:email-rate'
+
+    def __init__(self, rate, clock=time.time, sleep=time.sleep):
+        self.capacity = max(int(rate), 1)
+        self.clock = clock
+        self.sleep = sleep
+
+    def get_cache(self):
+        return caches[getattr(settings, 'EMAIL_RATE_CACHE_ALIAS', 'default')]
+
+    def _take(self, cache, key, num):
+        cache.add(key, 0, 10)
+        try:
+            return cache.incr(key, num)
+        except ValueError:
+            # expired since `add`
+            cache.add(key, num, 10)
+            return num
+
+    def acquire(self, num=1):
+        """Blocks until `num` (at most `capacity`) messages fit a second. Returns the seconds waited
+        """
+        cache = self.get_cache()
+        waited = 0
+        while True:
+            now = self.clock()
+            slot = int(now)
+            key = f'{self.KEY_PREFIX}:{slot}'
+            if self._take(cache, key, num) <= self.capacity:
+                return waited
+
+            # give the slot back to the other senders and wait for the next one
+            try:
+                cache.decr(key, num)
+            except ValueError:
+                pass
+            delay = slot + 1 - now
+            self.sleep(delay)
+            waited += delay
+
+
+def is_permanent_error(error):
+    """A 5xx refusal of one mail, which sending it again will not change"""
+    if isinstance(error, SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return error.smtp_code >= 500
+
+
+def send_messages(messages, rate_limiter=None):
+    """
+    Sends `messages` one by one over a single connection, in chunks that fit
+    the rate limit. A mail the server refuses for good is logged and skipped,
+    one it refuses for now is left for a retry, and any other error stops
+    the rest, which are left for a retry too.
+
+    Returns how many were sent, the indexes of the messages to retry, and
+    the error to retry them for or None.
+    """
+    rate_limiter = rate_limiter or RateLimiter(getattr(settings, 'EMAIL_RATE_LIMIT', 10))
+    num_sent, to_retry, error = 0, [], None
+    # messages before this one are sent, skipped or left for a retry
+    position = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for start in range(0, len(messages), rate_limiter.capacity):
+            chunk = messages[start:start + rate_limiter.capacity]
+            waited = rate_limiter.acquire(len(chunk))
+
+            started_at = time.monotonic()
+            for position, message in enumerate(chunk, start):
+                try:
+                    connection.send_messages([message])
+                    num_sent += 1
+                except (SMTPDataError, SMTPRecipientsRefused) as ex:
+                    if is_permanent_error(ex):
+                        logging.error(f'Email refused, not sending it again: {ex}')
+                    else:
+                        to_retry.append(position)
+                        error = ex
+            position = start + len(chunk)
+            logging.info(f'Sent {len(chunk)} emails in '
+                         f'{(time.monotonic() - started_at) * 1000:.0f}ms '
+                         f'after {waited:.2f}s of quota wait')
+    except Exception as ex:
+        logging.error(f'Sending emails failed after {num_sent}/{len(messages)}: {ex}')
+        to_retry.extend(range(position, len(messages)))
+        error = ex
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return num_sent, to_retry, error
+
+
+def _get_message(subject, message, recipients):
+    return EmailMessage(subject, message, settings.EMAIL_HOST_USER, recipients)
+
+
+@shared_task(**MAIL_TASK_OPTIONS)
+def send_mails(self, mails):
+    """
+    Sends `[subject, message, recipients]` mails over one connection. The
+    outbox relay publishes pending `send_mail` calls as one of these, see
+    `OUTBOX_BATCH_TASKS`. On an error the task is retried with the mails
+    not sent yet, except those refused for good, and fails once the retries
+    run out.
+    """
+    mails = [mail for mail in mails if mail[1] and mail[2]]
+    num_sent, to_retry, error = send_messages([_get_message(*mail) for mail in mails])
+    if to_retry:
+        raise self.retry(args=[[mails[idx] for idx in to_retry]], exc=error)
+    return num_sent
+
+
+@shared_task(**MAIL_TASK_OPTIONS)
+def send_mail(self, subject, message, recipients):
+    """
+    Returns a boolean response to indicate status.
+    Retried on an error the mail may get past later, and fails once the
+    retries run out.
     """
     if not (message and recipients):
         return False
 
-    num_emails_sent = django_send_mail(
-        subject,
-        message,
-        settings.EMAIL_HOST_USER,
-        recipients
-    )
-
-    return bool(num_emails_sent)
+    num_sent, to_retry, error = send_messages([_get_message(subject, message, recipients)])
+    if to_retry:
+        raise self.retry(exc=error)
+    return bool(num_sent)
@@ -0,0 +1,148 @@
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .serializers import (ValuesSerializer, get_readable_fields, get_serializer_with_fields,
+                          get_sparse_queryset)
+
+
+class ConditionalGetMixin(object):
+    """
+    Answers GETs of generic views with 304 while the client's copy is current.
+
+    Validators come from one aggregate over the view's queryset, the latest
+    of `last_modified_fields` and the row count, without loading any row.
+    Views that render related rows list their `updated_at` there as well.
+    Lists paginated with a `get_page_pks` paginator, like `KeysetPagination`,
+    read `pk` and `last_modified_fields` of the page's rows instead of
+    counting the whole table.
+
+    A detail view sends an ETag and a Last-Modified. The ETag also covers
+    the query string, like `?fields=`. A list view sends no Last-Modified,
+    since deleting a row does not move the latest `updated_at`.
+    """
+    last_modified_fields = ('updated_at',)
+
+    def get_etag_scope(self):
+        """Views that render the same rows differently per viewer tell them apart here
+        """
+        return ''
+
+    def get_validators(self, request, kwargs):
+        """Returns the ETag source and the last modification time, `(None, None)` for a 404
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        is_detail = lookup_url_kwarg in kwargs
+        if is_detail:
+            queryset = queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+
+        page_pks = None
+        if not is_detail and hasattr(self.paginator, 'get_page_pks'):
+            page_pks = self.paginator.get_page_pks(queryset, request)
+        if page_pks is not None:
+            # a keyset page has no count to spare, so only its own rows are looked at
+            rows = queryset.filter(pk__in=page_pks).order_by('pk', *self.last_modified_fields) \
+                .values_list('pk', *self.last_modified_fields)
+            source = hashlib.md5(repr(list(rows)).encode()).hexdigest()
+            return f'{queryset.model._meta.label}:{source}:{request.get_full_path()}', None
+
+        aggregate = queryset.order_by().aggregate(
+            count=Count('pk', distinct=True),
+            **{f'last_modified_{idx}': Max(field)
+               for idx, field in enumerate(self.last_modified_fields)}
+        )
+        count = aggregate.pop('count')
+        last_modified = max(filter(None, aggregate.values()), default=None)
+        if is_detail and not count:
+            return None, None
+
+        source = f'{queryset.model._meta.label}:{count}:' \
+                 f'{last_modified.isoformat() if last_modified else ""}'
+        if is_detail:
+            return f'{source}:{kwargs[lookup_url_kwarg]}:{request.get_full_path()}', last_modified
+        return f'{source}:{request.get_full_path()}', None
+
+    def get(self, request, *args, **kwargs):
+        source, last_modified = self.get_validators(request, kwargs)
+        if source is None:
+            return super().get(request, *args, **kwargs)
+
+        source = f'{self.get_etag_scope()}:{request.accepted_media_type}:{source}'
+        etag = quote_etag(hashlib.md5(source.encode()).hexdigest())
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class ValuesListMixin(object):
+    """
+    Lists through a `ValuesSerializer` of the view's serializer class, one
+    `.values()` query per page instead of model instances. The response is
+    the same as `ListModelMixin.list` gives. `values_extra_lookups` are read
+    for the paginator, `KeysetPagination` needs `created_at`.
+    """
+    values_extra_lookups = ('created_at',)
+
+    def list(self, request, *args, **kwargs):
+        values_serializer = ValuesSerializer(self.get_serializer_class())
+        queryset = values_serializer.get_values_queryset(
+            self.filter_queryset(self.get_queryset()), *self.values_extra_lookups)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.serialize(page))
+        return Response(values_serializer.serialize(queryset))
+
+
+class SparseFieldsMixin(object):
+    """
+    Narrows reads to the fields named in `?fields=id,name`, in the response
+    and in the SQL. The serializer class for a field set is made once, and
+    the queryset loads only its columns, joins and prefetches. Lists with
+    `ValuesListMixin` read only those columns as it is.
+    """
+    fields_query_param = 'fields'
+
+    def get_requested_fields(self, serializer_class):
+        """The requested fields in `serializer_class` order, None if there is no `?fields=`
+        """
+        value = self.request.query_params.get(self.fields_query_param)
+        if value is None or self.request.method not in SAFE_METHODS:
+            return None
+
+        requested = {name.strip() for name in value.split(',')} - {''}
+        readable = get_readable_fields(serializer_class)
+        unknown = requested.difference(readable)
+        if not requested or unknown:
+            raise ParseError(f'Unknown fields: {", ".join(sorted(unknown))}' if unknown
+                             else 'No fields requested')
+        return tuple(name for name in readable if name in requested)
+
+    def get_sparse_serializer_class(self, serializer_class):
+        fields = self.get_requested_fields(serializer_class)
+        if fields is None:
+            return serializer_class
+        return get_serializer_with_fields(serializer_class, fields)
+
+    def get_serializer_class(self):
+        return self.get_sparse_serializer_class(super().get_serializer_class())
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS \
+           or self.fields_query_param not in self.request.query_params:
+            return queryset
+        return get_sparse_queryset(queryset, self.get_serializer_class())
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, AuthOTP
+from .models import User, AuthOTP, ClientSettings
 
 
-admin.site.register([User, AuthOTP])
+admin.site.register([User, AuthOTP, ClientSettings])
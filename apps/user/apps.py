@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 
 class UserConfig(AppConfig):
-    name = 'user'
+    name = 'apps.user'
+    label = 'user'
+
+    def ready(self):
+        from . import signals  # noqa: F401
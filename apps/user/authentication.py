@@ -0,0 +1,165 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from oauth2_provider.contrib.rest_framework import OAuth2Authentication
+from oauth2_provider.models import get_access_token_model
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from apps.globals.utils.cache import CacheStats
+from .constants import AUTH_TOKEN_CACHE_SECONDS, AUTH_TOKEN_CACHE_STATS_LOG_EVERY
+from .models import User
+from .signed_tokens import (
+    SignedAccessToken,
+    SignedTokenException,
+    decode_signed_token,
+    is_signed_token,
+    revocation_list
+)
+
+USER_SNAPSHOT_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name',
+                        'is_active', 'is_staff', 'is_superuser')
+TOKEN_SNAPSHOT_FIELDS = ('id', 'user_id', 'application_id', 'expires', 'scope')
+
+
+def get_token_cache():
+    return caches[getattr(settings, 'AUTH_TOKEN_CACHE_ALIAS', 'default')]
+
+
+def get_token_cache_key(token: str):
+    return 'hs:auth:' + hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_bearer_token(request):
+    auth = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(auth) == 2 and auth[0].lower() == 'bearer':
+        return auth[1]
+    return None
+
+
+def revoke_cached_token(token: str):
+    get_token_cache().delete(get_token_cache_key(token))
+
+
+def revoke_cached_user_tokens(user_id):
+    """Drops the cached snapshots of every token of a user, e.g. once the user changed"""
+    tokens = get_access_token_model().objects.filter(user_id=user_id) \
+        .values_list('token', flat=True)
+    get_token_cache().delete_many([get_token_cache_key(token) for token in tokens])
+
+
+def _snapshot(instance, fields):
+    return {field: getattr(instance, field) for field in fields}
+
+
+def _from_snapshot(model, snapshot):
+    """Builds a model instance with every field outside `snapshot` deferred
+    """
+    field_names = [field.attname for field in model._meta.concrete_fields
+                   if field.attname in snapshot]
+    return model.from_db(
+        router.db_for_read(model),
+        field_names,
+        [snapshot[field_name] for field_name in field_names]
+    )
+
+
+class CachedOAuth2Authentication(OAuth2Authentication):
+    """
+    `OAuth2Authentication` that remembers validated bearer tokens in the cache.
+
+    Entries are keyed by the token's SHA-256 and hold only a slim snapshot of
+    the token and its user. `request.user` is a `User` with every other field
+    deferred. Entries live for at most `AUTH_TOKEN_CACHE_SECONDS` and never past
+    the token's expiry. They are dropped when the token is saved or deleted,
+    which covers revocation and refresh, and when its user is saved or
+    deleted. Changes that skip signals, like `QuerySet.update()`, show
+    within `AUTH_TOKEN_CACHE_SECONDS`.
+
+    Hits and misses are counted in `stats` and logged every
+    `AUTH_TOKEN_CACHE_STATS_LOG_EVERY` authentications.
+    """
+    stats = CacheStats('Auth token', AUTH_TOKEN_CACHE_STATS_LOG_EVERY)
+
+    def _load_snapshot(self, snapshot, token):
+        user = _from_snapshot(User, snapshot['user'])
+        access_token = _from_snapshot(get_access_token_model(), snapshot['token'])
+        access_token.token = token
+        access_token.user = user
+        return user, access_token
+
+    def _store(self, key, user, access_token):
+        ttl = min(
+            AUTH_TOKEN_CACHE_SECONDS,
+            int((access_token.expires - timezone.now()).total_seconds())
+        )
+        if ttl <= 0:
+            return
+
+        get_token_cache().set(key, {
+            'user': _snapshot(user, USER_SNAPSHOT_FIELDS),
+            'token': _snapshot(access_token, TOKEN_SNAPSHOT_FIELDS)
+        }, ttl)
+
+    def authenticate(self, request):
+        token = get_bearer_token(request)
+        if token is None:
+            return super().authenticate(request)
+
+        key = get_token_cache_key(token)
+        snapshot = get_token_cache().get(key)
+        if snapshot is not None:
+            user, access_token = self._load_snapshot(snapshot, token)
+            if not access_token.is_expired():
+                self.stats.hit()
+                return user, access_token
+
+        self.stats.miss()
+        result = super().authenticate(request)
+        if result is not None:
+            self._store(key, *result)
+        return result
+
+
+class SignedTokenUser(SimpleLazyObject):
+    """
+    `request.user` for signed tokens. Answers `pk`, `id` and `is_authenticated`
+    from the token and loads the `User` row on first access to anything else.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id):
+        super().__init__(lambda: User.objects.get(pk=user_id))
+        self.__dict__['pk'] = self.__dict__['id'] = user_id
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Authenticates self-contained signed access tokens without any DB or
+    cache round trip, see `apps.user.signed_tokens`.
+    `request.user` is a `SignedTokenUser`.
+    Other bearer tokens are left to the next authentication class.
+    """
+    www_authenticate_realm = 'api'
+
+    def authenticate(self, request):
+        token = get_bearer_token(request)
+        if token is None or not is_signed_token(token):
+            return None
+
+        try:
+            payload = decode_signed_token(token)
+        except SignedTokenException as ex:
+            raise AuthenticationFailed(str(ex))
+
+        if revocation_list.is_revoked(payload):
+            raise AuthenticationFailed('Token has been revoked.')
+
+        return SignedTokenUser(payload['sub']), SignedAccessToken(token, payload)
+
+    def authenticate_header(self, request):
+        return f'Bearer realm="{self.www_authenticate_realm}"'
@@ -0,0 +1,42 @@
+import threading
+import time
+from oauth2_provider.models import get_application_model
+
+from .constants import CLIENT_REGISTRY_TTL_SECONDS
+
+
+class ClientRegistry(object):
+    """
+    Per-process cache of OAuth `Application`s keyed by `client_id`.
+
+    Entries live for `ttl` seconds. Saving or deleting an `Application`
+    clears this process's registry right away, and other processes pick
+    the change up once their entries expire.
+    Unknown client ids are not cached, so they can't grow the registry.
+    """
+
+    def __init__(self, ttl=CLIENT_REGISTRY_TTL_SECONDS):
+        self.ttl = ttl
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, client_id: str):
+        now = time.monotonic()
+        entry = self._clients.get(client_id)
+        if entry and entry[1] > now:
+            return entry[0]
+
+        client = get_application_model().objects.select_related(
+            'hs_settings'
+        ).filter(client_id=client_id).first()
+        if client is not None:
+            with self._lock:
+                self._clients[client_id] = (client, now + self.ttl)
+        return client
+
+    def clear(self):
+        with self._lock:
+            self._clients = {}
+
+
+client_registry = ClientRegistry()
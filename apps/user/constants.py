@@ -3,6 +3,39 @@ OTP_MAX_ATTEMPTS = 5
 OTP_MAX_RESENDS = 3
 
 EMAIL_BLOCK_SECONDS = 7200
+# how long cached OTP state (resends, attempts) outlives the last write
+OTP_SESSION_SECONDS = EMAIL_BLOCK_SECONDS
+
+# unverified sign-ups older than this get removed
+STALE_USER_SECONDS = 7 * 24 * 3600
+
+CLIENT_REGISTRY_TTL_SECONDS = 300
+# bounds how stale the cached user snapshot of an access token can get
+AUTH_TOKEN_CACHE_SECONDS = 60
+# the token cache's hit rate is logged every this many authentications
+AUTH_TOKEN_CACHE_STATS_LOG_EVERY = 1000
+
+EMAIL_FILTER_ERROR_RATE = 0.001
+EMAIL_FILTER_MIN_CAPACITY = 100000
+EMAIL_FILTER_REBUILD_SECONDS = 3600
+
+SIGNED_TOKEN_PREFIX = 'hs.'
+# how long a revocation may take to reach every process
+SIGNED_TOKEN_REVOCATION_SYNC_SECONDS = 5
+
+# how long an accepted sign-up may wait for a worker
+SIGN_UP_PASSWORD_TTL_SECONDS = 600
+SIGN_UP_REQUEST_RETENTION_SECONDS = 24 * 3600
+
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_RELAY_INTERVAL_SECONDS = 0.5
+# a claim not marked published by then is from a relay that died, and is taken over
+OUTBOX_CLAIM_SECONDS = 60
+# published rows are kept this long for debugging
+OUTBOX_RETENTION_SECONDS = 24 * 3600
+
+PURGE_BATCH_SIZE = 500
+PURGE_TIME_BUDGET_SECONDS = 60
 
 
 class ResponseMessages(object):
@@ -19,3 +52,6 @@ class ResponseMessages(object):
     NO_USER_FOUND = 'No User Found'
     USER_WITH_EMAIL_EXISTS = 'User with this email already exists!'
     INVALID_PASSWORD = 'Invalid password.'
+    SIGN_UP_REQUEST_EXPIRED = 'Sign-up request expired. Please try again.'
+    SIGN_UP_REQUEST_FAILED = 'Sign-up request failed. Please try again.'
+    IDEMPOTENCY_KEY_REUSED = 'Idempotency-Key was already used for another email.'
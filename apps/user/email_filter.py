@@ -0,0 +1,111 @@
+import hashlib
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+from apps.globals.utils.bloom import BloomFilter
+from .constants import (
+    EMAIL_FILTER_ERROR_RATE,
+    EMAIL_FILTER_MIN_CAPACITY,
+    EMAIL_FILTER_REBUILD_SECONDS
+)
+from .models import User
+
+
+class EmailFilter(object):
+    """
+    Per-process Bloom filter of the emails in the `User` table, so lookups
+    for emails nobody registered can be answered without a query.
+
+    `might_exist` returning False means no user has that email. True means
+    the caller still has to ask the DB.
+
+    The filter is built on first use and rebuilt from the DB every
+    `rebuild_seconds`, in a background thread unless
+    `EMAIL_FILTER_BACKGROUND_REBUILD` is off. Lookups keep using the old
+    filter meanwhile, and every lookup answers True until the first build
+    is done. Saved users are added right away. Other processes learn about
+    them from a marker in the shared cache that outlives their next rebuild.
+    Changes that skip `post_save`, like `QuerySet.update()`, only show up
+    after a rebuild.
+    """
+
+    def __init__(self, error_rate=None, rebuild_seconds=EMAIL_FILTER_REBUILD_SECONDS):
+        self.error_rate = error_rate
+        self.rebuild_seconds = rebuild_seconds
+        self._bloom = None
+        self._built_at = None
+        self._rebuilding = False
+        self._lock = threading.Lock()
+
+    def _get_cache(self):
+        return caches[getattr(settings, 'EMAIL_FILTER_CACHE_ALIAS', 'default')]
+
+    def _get_recent_key(self, email: str):
+        return f'hs:email-filter:recent:{hashlib.md5(email.encode()).hexdigest()}'
+
+    def _get_error_rate(self):
+        return self.error_rate or getattr(settings, 'EMAIL_FILTER_ERROR_RATE',
+                                          EMAIL_FILTER_ERROR_RATE)
+
+    def rebuild(self):
+        """Builds a new filter from the `User` table and swaps it in
+        """
+        started_at = time.monotonic()
+        emails = User.objects.exclude(email='').values_list('email', flat=True)
+        bloom = BloomFilter(
+            capacity=max(emails.count() * 2, EMAIL_FILTER_MIN_CAPACITY),
+            error_rate=self._get_error_rate()
+        )
+        bloom.update(emails.iterator(chunk_size=10000))
+
+        with self._lock:
+            self._bloom, self._built_at = bloom, started_at
+            self._rebuilding = False
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        finally:
+            self._rebuilding = False
+            connection.close()
+
+    def _ensure_fresh(self):
+        if self._built_at is not None and \
+           time.monotonic() - self._built_at < self.rebuild_seconds:
+            return
+
+        if not getattr(settings, 'EMAIL_FILTER_BACKGROUND_REBUILD', True):
+            self.rebuild()
+            return
+
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def add(self, email: str):
+        if not email:
+            return
+        # covers the processes whose filter was built before this email existed
+        self._get_cache().set(self._get_recent_key(email), True, 2 * self.rebuild_seconds)
+        bloom = self._bloom
+        if bloom is not None:
+            bloom.add(email)
+
+    def might_exist(self, email: str):
+        self._ensure_fresh()
+        bloom = self._bloom
+        if bloom is None or email in bloom:
+            return True
+        return bool(self._get_cache().get(self._get_recent_key(email)))
+
+    def clear(self):
+        with self._lock:
+            self._bloom = self._built_at = None
+
+
+email_filter = EmailFilter()
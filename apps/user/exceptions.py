@@ -1,2 +1,14 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
 class AuthOTPException(Exception):
     pass
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Server busy. Please try again shortly.'
+    default_code = 'password_hashing_busy'
+    # sent as `Retry-After` by DRF's exception handler
+    wait = 1
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher with the iterations from `PBKDF2_ITERATIONS`,
+    as suggested by `benchmark_password_hashers` for this host.
+    Hashes with other iterations still verify and are redone at the next login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PBKDF2_ITERATIONS', hashers.PBKDF2PasswordHasher.iterations)
@@ -0,0 +1,52 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+
+from .exceptions import PasswordHashingBusy
+
+
+class PasswordHashingPool(object):
+    """
+    Runs password hashing on at most `max_workers` threads per process.
+    hashlib's PBKDF2 releases the GIL, so pooled hashes don't stall the
+    request threads.
+
+    At most `max_pending` more calls may wait for a thread. Past that,
+    `run` gives up after `wait_seconds` and raises `PasswordHashingBusy`
+    (a 503), so a sign-up burst is turned away instead of queueing without
+    limit.
+    """
+
+    def __init__(self, max_workers=2, max_pending=4, wait_seconds=0.5):
+        self.max_workers = max_workers
+        self.wait_seconds = wait_seconds
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+
+    def _get_executor(self):
+        # forked worker processes can't use the parent's threads
+        if self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor_pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='password-hashing')
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def run(self, func, *args):
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            raise PasswordHashingBusy()
+        try:
+            return self._get_executor().submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+
+password_hashing = PasswordHashingPool(
+    max_workers=getattr(settings, 'PASSWORD_HASHING_WORKERS', 2),
+    max_pending=getattr(settings, 'PASSWORD_HASHING_MAX_PENDING', 4),
+    wait_seconds=getattr(settings, 'PASSWORD_HASHING_WAIT_SECONDS', 0.5)
+)
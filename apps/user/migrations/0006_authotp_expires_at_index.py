@@ -0,0 +1,32 @@
+# Generated by Django 2.2.13 on 2026-10-18 02:42
+
+from django.db import migrations, models
+
+# oauth2_provider's tables, indexed for the purge tasks in `apps.user.tasks`
+OAUTH2_PROVIDER_INDEXES = [
+    ('oauth2_provider_accesstoken', 'expires'),
+    ('oauth2_provider_grant', 'expires'),
+    ('oauth2_provider_refreshtoken', 'revoked'),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oauth2_provider', '0006_auto_20171214_2232'),
+        ('user', '0005_auto_20190808_1501'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='authotp',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ] + [
+        migrations.RunSQL(
+            f'CREATE INDEX "{table}_{column}_idx" ON "{table}" ("{column}");',
+            f'DROP INDEX "{table}_{column}_idx";'
+        )
+        for table, column in OAUTH2_PROVIDER_INDEXES
+    ]
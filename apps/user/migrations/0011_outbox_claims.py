@@ -0,0 +1,23 @@
+# Generated by Django 2.2.13 on 2026-10-18 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0010_async_sign_up'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='claim_token',
+            field=models.UUIDField(db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='claimed_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
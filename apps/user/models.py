@@ -1,10 +1,18 @@
-from django.db import models
+import json
+import uuid
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, F, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 from datetime import timedelta
 from oauth2_provider.models import Application
 
 from apps.globals.utils.string import generate_random_string
+from .hashing import password_hashing
+from .otp_backends import get_otp_backend
 from .constants import (
     OTP_EXPIRY_SECONDS,
     OTP_MAX_ATTEMPTS,
@@ -16,6 +24,7 @@ from .exceptions import AuthOTPException
 
 
 class User(AbstractUser):
+    email = models.EmailField(_('email address'), blank=True, db_index=True)
     about = models.TextField(default='', blank=True)
     primary_phone_no = models.CharField(max_length=15, null=True)
     secondary_phone_no = models.CharField(max_length=15, null=True)
@@ -35,11 +44,34 @@ class User(AbstractUser):
             'email': email,
             'username': email
         })
-        user = User.objects.create(**kwargs)
+        user = User(**kwargs)
         user.set_password(password)
         user.save()
         return user
 
+    def set_password(self, raw_password):
+        """Hashes on `password_hashing`'s bounded pool, may raise `PasswordHashingBusy`
+        """
+        self.password = password_hashing.run(make_password, raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """
+        Checks on `password_hashing`'s bounded pool, may raise `PasswordHashingBusy`.
+        A hash made with outdated hasher settings is replaced with a new one
+        on the way, so tuning `PBKDF2_ITERATIONS` reaches users as they log in.
+        """
+        new_hashes = []
+        is_correct = password_hashing.run(
+            check_password, raw_password, self.password,
+            lambda password: new_hashes.append(make_password(password))
+        )
+        if new_hashes:
+            self.password = new_hashes[0]
+            self._password = None
+            self.save(update_fields=['password'])
+        return is_correct
+
     @staticmethod
     def get_all_users():
         return User.objects.all()
@@ -53,6 +85,37 @@ class User(AbstractUser):
             'profile_picture'
         ]
 
+    @classmethod
+    def _get_profile_part_stamp(cls, related_name):
+        """Latest `updated_at` and row count of one reverse relation, as subqueries"""
+        relation = cls._meta.get_field(related_name)
+        rows = relation.related_model.objects.filter(**{relation.field.name: OuterRef('pk')}) \
+            .order_by().values(relation.field.name)
+        return (
+            Subquery(rows.annotate(latest=Max('updated_at')).values('latest')),
+            Coalesce(Subquery(rows.annotate(count=Count('pk')).values('count')), 0)
+        )
+
+    @classmethod
+    def get_profile_stamp(cls, pk):
+        """
+        Latest `updated_at` and row count of each part of an active user's
+        profile in one query, None if there is no such user. Counts catch
+        deleted rows, which leave no `updated_at` behind. Each part is
+        aggregated in a subquery of its own, joining them would multiply
+        their rows.
+        """
+        annotations = {}
+        for part, related_name in (('experiences', 'professions'), ('education', 'education'),
+                                   ('documents', 'documents')):
+            annotations[f'{part}_updated_at'], annotations[f'num_{part}'] = \
+                cls._get_profile_part_stamp(related_name)
+
+        return cls.objects.filter(pk=pk, is_active=True).annotate(**annotations).values_list(
+            'updated_at', 'experiences_updated_at', 'num_experiences', 'education_updated_at',
+            'num_education', 'documents_updated_at', 'num_documents'
+        ).first()
+
     def __str__(self):
         return self.username
 
@@ -61,7 +124,7 @@ class AuthOTP(models.Model):
     client = models.ForeignKey(Application, related_name='otps', on_delete=models.CASCADE)
     email = models.EmailField(unique=True)
     one_time_code = models.CharField(max_length=8, blank=False)
-    expires_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
     blocked_until = models.DateTimeField(null=True)
     attempts_used = models.IntegerField(default=0)
     resends_used = models.IntegerField(default=0)
@@ -69,35 +132,48 @@ class AuthOTP(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    def _update_attempts(self):
-        if self.is_email_blocked():
-            return
+    def _update_attempts(self, time_now=None):
+        """
+        Counts an attempt with a single conditional UPDATE, so parallel
+        verifications can neither lose increments nor get past the limit.
+        A lapsed block starts a fresh round of attempts.
 
-        self.attempts_used += 1
-        if self.attempts_used >= OTP_MAX_ATTEMPTS:
-            self._block_email()
+        Returns False if the attempt was refused because the email is blocked.
+        """
+        if not time_now:
+            time_now = timezone.now()
+        blocked_until = time_now + timedelta(seconds=EMAIL_BLOCK_SECONDS)
+        block_lapsed = Q(blocked_until__lt=time_now)
+
+        # the UPDATE keeps the row locked until commit, so the read after it
+        # gets this attempt's own count even with parallel attempts
+        with transaction.atomic():
+            num_updated = AuthOTP.objects.filter(
+                Q(blocked_until__isnull=True) | block_lapsed,
+                Q(attempts_used__lt=OTP_MAX_ATTEMPTS) | block_lapsed,
+                pk=self.pk
+            ).update(
+                blocked_until=Case(
+                    When(block_lapsed, then=Value(None)),
+                    When(attempts_used__gte=OTP_MAX_ATTEMPTS - 1, then=Value(blocked_until)),
+                    default=F('blocked_until'),
+                    output_field=models.DateTimeField()
+                ),
+                attempts_used=Case(
+                    When(block_lapsed, then=Value(1)),
+                    default=F('attempts_used') + 1
+                ),
+                updated_at=time_now
+            )
+            self.refresh_from_db(fields=['attempts_used', 'blocked_until'])
+
+        return bool(num_updated)
 
     def _block_email(self, time_now=None):
         if not time_now:
             time_now = timezone.now()
         self.blocked_until = time_now + timedelta(seconds=EMAIL_BLOCK_SECONDS)
 
-    @staticmethod
-    def _create_otp_for_email(email: str, client: Application):
-        return AuthOTP.objects.create(**{
-            'one_time_code': generate_random_string(8),
-            'email': email,
-            'expires_at': timezone.now() + timedelta(seconds=OTP_EXPIRY_SECONDS),
-            'client': client
-        })
-
-    @staticmethod
-    def _get_otp_for_email(email: str, client: Application):
-        return AuthOTP.objects.filter(
-            email=email,
-            client=client
-        ).first()
-
     def reset_expiry(self, time_now=None):
         if not time_now:
             time_now = timezone.now()
@@ -114,13 +190,60 @@ class AuthOTP(models.Model):
         return self.blocked_until and now <= self.blocked_until
 
     def validate_otp(self, otp_string: str):
-        self._update_attempts()
-        return self.one_time_code == otp_string
+        attempt_counted = self.get_backend().register_attempt(self)
+        return attempt_counted and self.one_time_code == otp_string
+
+    def update_resends(self, time_now=None):
+        """
+        Counts a resend with a single conditional UPDATE.
+        Returns False if the resend limit had already been reached.
+        """
+        if not time_now:
+            time_now = timezone.now()
+
+        num_updated = AuthOTP.objects.filter(
+            pk=self.pk,
+            resends_used__lt=OTP_MAX_RESENDS
+        ).update(
+            resends_used=F('resends_used') + 1,
+            updated_at=time_now
+        )
+
+        if not num_updated:
+            self.refresh_from_db(fields=['resends_used'])
+            return False
 
-    def update_resends(self):
-        if self.is_email_blocked():
-            return
         self.resends_used += 1
+        return True
+
+    def renew(self, time_now=None):
+        """
+        Replaces an expired code and counts it as the first send, unless a
+        parallel request renewed it first. In that case the fresh code is
+        loaded and False is returned.
+        """
+        if not time_now:
+            time_now = timezone.now()
+        previous_expiry = self.expires_at
+
+        self.update_otp_for_email()
+        self.reset_expiry(time_now)
+        self.resends_used = 1
+
+        num_updated = AuthOTP.objects.filter(
+            pk=self.pk,
+            expires_at=previous_expiry
+        ).update(
+            one_time_code=self.one_time_code,
+            expires_at=self.expires_at,
+            resends_used=self.resends_used,
+            updated_at=time_now
+        )
+
+        if not num_updated:
+            self.refresh_from_db(fields=['one_time_code', 'expires_at', 'resends_used'])
+            return False
+        return True
 
     def is_resend_blocked(self):
         return self.resends_used >= OTP_MAX_RESENDS
@@ -130,21 +253,22 @@ class AuthOTP(models.Model):
         self.one_time_code = generate_random_string(8)
 
     def num_attempts_left(self):
-        return OTP_MAX_ATTEMPTS - self.attempts_used
+        return max(OTP_MAX_ATTEMPTS - self.attempts_used, 0)
+
+    def discard(self):
+        self.get_backend().delete(self)
+
+    @classmethod
+    def get_backend(cls):
+        return get_otp_backend(cls)
 
     @classmethod
     def get_or_create_otp(cls, email: str, client: Application):
-        return cls._get_otp_for_email(
-            email,
-            client
-        ) or cls._create_otp_for_email(
-            email,
-            client
-        )
+        return cls.get_backend().get_or_create(email, client)
 
     @classmethod
-    def get_otp(cls, email: str, client: Application):
-        return cls._get_otp_for_email(email, client)
+    def get_otp(cls, email: str, client: Application = None):
+        return cls.get_backend().get(email, client)
 
     @classmethod
     def generate_otp(cls, email: str, client: Application):
@@ -162,13 +286,151 @@ class AuthOTP(models.Model):
         if error_message:
             raise AuthOTPException(error_message)
 
-        if otp.is_expired():
-            otp.update_otp_for_email()
-            otp.reset_expiry()
-
-        otp.update_resends()
-        otp.save()
+        if not cls.get_backend().issue(otp):
+            raise AuthOTPException(ResponseMessages.OTP_RESENDS_EXCEEDED)
         return otp
 
     def __str__(self):
         return f'{self.email}: {self.one_time_code}'
+
+
+class ClientSettings(models.Model):
+    """Per-client switches for how `VerifyOTPView` issues tokens"""
+    application = models.OneToOneField(Application, related_name='hs_settings',
+                                       on_delete=models.CASCADE)
+    signed_access_tokens = models.BooleanField(default=False)
+    async_sign_up = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @staticmethod
+    def uses_signed_access_tokens(client: Application):
+        client_settings = getattr(client, 'hs_settings', None)
+        return bool(client_settings and client_settings.signed_access_tokens)
+
+    @staticmethod
+    def uses_async_sign_up(client: Application):
+        client_settings = getattr(client, 'hs_settings', None)
+        return bool(client_settings and client_settings.async_sign_up)
+
+    def __str__(self):
+        return f'{self.application_id}: signed={self.signed_access_tokens}'
+
+
+class SignedTokenRevocation(models.Model):
+    """
+    Revokes the signed access token with `jti` or, without a `jti`,
+    every signed access token `user` got before `created_at`.
+    Rows matter only until `expires_at`, after which the tokens are dead anyway.
+    """
+    user = models.ForeignKey(User, related_name='signed_token_revocations',
+                             on_delete=models.CASCADE)
+    jti = models.CharField(max_length=32, null=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.jti or "all"}'
+
+
+class OutboxMessage(models.Model):
+    """
+    A Celery task call stored in the DB instead of sent to the broker, so
+    it commits or rolls back together with the request's other writes.
+    `apps.user.outbox.relay_pending` publishes the pending rows in bulk.
+    """
+    task = models.CharField(max_length=255)
+    payload = models.TextField()
+    published_at = models.DateTimeField(null=True, db_index=True)
+    # set by the relay publishing the row, see `apps.user.outbox.claim_pending`
+    claim_token = models.UUIDField(null=True, db_index=True)
+    claimed_at = models.DateTimeField(null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def enqueue(task, *args, **kwargs):
+        """Records `task.delay(*args, **kwargs)`. Arguments must be JSON serializable
+        """
+        return OutboxMessage.objects.create(
+            task=task.name,
+            payload=json.dumps({'args': args, 'kwargs': kwargs})
+        )
+
+    def get_arguments(self):
+        payload = json.loads(self.payload)
+        return payload['args'], payload['kwargs']
+
+    def __str__(self):
+        return f'{self.task}: {"published" if self.published_at else "pending"}'
+
+
+class SignUpRequest(models.Model):
+    """A sign-up answered with 202 and carried out by `process_sign_up_request`
+    """
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (PROCESSING, 'Processing'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    request_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    client = models.ForeignKey(Application, related_name='sign_up_requests',
+                               on_delete=models.CASCADE)
+    idempotency_key = models.CharField(max_length=255, null=True)
+    email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    message = models.CharField(max_length=255, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('client', 'idempotency_key')
+
+    @staticmethod
+    def get_or_create_for_key(email, client: Application, idempotency_key=None):
+        """
+        Returns `(sign_up_request, created)`. A retry with the same
+        `idempotency_key` gets the first request back instead of a new one.
+        """
+        if idempotency_key:
+            sign_up_request = SignUpRequest.objects.filter(
+                client=client, idempotency_key=idempotency_key).first()
+            if sign_up_request:
+                return sign_up_request, False
+
+        try:
+            with transaction.atomic():
+                return SignUpRequest.objects.create(
+                    client=client,
+                    idempotency_key=idempotency_key,
+                    email=email
+                ), True
+        except IntegrityError:
+            # a parallel retry got there first
+            return SignUpRequest.objects.get(client=client, idempotency_key=idempotency_key), False
+
+    def claim(self):
+        """Moves a pending request to processing. False if another worker has it
+        """
+        claimed = SignUpRequest.objects.filter(
+            pk=self.pk, status=SignUpRequest.PENDING
+        ).update(status=SignUpRequest.PROCESSING)
+        if claimed:
+            self.status = SignUpRequest.PROCESSING
+        return bool(claimed)
+
+    def finish(self, status, message):
+        self.status, self.message = status, message
+        self.save(update_fields=['status', 'message', 'updated_at'])
+
+    def __str__(self):
+        return f'{self.email}: {self.status}'
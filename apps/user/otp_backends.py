@@ -0,0 +1,208 @@
+import hashlib
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.globals.utils.string import generate_random_string
+from .constants import (
+    OTP_EXPIRY_SECONDS,
+    OTP_MAX_ATTEMPTS,
+    OTP_MAX_RESENDS,
+    OTP_SESSION_SECONDS,
+    EMAIL_BLOCK_SECONDS
+)
+
+DEFAULT_OTP_BACKEND = 'apps.user.otp_backends.CacheOTPBackend'
+
+
+def get_otp_backend(model):
+    backend_class = import_string(getattr(settings, 'OTP_BACKEND', DEFAULT_OTP_BACKEND))
+    return backend_class(model)
+
+
+class BaseOTPBackend(object):
+    """
+    Storage for `AuthOTP` state. Backends hand out `AuthOTP` instances
+    and own every write made to them.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+    def get(self, email: str, client=None):
+        raise NotImplementedError
+
+    def get_or_create(self, email: str, client):
+        raise NotImplementedError
+
+    def issue(self, otp):
+        """
+        Renews an expired code and counts a resend.
+        Returns False if the resend limit had already been reached.
+        """
+        raise NotImplementedError
+
+    def register_attempt(self, otp):
+        """
+        Counts a verification attempt, blocking the email on the last one.
+        Returns False if the email was blocked and the attempt refused.
+        """
+        raise NotImplementedError
+
+    def delete(self, otp):
+        raise NotImplementedError
+
+
+class DatabaseOTPBackend(BaseOTPBackend):
+    """Keeps one `AuthOTP` row per email. Durable, but every call is a DB write."""
+
+    def get(self, email: str, client=None):
+        filters = {'email': email}
+        if client is not None:
+            filters['client'] = client
+        return self.model.objects.filter(**filters).first()
+
+    def get_or_create(self, email: str, client):
+        return self.get(email, client) or self.model.objects.create(
+            one_time_code=generate_random_string(8),
+            email=email,
+            expires_at=timezone.now() + timedelta(seconds=OTP_EXPIRY_SECONDS),
+            client=client
+        )
+
+    def issue(self, otp):
+        if otp.is_expired() and otp.renew():
+            return True
+        return otp.update_resends()
+
+    def register_attempt(self, otp):
+        return otp._update_attempts()
+
+    def delete(self, otp):
+        otp.delete()
+
+
+class CacheOTPBackend(BaseOTPBackend):
+    """
+    Keeps OTP state in the cache configured by `OTP_CACHE_ALIAS`.
+
+    The code lives under its own key with a TTL of `OTP_EXPIRY_SECONDS`, so
+    expiry is left to the cache. Attempts and resends are counters bumped
+    with `incr`, and the email block is a key living for `EMAIL_BLOCK_SECONDS`.
+    A session key remembers the client and the expiry, so an expired code
+    can be told apart from a missing one.
+    """
+    KEY_PREFIX = 'hs:otp'
+    KEY_NAMES = ('session', 'code', 'attempts', 'resends', 'blocked')
+
+    def __init__(self, model):
+        super().__init__(model)
+        self.cache = caches[getattr(settings, 'OTP_CACHE_ALIAS', 'default')]
+
+    def _keys(self, email: str):
+        email_hash = hashlib.md5(email.encode()).hexdigest()
+        return {name: f'{self.KEY_PREFIX}:{name}:{email_hash}' for name in self.KEY_NAMES}
+
+    def _incr(self, key):
+        self.cache.add(key, 0, OTP_SESSION_SECONDS)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # evicted between `add` and `incr`
+            self.cache.set(key, 1, OTP_SESSION_SECONDS)
+            return 1
+
+    def _write_code(self, keys, otp):
+        self.cache.set(keys['code'], otp.one_time_code, OTP_EXPIRY_SECONDS)
+
+    def _session(self, otp):
+        return {'client_id': otp.client_id, 'expires_at': otp.expires_at}
+
+    def get(self, email: str, client=None):
+        keys = self._keys(email)
+        values = self.cache.get_many(keys.values())
+
+        session = values.get(keys['session'])
+        if session is None:
+            return None
+        if client is not None and session['client_id'] != client.pk:
+            return None
+
+        one_time_code = values.get(keys['code'])
+        expires_at = session['expires_at']
+        if one_time_code is None:
+            expires_at = min(expires_at, timezone.now())
+
+        return self.model(
+            email=email,
+            client_id=session['client_id'],
+            one_time_code=one_time_code or '',
+            expires_at=expires_at,
+            attempts_used=values.get(keys['attempts'], 0),
+            resends_used=values.get(keys['resends'], 0),
+            blocked_until=values.get(keys['blocked'])
+        )
+
+    def get_or_create(self, email: str, client):
+        otp = self.get(email, client)
+        if otp:
+            return otp
+
+        keys = self._keys(email)
+        otp = self.model(
+            email=email,
+            client=client,
+            one_time_code=generate_random_string(8),
+            expires_at=timezone.now() + timedelta(seconds=OTP_EXPIRY_SECONDS),
+            blocked_until=self.cache.get(keys['blocked'])
+        )
+        session_key = keys['session']
+        if not self.cache.add(session_key, self._session(otp), OTP_SESSION_SECONDS):
+            existing_otp = self.get(email, client)
+            if existing_otp:
+                return existing_otp
+            # session belongs to another client, take it over
+            self.cache.set(session_key, self._session(otp), OTP_SESSION_SECONDS)
+
+        self._write_code(keys, otp)
+        self.cache.delete_many([keys['attempts'], keys['resends']])
+        return otp
+
+    def issue(self, otp):
+        keys = self._keys(otp.email)
+        if otp.is_expired():
+            otp.update_otp_for_email()
+            otp.reset_expiry()
+            self._write_code(keys, otp)
+            self.cache.set_many({
+                keys['session']: self._session(otp),
+                keys['resends']: 0
+            }, OTP_SESSION_SECONDS)
+
+        otp.resends_used = self._incr(keys['resends'])
+        if otp.resends_used > OTP_MAX_RESENDS:
+            otp.resends_used = OTP_MAX_RESENDS
+            return False
+        return True
+
+    def register_attempt(self, otp):
+        if otp.is_email_blocked():
+            return False
+
+        keys = self._keys(otp.email)
+        otp.attempts_used = self._incr(keys['attempts'])
+        if otp.attempts_used > OTP_MAX_ATTEMPTS:
+            # a parallel attempt used up the last one
+            otp.attempts_used = OTP_MAX_ATTEMPTS
+            otp.blocked_until = self.cache.get(keys['blocked'])
+            return False
+
+        if otp.attempts_used == OTP_MAX_ATTEMPTS:
+            otp._block_email()
+            self.cache.set(keys['blocked'], otp.blocked_until, EMAIL_BLOCK_SECONDS)
+        return True
+
+    def delete(self, otp):
+        self.cache.delete_many(self._keys(otp.email).values())
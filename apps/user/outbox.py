@@ -0,0 +1,83 @@
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from celery import current_app
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .constants import OUTBOX_BATCH_SIZE, OUTBOX_CLAIM_SECONDS
+from .models import OutboxMessage
+
+
+def claim_pending(batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Claims up to `batch_size` pending `OutboxMessage`s for one relay with a
+    conditional UPDATE, so relays running in parallel never claim the same
+    row, also where `select_for_update` is a no-op like on SQLite. Claims
+    older than `OUTBOX_CLAIM_SECONDS` are taken over.
+
+    Returns the claim token and the claimed messages in pk order.
+    """
+    now = timezone.now()
+    stale_claim = Q(claimed_at__lt=now - timedelta(seconds=OUTBOX_CLAIM_SECONDS))
+    claimable = OutboxMessage.objects.filter(
+        Q(claimed_at__isnull=True) | stale_claim,
+        published_at__isnull=True
+    )
+    pks = list(claimable.order_by('pk').values_list('pk', flat=True)[:batch_size])
+    if not pks:
+        return None, []
+
+    claim_token = uuid.uuid4()
+    claimable.filter(pk__in=pks).update(claim_token=claim_token, claimed_at=now)
+    return claim_token, list(OutboxMessage.objects.filter(claim_token=claim_token).order_by('pk'))
+
+
+def relay_pending(batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Publishes up to `batch_size` pending `OutboxMessage`s to Celery over one
+    broker connection and marks them published. Returns how many were published.
+
+    No transaction is open while publishing, so a slow broker holds no DB
+    lock. When publishing fails, the messages published so far are marked
+    and the rest are released for the next run, so a task can still be
+    delivered more than once and has to tolerate that.
+
+    Pending calls of a task in `OUTBOX_BATCH_TASKS` are published as one
+    call of its batch task, with the list of their positional arguments.
+    """
+    claim_token, messages = claim_pending(batch_size)
+    if not messages:
+        return 0
+
+    batch_tasks = getattr(settings, 'OUTBOX_BATCH_TASKS', {})
+    tasks = {}
+
+    def get_task(name):
+        if name not in tasks:
+            tasks[name] = import_string(name)
+        return tasks[name]
+
+    published_pks = []
+    try:
+        with current_app.producer_or_acquire() as producer:
+            batches = defaultdict(list)
+            for message in messages:
+                args, kwargs = message.get_arguments()
+                if message.task in batch_tasks and not kwargs:
+                    batches[batch_tasks[message.task]].append((message.pk, args))
+                    continue
+                get_task(message.task).apply_async(args, kwargs, producer=producer)
+                published_pks.append(message.pk)
+
+            for batch_task, calls in batches.items():
+                get_task(batch_task).apply_async([[args for _, args in calls]],
+                                                 producer=producer)
+                published_pks.extend(pk for pk, _ in calls)
+    finally:
+        OutboxMessage.objects.filter(pk__in=published_pks).update(published_at=timezone.now())
+        OutboxMessage.objects.filter(claim_token=claim_token, published_at__isnull=True) \
+            .update(claim_token=None, claimed_at=None)
+    return len(published_pks)
@@ -2,9 +2,10 @@ from apps.globals.constants import ResponseMessages
 from apps.globals.serializers import DynamicFieldsModelSerializer
 from apps.globals.utils.string import is_good_password
 from enum import Enum
-from oauth2_provider.models import Application
 from rest_framework import serializers
+from .clients import client_registry
 from .constants import ResponseMessages as UserResponseMessages
+from .email_filter import email_filter
 from .models import User, AuthOTP
 
 
@@ -22,9 +23,15 @@ class OTPVerificationContexts(Enum):
 
 
 class ValidateClientIdMixin(object):
+    """Validates `client_id` and keeps the resolved `Application` as `self.client`
+    """
+    client = None
+
     def validate_client_id(self, client_id):
-        if not Application.objects.filter(client_id=client_id).exists():
+        client = client_registry.get(client_id)
+        if not client:
             raise serializers.ValidationError(BAD_CLIENT)
+        self.client = client
         return client_id
 
 
@@ -37,15 +44,22 @@ class UserSerializer(DynamicFieldsModelSerializer):
         extra_kwargs = {'password': {'write_only': True}}
 
 
+class ProfileUserSerializer(UserSerializer):
+    """The user of `UserProfileView`, without groups and permissions, which take a query each"""
+    class Meta(UserSerializer.Meta):
+        exclude = UserSerializer.Meta.exclude + ('groups', 'user_permissions')
+
+
 class SignUpOTPSerializer(serializers.Serializer, ValidateClientIdMixin):
     email = serializers.EmailField()
     client_id = serializers.CharField()
     password = serializers.CharField()
 
     def validate_email(self, email):
-        if User.objects.filter(email=email, is_active=True).exists():
+        if email_filter.might_exist(email) and \
+           User.objects.filter(email=email, is_active=True).exists():
             raise serializers.ValidationError(UserResponseMessages.USER_WITH_EMAIL_EXISTS)
-        otp_obj: AuthOTP = AuthOTP.objects.filter(email=email).first()
+        otp_obj: AuthOTP = AuthOTP.get_otp(email)
         if otp_obj and otp_obj.is_email_blocked():
             raise serializers.ValidationError(UserResponseMessages.TEMPORARY_BLOCKED_EMAIL)
 
@@ -58,26 +72,34 @@ class SignUpOTPSerializer(serializers.Serializer, ValidateClientIdMixin):
 
 
 class TokenVerificationSerializer(serializers.Serializer, ValidateClientIdMixin):
+    """Keeps the resolved `User` and `AuthOTP` as `self.user` and `self.otp_obj`
+    """
     email = serializers.EmailField()
     client_id = serializers.CharField()
     otp = serializers.CharField()
     context = serializers.CharField()
 
+    user = None
+    otp_obj = None
+
     def validate_email(self, email):
-        if not User.objects.filter(email=email).exists():
+        user = User.objects.filter(email=email).first()
+        if not user:
             raise serializers.ValidationError(ResponseMessages.INVALID_EMAIL)
-        otp_obj: AuthOTP = AuthOTP.objects.filter(email=email).first()
+        otp_obj: AuthOTP = AuthOTP.get_otp(email)
 
         if not otp_obj:
             raise serializers.ValidationError(ResponseMessages.INVALID_EMAIL)
         elif otp_obj.is_email_blocked():
             raise serializers.ValidationError(UserResponseMessages.TEMPORARY_BLOCKED_EMAIL)
 
+        self.user, self.otp_obj = user, otp_obj
         return email
 
     def validate_context(self, context):
         if context not in OTPVerificationContexts.all():
             raise serializers.ValidationError('Invalid context.')
+        return context
 
 
 class ForgotPasswordOTPSerializer(serializers.Serializer, ValidateClientIdMixin):
@@ -85,7 +107,7 @@ class ForgotPasswordOTPSerializer(serializers.Serializer, ValidateClientIdMixin)
     client_id = serializers.CharField()
 
     def validate_email(self, email):
-        if not User.objects.filter(email=email).exists():
+        if not email_filter.might_exist(email) or not User.objects.filter(email=email).exists():
             raise serializers.ValidationError('No user with this email found.')
         return email
 
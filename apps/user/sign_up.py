@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from apps.globals.utils.email import send_mail
+from .constants import ResponseMessages, SIGN_UP_PASSWORD_TTL_SECONDS
+from .email_filter import email_filter
+from .models import User, AuthOTP, OutboxMessage
+from .utils import get_verification_message_with_code
+
+
+def _send_otp(otp: AuthOTP):
+    email_subject = 'HS: Please Verify your Email'
+    verification_message = get_verification_message_with_code(
+        otp.one_time_code)
+
+    OutboxMessage.enqueue(
+        send_mail,
+        email_subject,
+        verification_message,
+        [otp.email]
+    )
+
+
+def _create_user(email, password):
+    if not email_filter.might_exist(email) or not User.objects.filter(email=email).exists():
+        User.create_basic_user(email=email, password=password, is_active=False)
+
+
+def sign_up(email, password, client):
+    """
+    Issues the sign-up OTP, queues its mail and creates the inactive user.
+    Returns the message for the client, raises `AuthOTPException`.
+    """
+    # the mail is only queued if the OTP and the user are saved
+    with transaction.atomic():
+        otp = AuthOTP.generate_otp(email=email, client=client)
+        _send_otp(otp)
+        _create_user(email, password)
+
+    if otp.is_resend_blocked():
+        return ResponseMessages.OTP_RESENDS_EXCEEDED
+    return ResponseMessages.OTP_SUCCESS
+
+
+def _get_password_cache():
+    return caches[getattr(settings, 'SIGN_UP_CACHE_ALIAS', 'default')]
+
+
+def _get_password_cache_key(request_id):
+    return f'hs:sign-up:password:{request_id}'
+
+
+def store_password(request_id, password: str):
+    """
+    Hands the password to `process_sign_up_request` through the cache,
+    so it never reaches the DB or the broker in plain text.
+    """
+    _get_password_cache().set(_get_password_cache_key(request_id), password,
+                              SIGN_UP_PASSWORD_TTL_SECONDS)
+
+
+def pop_password(request_id):
+    cache = _get_password_cache()
+    key = _get_password_cache_key(request_id)
+    password = cache.get(key)
+    cache.delete(key)
+    return password
@@ -0,0 +1,70 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from oauth2_provider.models import get_application_model, get_access_token_model
+
+from .authentication import USER_SNAPSHOT_FIELDS, revoke_cached_token, revoke_cached_user_tokens
+from .clients import client_registry
+from .email_filter import email_filter
+from .models import ClientSettings, User
+from .signed_tokens import SignedTokenException, is_signed_token, revoke_signed_token
+
+
+@receiver([post_save, post_delete], sender=get_application_model())
+@receiver([post_save, post_delete], sender=ClientSettings)
+def clear_client_registry(sender, **kwargs):
+    client_registry.clear()
+
+
+@receiver([post_save, post_delete], sender=get_access_token_model())
+def revoke_cached_access_token(sender, instance, created=False, **kwargs):
+    if not created:
+        revoke_cached_token(instance.token)
+
+
+def _get_snapshot_fields(instance):
+    """The fields cached tokens keep of a user, as loaded on `instance`, deferred ones left out"""
+    return {field: instance.__dict__[field] for field in USER_SNAPSHOT_FIELDS
+            if field in instance.__dict__}
+
+
+@receiver(post_init, sender=User)
+def remember_snapshot_fields(sender, instance, **kwargs):
+    instance._snapshot_fields = _get_snapshot_fields(instance)
+
+
+@receiver(post_save, sender=User)
+def revoke_cached_user_access_tokens(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Cached tokens carry a snapshot of their user, e.g. `is_active`, so saves
+    changing it drop them. Others, like the password rehash on login, do not.
+    """
+    if update_fields is not None and not set(update_fields) & set(USER_SNAPSHOT_FIELDS):
+        return
+
+    fields = _get_snapshot_fields(instance)
+    changed = fields != instance._snapshot_fields
+    instance._snapshot_fields = fields
+    if changed and not created:
+        revoke_cached_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_access_tokens(sender, instance, **kwargs):
+    revoke_cached_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=get_access_token_model())
+def revoke_signed_access_token(sender, instance, **kwargs):
+    """Deleting the row of a signed token (revocation, refresh) denylists it"""
+    if not is_signed_token(instance.token):
+        return
+    try:
+        revoke_signed_token(instance.token)
+    except SignedTokenException:
+        # expired or broken, nothing left to deny
+        pass
+
+
+@receiver(post_save, sender=User)
+def add_to_email_filter(sender, instance, **kwargs):
+    email_filter.add(instance.email)
@@ -0,0 +1,183 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from oauth2_provider.settings import oauth2_settings
+
+from apps.globals.utils.string import generate_random_string
+from .constants import SIGNED_TOKEN_PREFIX, SIGNED_TOKEN_REVOCATION_SYNC_SECONDS
+from .models import User, SignedTokenRevocation
+
+REVOCATION_VERSION_KEY = 'hs:signed-token:revocations:version'
+
+
+class SignedTokenException(Exception):
+    pass
+
+
+def _b64encode(data: bytes):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(data: str):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _sign(message: bytes):
+    key = getattr(settings, 'SIGNED_ACCESS_TOKEN_KEY', settings.SECRET_KEY)
+    return hmac.new(key.encode(), message, hashlib.sha256).digest()
+
+
+def is_signed_token(token: str):
+    return token.startswith(SIGNED_TOKEN_PREFIX)
+
+
+def create_signed_token(user_id, application_id, scope: str, expires_in: int):
+    """
+    Returns a self-contained access token: a JSON payload with the user id,
+    client, scope and expiry, and its HMAC-SHA256 signature.
+    """
+    issued_at = time.time()
+    payload = {
+        'sub': user_id,
+        'cid': application_id,
+        'scp': scope,
+        'iat': issued_at,
+        'exp': int(issued_at) + expires_in,
+        'jti': generate_random_string(16)
+    }
+    encoded_payload = _b64encode(json.dumps(payload, separators=(',', ':')).encode())
+    message = SIGNED_TOKEN_PREFIX + encoded_payload
+    return f'{message}.{_b64encode(_sign(message.encode()))}'
+
+
+def decode_signed_token(token: str):
+    """
+    Returns the payload of a signed token, raising `SignedTokenException`
+    if it is malformed, tampered with or expired. Revocation is not checked.
+    """
+    message, _, signature = token.rpartition('.')
+    if not (is_signed_token(message) and signature):
+        raise SignedTokenException('Malformed token.')
+
+    try:
+        valid_signature = hmac.compare_digest(_sign(message.encode()), _b64decode(signature))
+        payload = json.loads(_b64decode(message[len(SIGNED_TOKEN_PREFIX):]))
+    except ValueError:
+        raise SignedTokenException('Malformed token.')
+
+    if not valid_signature:
+        raise SignedTokenException('Invalid signature.')
+    if payload['exp'] <= time.time():
+        raise SignedTokenException('Token has expired.')
+    return payload
+
+
+class SignedAccessToken(object):
+    """Stand-in for `AccessToken` built from a verified payload, for `request.auth`
+    """
+
+    def __init__(self, token: str, payload):
+        self.token = token
+        self.jti = payload['jti']
+        self.user_id = payload['sub']
+        self.application_id = payload['cid']
+        self.scope = payload['scp']
+        self.expires = datetime.fromtimestamp(payload['exp'], tz=timezone.utc)
+
+    def is_expired(self):
+        return timezone.now() >= self.expires
+
+    def allow_scopes(self, scopes):
+        return set(scopes).issubset(set(self.scope.split()))
+
+    def is_valid(self, scopes=None):
+        return not self.is_expired() and self.allow_scopes(scopes or [])
+
+
+class RevocationList(object):
+    """
+    Per-process copy of the live `SignedTokenRevocation` rows.
+
+    Every revocation stamps a new version in the shared cache. Each process
+    looks at that stamp at most once every `sync_seconds` and reloads the rows
+    only when it changed. Checking a token therefore needs no DB or cache round
+    trip, and a revocation takes effect everywhere within `sync_seconds`.
+    """
+    _UNSYNCED = object()
+
+    def __init__(self, sync_seconds=SIGNED_TOKEN_REVOCATION_SYNC_SECONDS):
+        self.sync_seconds = sync_seconds
+        self._lock = threading.Lock()
+        self._version = self._UNSYNCED
+        self._checked_at = None
+        self._denied_jtis = frozenset()
+        self._valid_after = {}
+
+    def _get_cache(self):
+        return caches[getattr(settings, 'AUTH_TOKEN_CACHE_ALIAS', 'default')]
+
+    def _load(self):
+        denied_jtis = set()
+        valid_after = {}
+        revocations = SignedTokenRevocation.objects.filter(
+            expires_at__gt=timezone.now()
+        ).values_list('user_id', 'jti', 'created_at')
+
+        for user_id, jti, created_at in revocations:
+            if jti:
+                denied_jtis.add(jti)
+            else:
+                valid_after[user_id] = max(valid_after.get(user_id, 0), created_at.timestamp())
+        return frozenset(denied_jtis), valid_after
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and self._checked_at is not None \
+           and now - self._checked_at < self.sync_seconds:
+            return
+
+        with self._lock:
+            self._checked_at = now
+            version = self._get_cache().get(REVOCATION_VERSION_KEY)
+            if force or version != self._version:
+                self._denied_jtis, self._valid_after = self._load()
+                self._version = version
+
+    def is_revoked(self, payload):
+        self.sync()
+        return payload['jti'] in self._denied_jtis \
+            or payload['iat'] < self._valid_after.get(payload['sub'], 0)
+
+    def bump_version(self):
+        self._get_cache().set(REVOCATION_VERSION_KEY, uuid.uuid4().hex, None)
+        self.sync(force=True)
+
+
+revocation_list = RevocationList()
+
+
+def revoke_signed_token(token: str):
+    payload = decode_signed_token(token)
+    SignedTokenRevocation.objects.create(
+        user_id=payload['sub'],
+        jti=payload['jti'],
+        expires_at=datetime.fromtimestamp(payload['exp'], tz=timezone.utc)
+    )
+    revocation_list.bump_version()
+
+
+def revoke_user_signed_tokens(user: User):
+    """Revokes every signed access token `user` got until now"""
+    SignedTokenRevocation.objects.create(
+        user=user,
+        expires_at=timezone.now() + timedelta(seconds=oauth2_settings.ACCESS_TOKEN_EXPIRE_SECONDS)
+    )
+    revocation_list.bump_version()
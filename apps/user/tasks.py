@@ -1,14 +1,184 @@
+import time
+from datetime import timedelta
 from celery import task
 from celery.utils.log import get_task_logger
+from django.db.models import Q
 from django.utils import timezone
-from .models import SignUpOTP
+from oauth2_provider.models import AccessToken, RefreshToken, Grant
+from oauth2_provider.settings import oauth2_settings
+
+from apps.globals.utils.db import delete_in_batches
+from .constants import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_RETENTION_SECONDS,
+    PURGE_BATCH_SIZE,
+    PURGE_TIME_BUDGET_SECONDS,
+    SIGN_UP_REQUEST_RETENTION_SECONDS,
+    STALE_USER_SECONDS,
+    ResponseMessages
+)
+from .exceptions import AuthOTPException
+from .models import User, AuthOTP, OutboxMessage, SignedTokenRevocation, SignUpRequest
+from .outbox import relay_pending
+from .sign_up import pop_password, sign_up
 
 logging = get_task_logger(__name__)
 
 
+def _purge(name, queryset, batch_size, time_budget, **kwargs):
+    num_deleted, elapsed = delete_in_batches(
+        queryset,
+        batch_size=batch_size,
+        time_budget=time_budget,
+        **kwargs
+    )
+    rate = num_deleted / elapsed if elapsed else 0
+    logging.info(f'{name} Deleted: {num_deleted} in {elapsed:.2f}s ({rate:.0f} rows/sec)')
+    return num_deleted
+
+
+def _detach_access_tokens(refresh_token_pks):
+    AccessToken.objects.filter(
+        source_refresh_token__in=refresh_token_pks
+    ).update(source_refresh_token=None)
+
+
+def _delete_users(model, pks):
+    _, num_deleted_per_model = model.objects.filter(pk__in=pks).delete()
+    return num_deleted_per_model.get(model._meta.label, 0)
+
+
+@task()
+def remove_expired_otps(batch_size=PURGE_BATCH_SIZE, time_budget=PURGE_TIME_BUDGET_SECONDS):
+    queryset = AuthOTP.objects.filter(expires_at__lte=timezone.now())
+    return _purge('OTP Objects', queryset, batch_size, time_budget)
+
+
+@task()
+def remove_expired_access_tokens(batch_size=PURGE_BATCH_SIZE,
+                                 time_budget=PURGE_TIME_BUDGET_SECONDS):
+    """Tokens with a refresh token are left to `remove_expired_refresh_tokens`
+    """
+    queryset = AccessToken.objects.filter(
+        refresh_token__isnull=True,
+        expires__lt=timezone.now()
+    )
+    return _purge('Access Tokens', queryset, batch_size, time_budget)
+
+
+@task()
+def remove_expired_refresh_tokens(batch_size=PURGE_BATCH_SIZE,
+                                  time_budget=PURGE_TIME_BUDGET_SECONDS):
+    """
+    Revoked tokens are removed once the grace period is over. Unrevoked ones
+    only when `REFRESH_TOKEN_EXPIRE_SECONDS` is set, like oauth2_provider's
+    `cleartokens` does.
+    """
+    now = timezone.now()
+    expired = Q(revoked__lt=now - timedelta(
+        seconds=oauth2_settings.REFRESH_TOKEN_GRACE_PERIOD_SECONDS))
+
+    if oauth2_settings.REFRESH_TOKEN_EXPIRE_SECONDS:
+        refresh_expire_at = now - timedelta(seconds=oauth2_settings.REFRESH_TOKEN_EXPIRE_SECONDS)
+        expired = Q(revoked__lt=refresh_expire_at) | Q(
+            access_token__expires__lt=refresh_expire_at)
+
+    queryset = RefreshToken.objects.filter(expired)
+    return _purge('Refresh Tokens', queryset, batch_size, time_budget,
+                  before_delete=_detach_access_tokens)
+
+
+@task()
+def remove_expired_grants(batch_size=PURGE_BATCH_SIZE, time_budget=PURGE_TIME_BUDGET_SECONDS):
+    queryset = Grant.objects.filter(expires__lt=timezone.now())
+    return _purge('Grants', queryset, batch_size, time_budget)
+
+
+@task()
+def remove_stale_inactive_users(batch_size=PURGE_BATCH_SIZE,
+                                time_budget=PURGE_TIME_BUDGET_SECONDS):
+    """
+    Users left behind by sign-ups that were never verified.
+    Users are referenced from most tables, so each batch goes through
+    Django's collector rather than a raw DELETE.
+    """
+    queryset = User.objects.filter(
+        is_active=False,
+        is_staff=False,
+        is_superuser=False,
+        last_login__isnull=True,
+        date_joined__lt=timezone.now() - timedelta(seconds=STALE_USER_SECONDS)
+    )
+    return _purge('Stale Users', queryset, batch_size, time_budget, delete=_delete_users)
+
+
+@task()
+def remove_expired_signed_token_revocations(batch_size=PURGE_BATCH_SIZE,
+                                            time_budget=PURGE_TIME_BUDGET_SECONDS):
+    """The tokens they deny have expired by now"""
+    queryset = SignedTokenRevocation.objects.filter(expires_at__lte=timezone.now())
+    return _purge('Signed Token Revocations', queryset, batch_size, time_budget)
+
+
+@task()
+def relay_outbox(batch_size=OUTBOX_BATCH_SIZE, time_budget=PURGE_TIME_BUDGET_SECONDS):
+    """Fallback for when the `relay_outbox` command is not running"""
+    started_at = time.monotonic()
+    num_published = 0
+    while time.monotonic() - started_at < time_budget:
+        num_batch_published = relay_pending(batch_size)
+        num_published += num_batch_published
+        if num_batch_published < batch_size:
+            break
+    logging.info(f'Outbox Messages Published: {num_published}')
+    return num_published
+
+
+@task()
+def remove_published_outbox_messages(batch_size=PURGE_BATCH_SIZE,
+                                     time_budget=PURGE_TIME_BUDGET_SECONDS):
+    queryset = OutboxMessage.objects.filter(
+        published_at__lt=timezone.now() - timedelta(seconds=OUTBOX_RETENTION_SECONDS)
+    )
+    return _purge('Outbox Messages', queryset, batch_size, time_budget)
+
+
+@task()
+def process_sign_up_request(request_id):
+    """
+    Does the OTP and user creation (with its slow password hash) of a sign-up
+    accepted by `SignUpSendOTPView`. Runs at most once per request, even if
+    the task is delivered again.
+    """
+    sign_up_request = SignUpRequest.objects.select_related('client').filter(
+        request_id=request_id).first()
+    if not (sign_up_request and sign_up_request.claim()):
+        return False
+
+    try:
+        password = pop_password(request_id)
+        if password is None:
+            sign_up_request.finish(SignUpRequest.FAILED, ResponseMessages.SIGN_UP_REQUEST_EXPIRED)
+            return False
+
+        message = sign_up(sign_up_request.email, password, sign_up_request.client)
+    except AuthOTPException as ex:
+        sign_up_request.finish(SignUpRequest.FAILED, str(ex))
+        return False
+    except Exception:
+        # claimed requests are never picked up again, so fail this one before the task does
+        logging.exception(f'Sign-up request {request_id} failed')
+        sign_up_request.finish(SignUpRequest.FAILED, ResponseMessages.SIGN_UP_REQUEST_FAILED)
+        raise
+
+    sign_up_request.finish(SignUpRequest.DONE, message)
+    return True
+
+
 @task()
-def remove_expired_otps():
-    num_deleted, _ = SignUpOTP.objects.filter(
-        expires_at__lte=timezone.now()
-    ).delete()
-    logging.info(f"OTP Objects Deleted: {num_deleted}")
+def remove_old_sign_up_requests(batch_size=PURGE_BATCH_SIZE,
+                                time_budget=PURGE_TIME_BUDGET_SECONDS):
+    queryset = SignUpRequest.objects.filter(
+        created_at__lt=timezone.now() - timedelta(seconds=SIGN_UP_REQUEST_RETENTION_SECONDS)
+    )
+    return _purge('Sign-up Requests', queryset, batch_size, time_budget)
@@ -0,0 +1,150 @@
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.shortcuts import reverse
+from django.utils import timezone
+from oauth2_provider.models import Application, AccessToken
+from rest_framework.test import APITestCase
+from apps.globals.utils.cache import CacheStats
+from ..authentication import CachedOAuth2Authentication, get_token_cache_key
+from ..models import User
+
+
+class CachedOAuth2AuthenticationTestCase(APITestCase):
+    TOKEN = 'thetoken'
+
+    def setUp(self):
+        cache.clear()
+        CachedOAuth2Authentication.stats.reset()
+        self.user = User.objects.create_user(
+            username='username',
+            email='email@email.com',
+            first_name='first',
+            password='random text'
+        )
+        app = Application.objects.create(user=self.user, client_id='boofar')
+        self.access_token = AccessToken.objects.create(
+            user=self.user,
+            token=self.TOKEN,
+            application=app,
+            scope='read write',
+            expires=timezone.now() + timedelta(hours=1)
+        )
+        self.url = reverse('get_current_user')
+
+    def _get(self, token=TOKEN):
+        return self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_cached_authentication(self):
+        """Should authenticate repeated requests without touching the DB
+        """
+        first_response = self._get()
+        with self.assertNumQueries(0):
+            response = self._get()
+
+        self.assertEqual(first_response.data, response.data)
+        self.assertEqual(response.data.get('first_name'), 'first')
+        self.assertEqual(CachedOAuth2Authentication.stats.as_dict(), {
+            'hits': 1,
+            'misses': 1,
+            'hit_rate': 0.5
+        })
+
+    def test_token_not_stored_in_plaintext(self):
+        """Should key the cache by the token's hash only
+        """
+        self._get()
+
+        snapshot = cache.get(get_token_cache_key(self.TOKEN))
+        self.assertIsNotNone(snapshot)
+        self.assertNotIn(self.TOKEN, str(snapshot))
+        self.assertIsNone(cache.get(self.TOKEN))
+
+    def test_invalid_token(self):
+        """Should not authenticate unknown tokens
+        """
+        response = self._get('unknown token')
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_revoked_token(self):
+        """Should stop authenticating a token once it is revoked
+        """
+        self._get()
+        self.access_token.revoke()
+
+        response = self._get()
+        self.assertEqual(response.status_code, 401)
+
+    def test_ttl_capped_by_expiry(self):
+        """Should not serve a cached token past its expiry
+        """
+        self.access_token.expires = timezone.now() + timedelta(seconds=5)
+        self.access_token.save()
+        self._get()
+
+        later = timezone.now() + timedelta(seconds=10)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            response = self._get()
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_password_change_keeps_other_fields(self):
+        """Should save only the password through the cached user
+        """
+        self._get()
+        User.objects.filter(pk=self.user.pk).update(first_name='changed')
+
+        response = self.client.post(
+            reverse('change_password'),
+            data={'current_password': 'random text', 'new_password': '1234567891011'},
+            HTTP_AUTHORIZATION=f'Bearer {self.TOKEN}'
+        )
+
+        self.user.refresh_from_db()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.user.first_name, 'changed')
+        self.assertTrue(self.user.check_password('1234567891011'))
+
+    def test_user_changes(self):
+        """Should drop the cached snapshot once the user is saved
+        """
+        self._get()
+        self.user.first_name = 'changed'
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertIsNone(cache.get(get_token_cache_key(self.TOKEN)))
+        response = self._get()
+        self.assertEqual(response.data.get('first_name'), 'changed')
+        self.assertFalse(cache.get(get_token_cache_key(self.TOKEN))['user']['is_active'])
+
+    def test_unrelated_user_changes(self):
+        """Should keep the cached snapshot through saves that leave it as it is
+        """
+        self._get()
+        key = get_token_cache_key(self.TOKEN)
+
+        with mock.patch('apps.user.signals.revoke_cached_user_tokens') as revoke:
+            # like the password rehash on login
+            self.user.set_password('other password')
+            self.user.save(update_fields=['password'])
+            User.objects.get(pk=self.user.pk).save()
+            self.user.first_name = 'changed'
+            self.user.save(update_fields=['password'])
+        self.assertFalse(revoke.called)
+        self.assertIsNotNone(cache.get(key))
+
+        self.user.save(update_fields=['first_name'])
+        self.assertIsNone(cache.get(key))
+
+    def test_stats_are_logged(self):
+        """Should log the hit rate every `log_every` lookups
+        """
+        stats = CacheStats('Test', log_every=2)
+        with self.assertLogs('apps.globals.utils.cache', 'INFO') as logs:
+            stats.miss()
+            stats.hit()
+            stats.hit()
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Test cache: 1 hits, 1 misses, 50.0% hit rate', logs.output[0])
@@ -0,0 +1,57 @@
+from oauth2_provider.models import Application
+from rest_framework.test import APITestCase
+from ..clients import ClientRegistry, client_registry
+from ..models import User
+
+
+class ClientRegistryTestCase(APITestCase):
+    CLIENT_ID = "boofar"
+
+    def setUp(self):
+        self.user = User.objects.create(username='oort', email='oort@oort.com')
+        self.app = Application.objects.create(user=self.user, client_id=self.CLIENT_ID)
+
+    def test_cached_lookup(self):
+        """Should hit the DB only on the first lookup of a client
+        """
+        with self.assertNumQueries(1):
+            client_registry.get(self.CLIENT_ID)
+        with self.assertNumQueries(0):
+            client = client_registry.get(self.CLIENT_ID)
+
+        self.assertEqual(client.pk, self.app.pk)
+
+    def test_unknown_client(self):
+        """Should not remember unknown clients
+        """
+        self.assertIsNone(client_registry.get('foobar'))
+        other_app = Application.objects.create(user=self.user, client_id='foobar')
+
+        self.assertEqual(client_registry.get('foobar').pk, other_app.pk)
+
+    def test_invalidation_on_save(self):
+        """Should drop cached clients when an application is saved
+        """
+        client_registry.get(self.CLIENT_ID)
+        self.app.client_id = 'renamed'
+        self.app.save()
+
+        self.assertIsNone(client_registry.get(self.CLIENT_ID))
+        self.assertEqual(client_registry.get('renamed').pk, self.app.pk)
+
+    def test_invalidation_on_delete(self):
+        """Should drop cached clients when an application is deleted
+        """
+        client_registry.get(self.CLIENT_ID)
+        self.app.delete()
+
+        self.assertIsNone(client_registry.get(self.CLIENT_ID))
+
+    def test_ttl(self):
+        """Should reload clients once their entry expires
+        """
+        registry = ClientRegistry(ttl=0)
+        registry.get(self.CLIENT_ID)
+
+        with self.assertNumQueries(1):
+            registry.get(self.CLIENT_ID)
@@ -0,0 +1,137 @@
+from smtplib import SMTPDataError, SMTPException, SMTPRecipientsRefused
+from unittest import mock
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.test import TestCase
+from apps.globals.utils.email import RateLimiter, send_messages, send_mail, send_mails
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class Retry(Exception):
+    pass
+
+
+class EmailTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        mail.outbox = []
+        self.clock = FakeClock()
+        self.rate_limiter = RateLimiter(10, clock=self.clock, sleep=self.clock.sleep)
+
+    def _messages(self, num):
+        return [EmailMessage('subject', 'message', 'hs@hs.cm', [f'user{idx}@hs.cm'])
+                for idx in range(num)]
+
+    def _broken_connection(self, num_sent):
+        connection = mock.Mock()
+        connection.send_messages.side_effect = [1] * num_sent + [SMTPException('gone')]
+        return connection
+
+    def test_one_connection(self):
+        """Should send every message over the same connection
+        """
+        with mock.patch('apps.globals.utils.email.get_connection',
+                        wraps=mail.get_connection) as get_connection:
+            self.assertEqual(send_messages(self._messages(3), self.rate_limiter), (3, [], None))
+
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_rate_limit(self):
+        """Should keep to the messages per second quota
+        """
+        send_messages(self._messages(25), self.rate_limiter)
+
+        self.assertEqual(len(mail.outbox), 25)
+        self.assertEqual(self.clock.slept, [1, 1])
+
+    def test_rate_limit_is_shared(self):
+        """Should count the messages of every sender against the same quota
+        """
+        other_process = RateLimiter(10, clock=self.clock, sleep=self.clock.sleep)
+        self.assertEqual(self.rate_limiter.acquire(6), 0)
+        self.assertEqual(other_process.acquire(6), 1)
+        self.assertEqual(self.rate_limiter.acquire(4), 0)
+
+    def test_partial_failure(self):
+        """Should tell how many messages went out before an error
+        """
+        with mock.patch('apps.globals.utils.email.get_connection',
+                        return_value=self._broken_connection(2)):
+            num_sent, to_retry, error = send_messages(self._messages(5), self.rate_limiter)
+
+        self.assertEqual((num_sent, to_retry), (2, [2, 3, 4]))
+        self.assertIsInstance(error, SMTPException)
+
+    def test_refused_mail(self):
+        """Should skip a mail refused for good, and send the ones after it
+        """
+        connection = mock.Mock()
+        connection.send_messages.side_effect = [
+            1, SMTPRecipientsRefused({'user1@hs.cm': (550, b'No such user')}), 1]
+        mails = [['subject', 'message', [f'user{idx}@hs.cm']] for idx in range(3)]
+        with mock.patch('apps.globals.utils.email.get_connection', return_value=connection), \
+                mock.patch.object(send_mails, 'retry', return_value=Retry()) as retry:
+            self.assertEqual(send_mails(mails), 2)
+
+        self.assertFalse(retry.called)
+        self.assertEqual([call[0][0][0].to for call in connection.send_messages.call_args_list],
+                         [mail[2] for mail in mails])
+
+    def test_mail_refused_for_now(self):
+        """Should retry only the mail refused for now
+        """
+        connection = mock.Mock()
+        connection.send_messages.side_effect = [1, SMTPDataError(451, b'Try again later'), 1]
+        mails = [['subject', 'message', [f'user{idx}@hs.cm']] for idx in range(3)]
+        with mock.patch('apps.globals.utils.email.get_connection', return_value=connection), \
+                mock.patch.object(send_mails, 'retry', return_value=Retry()) as retry:
+            with self.assertRaises(Retry):
+                send_mails(mails)
+
+        self.assertEqual(connection.send_messages.call_count, 3)
+        self.assertEqual(retry.call_args[1]['args'], [[mails[1]]])
+
+    def test_send_mails_retries_the_rest(self):
+        """Should retry a batch with only the mails not sent yet
+        """
+        mails = [['subject', 'message', [f'user{idx}@hs.cm']] for idx in range(4)]
+        with mock.patch('apps.globals.utils.email.get_connection',
+                        return_value=self._broken_connection(1)), \
+                mock.patch.object(send_mails, 'retry', return_value=Retry()) as retry:
+            with self.assertRaises(Retry):
+                send_mails(mails + [['subject', '', ['empty@hs.cm']]])
+
+        self.assertEqual(retry.call_args[1]['args'], [mails[1:]])
+        self.assertIsInstance(retry.call_args[1]['exc'], SMTPException)
+
+        self.assertEqual(send_mails(mails), 4)
+        self.assertEqual(len(mail.outbox), 4)
+
+    def test_send_mail(self):
+        """Should send right away, and retry on an error
+        """
+        self.assertTrue(send_mail('subject', 'message', ['hs@hs.cm']))
+        self.assertFalse(send_mail('subject', '', ['hs@hs.cm']))
+        self.assertEqual(len(mail.outbox), 1)
+
+        with mock.patch('apps.globals.utils.email.get_connection',
+                        return_value=self._broken_connection(0)), \
+                mock.patch.object(send_mail, 'retry', return_value=Retry()):
+            with self.assertRaises(Retry):
+                send_mail('subject', 'message', ['hs@hs.cm'])
@@ -0,0 +1,92 @@
+from django.core.cache import cache
+from django.shortcuts import reverse
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from apps.globals.utils.bloom import BloomFilter
+from ..email_filter import EmailFilter, email_filter
+from ..models import User
+
+
+class BloomFilterTestCase(TestCase):
+
+    def test_no_false_negatives(self):
+        """Should find every added item
+        """
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        emails = [f'user{idx}@hs.cm' for idx in range(5000)]
+        bloom.update(emails)
+
+        self.assertEqual(len(bloom), 5000)
+        self.assertTrue(all(email in bloom for email in emails))
+
+    def test_false_positive_rate(self):
+        """Should keep false positives near the configured rate
+        """
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        bloom.update(f'user{idx}@hs.cm' for idx in range(5000))
+
+        false_positives = sum(f'other{idx}@hs.cm' in bloom for idx in range(20000))
+        self.assertLess(false_positives / 20000, 0.02)
+
+
+class EmailFilterTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        email_filter.clear()
+        self.user = User.objects.create(username='oort', email='oort@oort.com')
+        self.url = reverse('check_user_exists_view')
+
+    def test_definite_negative_without_query(self):
+        """Should answer /user/exists/ for unknown emails without a query
+        """
+        email_filter.rebuild()
+
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, data={'email': 'nobody@hs.cm'})
+        self.assertFalse(response.data.get('exists'))
+
+        response = self.client.post(self.url, data={'email': 'oort@oort.com'})
+        self.assertTrue(response.data.get('exists'))
+
+    def test_saved_users_are_added(self):
+        """Should know about users saved after the filter was built
+        """
+        email_filter.rebuild()
+        User.objects.create(username='new', email='new@hs.cm')
+
+        self.assertTrue(email_filter.might_exist('new@hs.cm'))
+
+    def test_other_processes_see_new_users(self):
+        """Should not deny users saved after another process built its filter
+        """
+        other_filter = EmailFilter()
+        other_filter.rebuild()
+        User.objects.create(username='new', email='new@hs.cm')
+
+        self.assertTrue(other_filter.might_exist('new@hs.cm'))
+        self.assertFalse(other_filter.might_exist('nobody@hs.cm'))
+
+    def test_periodic_rebuild(self):
+        """Should pick up rows written without signals once the filter is rebuilt
+        """
+        stale_filter = EmailFilter(rebuild_seconds=3600)
+        stale_filter.rebuild()
+        User.objects.bulk_create([User(username='bulk', email='bulk@hs.cm')])
+        self.assertFalse(stale_filter.might_exist('bulk@hs.cm'))
+
+        stale_filter.rebuild_seconds = 0
+        self.assertTrue(stale_filter.might_exist('bulk@hs.cm'))
+
+    def test_sign_up_with_registered_email(self):
+        """Should still refuse an email of an active user
+        """
+        email_filter.rebuild()
+        response = self.client.post(reverse('sign_up_view'), format='json', data={
+            'client_id': 'boofar',
+            'email': 'oort@oort.com',
+            'password': 'random password'
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.data)
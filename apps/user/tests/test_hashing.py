@@ -0,0 +1,82 @@
+import threading
+from unittest import mock
+from django.shortcuts import reverse
+from django.test import TestCase, override_settings
+from oauth2_provider.models import Application
+from rest_framework.test import APITestCase
+from ..exceptions import PasswordHashingBusy
+from ..hashing import PasswordHashingPool
+from ..models import User, OutboxMessage
+
+
+def _saturated_pool():
+    """Returns a pool whose only slot is taken, and the event that frees it"""
+    pool = PasswordHashingPool(max_workers=1, max_pending=0, wait_seconds=0.01)
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    threading.Thread(target=pool.run, args=(hold,), daemon=True).start()
+    started.wait(5)
+    return pool, release
+
+
+class PasswordHashingPoolTestCase(TestCase):
+
+    def test_run(self):
+        """Should return the result of the pooled call
+        """
+        pool = PasswordHashingPool(max_workers=1, max_pending=0)
+        self.assertEqual(pool.run(sum, [1, 2]), 3)
+
+    def test_busy(self):
+        """Should turn calls away once every slot is taken
+        """
+        pool, release = _saturated_pool()
+        with self.assertRaises(PasswordHashingBusy):
+            pool.run(sum, [1, 2])
+
+        release.set()
+        self.assertEqual(pool.run(sum, [1, 2]), 3)
+
+
+@override_settings(PASSWORD_HASHERS=['apps.user.hashers.PBKDF2PasswordHasher'])
+class PasswordHashingTestCase(APITestCase):
+
+    def test_sign_up_busy(self):
+        """Should answer 503 with Retry-After when hashing is saturated
+        """
+        user = User.objects.create(username='oort', email='oort@oort.com')
+        Application.objects.create(user=user, client_id='boofar')
+        pool, release = _saturated_pool()
+
+        with mock.patch('apps.user.models.password_hashing', pool):
+            response = self.client.post(reverse('sign_up_view'), format='json', data={
+                'client_id': 'boofar',
+                'email': 'hs@hs.cm',
+                'password': 'random password'
+            })
+        release.set()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(User.objects.filter(email='hs@hs.cm').exists())
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_rehash_on_login(self):
+        """Should redo a hash made with other iterations once the password checks out
+        """
+        with self.settings(PBKDF2_ITERATIONS=1000):
+            user = User.create_basic_user(email='hs@hs.cm', password='random password')
+        self.assertIn('$1000$', user.password)
+
+        with self.settings(PBKDF2_ITERATIONS=2000):
+            self.assertFalse(user.check_password('wrong password'))
+            self.assertIn('$1000$', User.objects.get(pk=user.pk).password)
+
+            self.assertTrue(user.check_password('random password'))
+
+        self.assertIn('$2000$', User.objects.get(pk=user.pk).password)
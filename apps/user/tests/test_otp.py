@@ -1,5 +1,6 @@
 from datetime import timedelta
 from django.shortcuts import reverse
+from django.test import override_settings
 from django.utils import timezone
 from oauth2_provider.models import Application
 from rest_framework.test import APITestCase
@@ -9,7 +10,10 @@ from ..constants import OTP_MAX_ATTEMPTS, OTP_MAX_RESENDS
 from ..serializers import OTPVerificationContexts
 from apps.globals.constants import ResponseMessages
 
+DATABASE_OTP_BACKEND = 'apps.user.otp_backends.DatabaseOTPBackend'
 
+
+@override_settings(OTP_BACKEND=DATABASE_OTP_BACKEND)
 class SignUpSendOTPAPITestCase(APITestCase):
     """
     APITestCase class to test `/user/signup/` endpoint.
@@ -238,6 +242,7 @@ class SignUpSendOTPAPITestCase(APITestCase):
         self.assertEqual(response.data.get('message'), expected_resp_message)
 
 
+@override_settings(OTP_BACKEND=DATABASE_OTP_BACKEND)
 class VerifyOTPAPITestCase(APITestCase):
     """APITestCase class to test `/user/verify-otp/` endpoint.
     """
@@ -0,0 +1,141 @@
+from django.core.cache import cache
+from django.shortcuts import reverse
+from django.test import override_settings
+from oauth2_provider.models import Application
+from rest_framework.test import APITestCase
+from ..models import User, AuthOTP
+from ..constants import ResponseMessages as UserResponseMessage
+from ..constants import OTP_MAX_ATTEMPTS, OTP_MAX_RESENDS
+from ..otp_backends import CacheOTPBackend
+from ..serializers import OTPVerificationContexts
+
+CACHE_OTP_BACKEND = 'apps.user.otp_backends.CacheOTPBackend'
+
+
+@override_settings(OTP_BACKEND=CACHE_OTP_BACKEND)
+class CacheOTPBackendTestCase(APITestCase):
+    """Sign-up and verification against the cache backed OTP store
+    """
+    CLIENT_ID = "boofar"
+    PASSWORD = 'random password'
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create(username='oort', email='oort@oort.com')
+        self.app = Application.objects.create(user=user, client_id=self.CLIENT_ID)
+        self.sign_up_url = reverse('sign_up_view')
+        self.verify_url = reverse('verify_otp_view')
+        self.email = 'hs@hs.cm'
+
+    def _sign_up(self):
+        return self.client.post(self.sign_up_url, format='json', data={
+            'client_id': self.CLIENT_ID,
+            'email': self.email,
+            'password': self.PASSWORD
+        })
+
+    def _verify(self, otp_string):
+        return self.client.post(self.verify_url, format='json', data={
+            'client_id': self.CLIENT_ID,
+            'email': self.email,
+            'otp': otp_string,
+            'context': OTPVerificationContexts.SIGN_UP.value
+        })
+
+    def test_sign_up_keeps_otp_out_of_db(self):
+        """Should store the OTP in the cache only
+        """
+        response = self._sign_up()
+
+        otp = AuthOTP.get_otp(self.email, self.app)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data.get('message'), UserResponseMessage.OTP_SUCCESS)
+        self.assertFalse(AuthOTP.objects.exists())
+        self.assertEqual(otp.resends_used, 1)
+        self.assertEqual(len(otp.one_time_code), 8)
+
+    def test_resends_are_counted(self):
+        """Should keep the same code and block resends after the limit
+        """
+        self._sign_up()
+        one_time_code = AuthOTP.get_otp(self.email).one_time_code
+
+        for _ in range(OTP_MAX_RESENDS - 1):
+            response = self._sign_up()
+
+        otp = AuthOTP.get_otp(self.email)
+        self.assertEqual(response.data.get('message'), UserResponseMessage.OTP_RESENDS_EXCEEDED)
+        self.assertEqual(otp.resends_used, OTP_MAX_RESENDS)
+        self.assertEqual(otp.one_time_code, one_time_code)
+
+        response = self._sign_up()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data.get('message'), UserResponseMessage.OTP_RESENDS_EXCEEDED)
+
+    def test_expired_otp(self):
+        """Should report expiry once the code key is gone and renew it on resend
+        """
+        self._sign_up()
+        otp = AuthOTP.get_otp(self.email)
+        cache.delete(CacheOTPBackend(AuthOTP)._keys(self.email)['code'])
+
+        response = self._verify(otp.one_time_code)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data.get('message'), UserResponseMessage.OTP_EXPIRED)
+
+        self._sign_up()
+        renewed_otp = AuthOTP.get_otp(self.email)
+        self.assertFalse(renewed_otp.is_expired())
+        self.assertEqual(renewed_otp.resends_used, 1)
+
+    def test_otp_attempt_limit(self):
+        """Should block the email once the attempts are used up
+        """
+        self._sign_up()
+
+        for _ in range(OTP_MAX_ATTEMPTS):
+            response = self._verify('wrong otp')
+
+        otp = AuthOTP.get_otp(self.email)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data.get('message'), UserResponseMessage.OTP_ATTEMPT_EXCEEDED)
+        self.assertEqual(otp.attempts_used, OTP_MAX_ATTEMPTS)
+        self.assertTrue(otp.is_email_blocked())
+
+        response = self._sign_up()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data.get('email')[0],
+                         UserResponseMessage.TEMPORARY_BLOCKED_EMAIL)
+
+    def test_correct_otp_attempt(self):
+        """Should issue tokens and drop the cached OTP
+        """
+        self._sign_up()
+        otp = AuthOTP.get_otp(self.email)
+
+        response = self._verify(otp.one_time_code)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(AuthOTP.get_otp(self.email))
+        self.assertTrue(User.objects.get(email=self.email).is_active)
+        self.assertTrue({'access_token', 'refresh_token'} < response.data.keys())
+
+    def test_token_issuance_query_budget(self):
+        """Should verify, activate and issue tokens within 4 queries
+        """
+        self._sign_up()
+        otp = AuthOTP.get_otp(self.email)
+
+        with self.assertNumQueries(4):
+            response = self._verify(otp.one_time_code)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_client(self):
+        """Should not hand out an OTP issued for another client
+        """
+        self._sign_up()
+        other_app = Application.objects.create(user=self.app.user, client_id='other')
+
+        self.assertIsNone(AuthOTP.get_otp(self.email, other_app))
+        self.assertIsNotNone(AuthOTP.get_otp(self.email, self.app))
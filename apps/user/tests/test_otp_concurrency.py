@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.db import connection
+from django.shortcuts import reverse
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from oauth2_provider.models import Application
+from rest_framework.test import APIClient, APITransactionTestCase
+from ..models import User, AuthOTP
+from ..constants import ResponseMessages as UserResponseMessage
+from ..constants import OTP_MAX_ATTEMPTS, OTP_MAX_RESENDS
+from ..serializers import OTPVerificationContexts
+
+DATABASE_OTP_BACKEND = 'apps.user.otp_backends.DatabaseOTPBackend'
+
+
+def hammer(func, num_calls, num_workers=8):
+    """Runs `func` `num_calls` times from a thread pool and returns the results.
+    Each call gets its own DB connection, closed before the thread moves on.
+    """
+    def run(_):
+        try:
+            return func()
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        return list(executor.map(run, range(num_calls)))
+
+
+@override_settings(OTP_BACKEND=DATABASE_OTP_BACKEND)
+class VerifyOTPConcurrencyTestCase(APITransactionTestCase):
+    """Parallel `/user/verify-otp/` requests for the same email
+    """
+    CLIENT_ID = "boofar"
+
+    def setUp(self):
+        self.user = User.objects.create(username='toor', email='toor@toor.com')
+        self.app = Application.objects.create(user=self.user, client_id=self.CLIENT_ID)
+        self.otp = AuthOTP.objects.create(
+            email=self.user.email,
+            client=self.app,
+            one_time_code='abcdefgh',
+            expires_at=timezone.now() + timedelta(days=1)
+        )
+        self.url = reverse('verify_otp_view')
+
+    def _verify_wrong_otp(self):
+        data = {
+            'client_id': self.CLIENT_ID,
+            'email': self.user.email,
+            'otp': 'wrong otp',
+            'context': OTPVerificationContexts.SIGN_UP.value
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().post(self.url, format='json', data=data)
+        return response, len(queries)
+
+    def test_parallel_attempts_are_exact(self):
+        """Should count every attempt once and never past the limit
+        """
+        results = hammer(self._verify_wrong_otp, OTP_MAX_ATTEMPTS * 4)
+
+        obj = AuthOTP.objects.get(pk=self.otp.pk)
+        self.assertEqual(obj.attempts_used, OTP_MAX_ATTEMPTS)
+        self.assertTrue(obj.is_email_blocked())
+
+        status_codes = {response.status_code for response, _ in results}
+        self.assertTrue(status_codes <= {400, 403})
+        # every counted attempt saw its own count, a lost update would repeat one
+        attempts_left = sorted(response.data['attempts_left'] for response, _ in results
+                               if response.data.get('message') == UserResponseMessage.INVALID_OTP)
+        self.assertEqual(attempts_left, list(range(1, OTP_MAX_ATTEMPTS)))
+
+    def test_parallel_resends_are_exact(self):
+        """Should count every resend once and never past the limit
+        """
+        def resend():
+            return AuthOTP.objects.get(pk=self.otp.pk).update_resends()
+
+        results = hammer(resend, OTP_MAX_RESENDS * 4)
+
+        self.assertEqual(results.count(True), OTP_MAX_RESENDS)
+        self.assertEqual(AuthOTP.objects.get(pk=self.otp.pk).resends_used, OTP_MAX_RESENDS)
+
+    def test_query_count_is_flat(self):
+        """Should run the same number of queries on every counted attempt
+        """
+        # warms up per-process lookups such as the client registry
+        self._verify_wrong_otp()
+        results = hammer(self._verify_wrong_otp, OTP_MAX_ATTEMPTS - 2)
+
+        query_counts = {num_queries for _, num_queries in results}
+        messages = {response.data.get('message') for response, _ in results}
+        self.assertEqual(len(query_counts), 1)
+        self.assertEqual(messages, {UserResponseMessage.INVALID_OTP})
+        self.assertEqual(AuthOTP.objects.get(pk=self.otp.pk).attempts_used,
+                         OTP_MAX_ATTEMPTS - 1)
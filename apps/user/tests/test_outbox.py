@@ -0,0 +1,155 @@
+from datetime import timedelta
+from unittest import mock
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.shortcuts import reverse
+from django.test import override_settings
+from django.utils import timezone
+from oauth2_provider.models import Application
+from rest_framework.test import APITestCase
+from apps.globals.utils.email import send_mail, send_mails
+from ..models import User, OutboxMessage
+from ..constants import OUTBOX_CLAIM_SECONDS
+from ..outbox import claim_pending, relay_pending
+from ..tasks import relay_outbox, remove_published_outbox_messages
+
+
+class OutboxTestCase(APITestCase):
+    CLIENT_ID = 'boofar'
+
+    def setUp(self):
+        mail.outbox = []
+        user = User.objects.create(username='oort', email='oort@oort.com')
+        Application.objects.create(user=user, client_id=self.CLIENT_ID)
+
+    def _sign_up(self, email='hs@hs.cm'):
+        return self.client.post(reverse('sign_up_view'), format='json', data={
+            'client_id': self.CLIENT_ID,
+            'email': email,
+            'password': 'random password'
+        })
+
+    def test_sign_up_writes_outbox(self):
+        """Should record the OTP mail instead of calling the broker
+        """
+        with mock.patch('apps.globals.utils.email.send_mail.apply_async') as apply_async:
+            response = self._sign_up()
+
+        outbox_message = OutboxMessage.objects.get()
+        args, _ = outbox_message.get_arguments()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(apply_async.called)
+        self.assertEqual(outbox_message.task, send_mail.name)
+        self.assertEqual(args[2], ['hs@hs.cm'])
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(OUTBOX_BATCH_TASKS={})
+    def test_relay(self):
+        """Should publish pending messages over one producer and mark them published
+        """
+        for idx in range(3):
+            self._sign_up(f'hs{idx}@hs.cm')
+
+        with mock.patch('apps.globals.utils.email.send_mail.apply_async',
+                        wraps=send_mail.apply_async) as apply_async:
+            self.assertEqual(relay_pending(), 3)
+
+        producers = {id(kwargs['producer']) for _, kwargs in apply_async.call_args_list}
+        self.assertEqual(len(producers), 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboxMessage.objects.filter(published_at__isnull=True).exists())
+        self.assertEqual(relay_pending(), 0)
+
+    def test_relay_batches_mails(self):
+        """Should publish the pending mails as one `send_mails` call
+        """
+        for idx in range(3):
+            self._sign_up(f'hs{idx}@hs.cm')
+
+        with mock.patch('apps.globals.utils.email.send_mails.apply_async',
+                        wraps=send_mails.apply_async) as apply_async:
+            self.assertEqual(relay_pending(), 3)
+
+        self.assertEqual(apply_async.call_count, 1)
+        self.assertEqual([message.to for message in mail.outbox],
+                         [['hs0@hs.cm'], ['hs1@hs.cm'], ['hs2@hs.cm']])
+        self.assertFalse(OutboxMessage.objects.filter(published_at__isnull=True).exists())
+
+    @override_settings(OUTBOX_BATCH_TASKS={})
+    def test_failed_publish_stays_pending(self):
+        """Should keep the messages not published yet pending when publishing fails
+        """
+        self._sign_up('hs0@hs.cm')
+        self._sign_up('hs1@hs.cm')
+
+        with mock.patch('apps.globals.utils.email.send_mail.apply_async',
+                        side_effect=[None, ConnectionError('broker down')]):
+            with self.assertRaises(ConnectionError):
+                relay_pending()
+
+        pending = OutboxMessage.objects.get(published_at__isnull=True)
+        self.assertEqual(pending.get_arguments()[0][2], ['hs1@hs.cm'])
+        self.assertIsNone(pending.claim_token)
+        call_command('relay_outbox', once=True)
+        self.assertFalse(OutboxMessage.objects.filter(published_at__isnull=True).exists())
+
+    def test_claims(self):
+        """Should give each pending message to one relay, and take over stale claims
+        """
+        for idx in range(3):
+            OutboxMessage.enqueue(send_mail, 'subject', 'message', [f'hs{idx}@hs.cm'])
+
+        claim_token, claimed = claim_pending(batch_size=2)
+        other_claim_token, other_claimed = claim_pending()
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(len(other_claimed), 1)
+        self.assertNotEqual(claim_token, other_claim_token)
+        self.assertEqual(claim_pending(), (None, []))
+
+        OutboxMessage.objects.filter(claim_token=claim_token).update(
+            claimed_at=timezone.now() - timedelta(seconds=OUTBOX_CLAIM_SECONDS + 1))
+        _, taken_over = claim_pending()
+        self.assertEqual(taken_over, claimed)
+
+    @override_settings(OUTBOX_BATCH_TASKS={})
+    def test_no_transaction_while_publishing(self):
+        """Should publish with no transaction, and so no DB lock, held
+        """
+        self._sign_up()
+        # the test case's own atomic blocks are open throughout
+        savepoint_ids = list(connection.savepoint_ids)
+        savepoint_ids_while_publishing = []
+
+        def apply_async(*args, **kwargs):
+            savepoint_ids_while_publishing.append(list(connection.savepoint_ids))
+
+        with mock.patch('apps.globals.utils.email.send_mail.apply_async',
+                        side_effect=apply_async):
+            self.assertEqual(relay_pending(), 1)
+        self.assertEqual(savepoint_ids_while_publishing, [savepoint_ids])
+
+    def test_rolled_back_with_request(self):
+        """Should drop the message when its transaction rolls back
+        """
+        try:
+            with transaction.atomic():
+                OutboxMessage.enqueue(send_mail, 'subject', 'message', ['hs@hs.cm'])
+                raise ValueError()
+        except ValueError:
+            pass
+
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_periodic_tasks(self):
+        """Should relay in batches and delete old published messages
+        """
+        for idx in range(3):
+            OutboxMessage.enqueue(send_mail, 'subject', 'message', [f'hs{idx}@hs.cm'])
+
+        self.assertEqual(relay_outbox(batch_size=2), 3)
+        OutboxMessage.objects.filter(pk=OutboxMessage.objects.first().pk).update(
+            published_at=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(remove_published_outbox_messages(), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
@@ -0,0 +1,102 @@
+from datetime import date
+from django.db import connection
+from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from apps.entities.models import Profession, Experience, Education, UserDocument
+from apps.globals.managers.test_managers import authenticated_user_api_client
+from ..models import User
+
+
+class UserProfileTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='oort', email='oort@oort.com',
+                                        first_name='Oort')
+        self.viewer = User.objects.create(username='hs', email='hs@hs.cm')
+        profession = Profession.objects.create(name='engineer', industry='software')
+        for year in (2015, 2018):
+            Experience.objects.create(user=self.user, profession=profession,
+                                      start_date=date(year, 1, 1))
+        self.education = Education.objects.create(
+            user=self.user, degree='BSc', field='CS', institute='HS', start_date=date(2010, 1, 1))
+        UserDocument.objects.create(owner=self.user, document='cv.pdf', doc_type='cv')
+        self.url = reverse('user_profile_view', args=[self.user.pk])
+
+    def _get(self, viewer, **headers):
+        with authenticated_user_api_client(self.client, viewer):
+            return self.client.get(self.url, **headers)
+
+    def test_profile(self):
+        """Should return every part of the profile with public user fields to others
+        """
+        response = self._get(self.viewer)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['user']), set(User.get_public_fields()))
+        self.assertEqual([experience['start_date'] for experience in response.data['experiences']],
+                         ['2018-01-01', '2015-01-01'])
+        self.assertEqual(response.data['experiences'][0]['profession']['name'], 'engineer')
+        self.assertEqual(response.data['education'][0]['id'], self.education.pk)
+        self.assertEqual(response.data['documents'][0]['doc_type'], 'cv')
+        self.assertNotIn('document', response.data['documents'][0])
+
+        response = self._get(self.user)
+        self.assertEqual(response.data['user']['email'], 'oort@oort.com')
+
+    def test_query_count(self):
+        """Should answer in five queries, and in one when the ETag still matches
+        """
+        for viewer in (self.viewer, self.user):
+            self.client.force_authenticate(viewer)
+
+            with self.assertNumQueries(5):
+                etag = self.client.get(self.url)['ETag']
+            with self.assertNumQueries(1):
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+
+    def test_owner_fields(self):
+        """Should show the owner every user field but groups and permissions
+        """
+        user = self._get(self.user).data['user']
+
+        self.assertEqual(user['first_name'], 'Oort')
+        self.assertNotIn('groups', user)
+        self.assertNotIn('user_permissions', user)
+        self.assertNotIn('password', user)
+
+    def test_profile_stamp(self):
+        """Should count every part on its own, without joining them together
+        """
+        with CaptureQueriesContext(connection) as context:
+            stamp = User.get_profile_stamp(self.user.pk)
+
+        self.assertEqual(stamp[2::2], (2, 1, 1))
+        self.assertNotIn('JOIN', context.captured_queries[0]['sql'].upper())
+        self.assertEqual(User.get_profile_stamp(self.viewer.pk)[2::2], (0, 0, 0))
+
+    def test_etag_changes(self):
+        """Should change the ETag when a part changes, is deleted, or the viewer differs
+        """
+        etag = self._get(self.viewer)['ETag']
+        self.assertNotEqual(self._get(self.user)['ETag'], etag)
+
+        self.education.grade = 'A'
+        self.education.save()
+        updated_etag = self._get(self.viewer)['ETag']
+        self.assertNotEqual(updated_etag, etag)
+
+        UserDocument.objects.all().delete()
+        response = self._get(self.viewer, HTTP_IF_NONE_MATCH=updated_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['documents'], [])
+
+    def test_inactive_user(self):
+        """Should not show inactive users
+        """
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self._get(self.viewer).status_code, 404)
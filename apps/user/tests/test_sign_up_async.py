@@ -0,0 +1,118 @@
+from unittest import mock
+from django.core.cache import cache
+from django.shortcuts import reverse
+from oauth2_provider.models import Application
+from rest_framework.test import APITestCase
+from ..constants import ResponseMessages as UserResponseMessage
+from ..models import User, AuthOTP, ClientSettings, OutboxMessage, SignUpRequest
+from ..outbox import relay_pending
+from ..tasks import process_sign_up_request
+
+
+class AsyncSignUpTestCase(APITestCase):
+    CLIENT_ID = 'boofar'
+    PASSWORD = 'random password'
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create(username='oort', email='oort@oort.com')
+        app = Application.objects.create(user=user, client_id=self.CLIENT_ID)
+        ClientSettings.objects.create(application=app, async_sign_up=True)
+        self.url = reverse('sign_up_view')
+        self.email = 'hs@hs.cm'
+
+    def _sign_up(self, email=None, idempotency_key=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': idempotency_key} if idempotency_key else {}
+        return self.client.post(self.url, format='json', data={
+            'client_id': self.CLIENT_ID,
+            'email': email or self.email,
+            'password': self.PASSWORD
+        }, **headers)
+
+    def test_accepted(self):
+        """Should answer 202 with a request id and leave the work to a worker
+        """
+        response = self._sign_up()
+
+        request_id = response.data.get('request_id')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data.get('status'), SignUpRequest.PENDING)
+        self.assertEqual(response['Location'],
+                         reverse('sign_up_request_view', args=[request_id]))
+        self.assertFalse(User.objects.filter(email=self.email).exists())
+        self.assertIsNone(AuthOTP.get_otp(self.email))
+        self.assertNotIn(self.PASSWORD, OutboxMessage.objects.get().payload)
+
+    def test_worker_creates_user(self):
+        """Should create the user and OTP once the outbox is relayed
+        """
+        request_id = self._sign_up().data.get('request_id')
+        relay_pending()
+
+        user = User.objects.get(email=self.email)
+        self.assertFalse(user.is_active)
+        self.assertTrue(user.check_password(self.PASSWORD))
+        self.assertIsNotNone(AuthOTP.get_otp(self.email))
+
+        response = self.client.get(reverse('sign_up_request_view', args=[request_id]))
+        self.assertEqual(response.data.get('status'), SignUpRequest.DONE)
+        self.assertEqual(response.data.get('message'), UserResponseMessage.OTP_SUCCESS)
+
+    def test_idempotency_key(self):
+        """Should hand retries with the same key the first request
+        """
+        first_response = self._sign_up(idempotency_key='retry-1')
+        response = self._sign_up(idempotency_key='retry-1')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data.get('request_id'), first_response.data.get('request_id'))
+        self.assertEqual(SignUpRequest.objects.count(), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+        response = self._sign_up(idempotency_key='retry-2')
+        self.assertNotEqual(response.data.get('request_id'),
+                            first_response.data.get('request_id'))
+
+    def test_idempotency_key_other_email(self):
+        """Should refuse a key reused for another email
+        """
+        self._sign_up(idempotency_key='retry-1')
+        response = self._sign_up(email='other@hs.cm', idempotency_key='retry-1')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.data.get('message'), UserResponseMessage.IDEMPOTENCY_KEY_REUSED)
+
+    def test_processed_once(self):
+        """Should do the work once even if the task is delivered twice
+        """
+        request_id = self._sign_up().data.get('request_id')
+
+        self.assertTrue(process_sign_up_request(request_id))
+        self.assertFalse(process_sign_up_request(request_id))
+        self.assertEqual(AuthOTP.get_otp(self.email).resends_used, 1)
+
+    def test_expired_request(self):
+        """Should fail the request once its password has left the cache
+        """
+        request_id = self._sign_up().data.get('request_id')
+        cache.clear()
+
+        self.assertFalse(process_sign_up_request(request_id))
+        sign_up_request = SignUpRequest.objects.get()
+        self.assertEqual(sign_up_request.status, SignUpRequest.FAILED)
+        self.assertEqual(sign_up_request.message, UserResponseMessage.SIGN_UP_REQUEST_EXPIRED)
+        self.assertFalse(User.objects.filter(email=self.email).exists())
+
+    def test_unexpected_error(self):
+        """Should fail the request, not leave it processing, when the work raises
+        """
+        request_id = self._sign_up().data.get('request_id')
+
+        with mock.patch('apps.user.tasks.sign_up', side_effect=RuntimeError('db gone')):
+            with self.assertRaises(RuntimeError):
+                process_sign_up_request(request_id)
+
+        sign_up_request = SignUpRequest.objects.get()
+        self.assertEqual(sign_up_request.status, SignUpRequest.FAILED)
+        self.assertEqual(sign_up_request.message, UserResponseMessage.SIGN_UP_REQUEST_FAILED)
+        self.assertFalse(process_sign_up_request(request_id))
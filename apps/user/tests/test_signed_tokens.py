@@ -0,0 +1,144 @@
+from unittest import mock
+from django.core.cache import cache
+from django.shortcuts import reverse
+from oauth2_provider.models import Application, AccessToken
+from rest_framework.test import APITestCase, APIRequestFactory
+from ..authentication import SignedTokenAuthentication
+from ..models import User, AuthOTP, ClientSettings, SignedTokenRevocation
+from ..serializers import OTPVerificationContexts
+from ..signed_tokens import (
+    SignedTokenException,
+    create_signed_token,
+    decode_signed_token,
+    is_signed_token,
+    revocation_list
+)
+from ..tasks import remove_expired_signed_token_revocations
+
+
+class SignedTokenTestCase(APITestCase):
+    CLIENT_ID = 'boofar'
+    PASSWORD = 'random password'
+
+    def setUp(self):
+        cache.clear()
+        revocation_list.sync(force=True)
+        self.user = User.objects.create_user(
+            username='username',
+            email='email@email.com',
+            first_name='first',
+            password=self.PASSWORD
+        )
+        self.app = Application.objects.create(user=self.user, client_id=self.CLIENT_ID)
+        ClientSettings.objects.create(application=self.app, signed_access_tokens=True)
+        self.url = reverse('get_current_user')
+
+    def _token(self, expires_in=3600):
+        return create_signed_token(self.user.pk, self.app.pk, 'read write', expires_in)
+
+    def _get(self, token):
+        return self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_sign_up_issues_signed_token(self):
+        """Should hand out a signed access token to clients that opted in
+        """
+        email = 'hs@hs.cm'
+        self.client.post(reverse('sign_up_view'), format='json', data={
+            'client_id': self.CLIENT_ID,
+            'email': email,
+            'password': self.PASSWORD
+        })
+        response = self.client.post(reverse('verify_otp_view'), format='json', data={
+            'client_id': self.CLIENT_ID,
+            'email': email,
+            'otp': AuthOTP.get_otp(email).one_time_code,
+            'context': OTPVerificationContexts.SIGN_UP.value
+        })
+
+        access_token = response.data.get('access_token')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(is_signed_token(access_token))
+        self.assertTrue(AccessToken.objects.filter(token=access_token).exists())
+        self.assertEqual(self._get(access_token).data.get('email'), email)
+
+    def test_authentication_without_queries(self):
+        """Should authenticate without touching the DB until the user is read
+        """
+        token = self._token()
+        request = APIRequestFactory().get(self.url, HTTP_AUTHORIZATION=f'Bearer {token}')
+        with self.assertNumQueries(0):
+            user, auth = SignedTokenAuthentication().authenticate(request)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertTrue(user.is_authenticated)
+            self.assertTrue(auth.is_valid(['read']))
+
+        with self.assertNumQueries(1):
+            response = self._get(token)
+        self.assertEqual(response.data.get('first_name'), 'first')
+
+    def test_tampered_token(self):
+        """Should reject a token whose payload was changed
+        """
+        token = self._token()
+        other_token = create_signed_token(self.user.pk + 1, self.app.pk, 'read write', 3600)
+        forged_token = other_token.rpartition('.')[0] + '.' + token.rpartition('.')[2]
+
+        with self.assertRaises(SignedTokenException):
+            decode_signed_token(forged_token)
+        self.assertEqual(self._get(forged_token).status_code, 401)
+
+    def test_expired_token(self):
+        """Should reject a token past its expiry
+        """
+        token = self._token()
+        with mock.patch('apps.user.signed_tokens.time.time', return_value=2 ** 40):
+            response = self._get(token)
+        self.assertEqual(response.status_code, 401)
+
+    def test_revoke_token(self):
+        """Should deny a signed token once its row is deleted
+        """
+        token = self._token()
+        revoked_token = self._token()
+        AccessToken.objects.create(user=self.user, token=revoked_token,
+                                   application=self.app, expires=self.user.date_joined)
+
+        AccessToken.objects.get(token=revoked_token).delete()
+
+        self.assertEqual(self._get(revoked_token).status_code, 401)
+        self.assertEqual(self._get(token).status_code, 200)
+
+    def test_change_password_revokes_tokens(self):
+        """Should deny every signed token issued before a password change
+        """
+        token = self._token()
+        response = self.client.post(reverse('change_password'),
+                                    data={'current_password': self.PASSWORD,
+                                          'new_password': 'the new password'},
+                                    HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._get(token).status_code, 401)
+        self.assertEqual(self._get(self._token()).status_code, 200)
+
+    def test_revocations_reach_other_processes(self):
+        """Should pick up revocations stamped by another process after a sync
+        """
+        token = self._token()
+        self.assertEqual(self._get(token).status_code, 200)
+
+        with mock.patch.object(revocation_list, 'sync_seconds', 0):
+            SignedTokenRevocation.objects.create(user=self.user,
+                                                 expires_at='2999-01-01T00:00:00Z')
+            cache.set('hs:signed-token:revocations:version', 'other process')
+
+            self.assertEqual(self._get(token).status_code, 401)
+
+    def test_remove_expired_revocations(self):
+        """Should delete revocations whose tokens have expired
+        """
+        SignedTokenRevocation.objects.create(user=self.user, expires_at=self.user.date_joined)
+        SignedTokenRevocation.objects.create(user=self.user, expires_at='2999-01-01T00:00:00Z')
+
+        self.assertEqual(remove_expired_signed_token_revocations(), 1)
+        self.assertEqual(SignedTokenRevocation.objects.count(), 1)
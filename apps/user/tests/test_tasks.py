@@ -0,0 +1,131 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from oauth2_provider.models import Application, AccessToken, RefreshToken, Grant
+from ..constants import STALE_USER_SECONDS
+from ..models import User, AuthOTP
+from ..tasks import (
+    remove_expired_otps,
+    remove_expired_access_tokens,
+    remove_expired_refresh_tokens,
+    remove_expired_grants,
+    remove_stale_inactive_users
+)
+
+
+class PurgeTasksTestCase(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.user = User.objects.create(username='oort', email='oort@oort.com')
+        self.app = Application.objects.create(user=self.user, client_id='boofar')
+
+    def _access_token(self, token, expires):
+        return AccessToken.objects.create(
+            user=self.user,
+            token=token,
+            application=self.app,
+            expires=expires
+        )
+
+    def test_remove_expired_otps(self):
+        """Should delete expired OTPs across batches and keep valid ones
+        """
+        for idx in range(5):
+            AuthOTP.objects.create(
+                email=f'expired{idx}@b.cm',
+                client=self.app,
+                expires_at=self.now - timedelta(seconds=1)
+            )
+        valid_otp = AuthOTP.objects.create(
+            email='valid@b.cm',
+            client=self.app,
+            expires_at=self.now + timedelta(days=1)
+        )
+
+        num_deleted = remove_expired_otps(batch_size=2)
+
+        self.assertEqual(num_deleted, 5)
+        self.assertEqual(list(AuthOTP.objects.values_list('pk', flat=True)), [valid_otp.pk])
+
+    def test_time_budget(self):
+        """Should stop once the time budget is used up
+        """
+        AuthOTP.objects.create(
+            email='expired@b.cm',
+            client=self.app,
+            expires_at=self.now - timedelta(seconds=1)
+        )
+
+        self.assertEqual(remove_expired_otps(time_budget=0), 0)
+        self.assertEqual(AuthOTP.objects.count(), 1)
+
+    def test_remove_expired_access_tokens(self):
+        """Should delete expired access tokens without a refresh token
+        """
+        expired_token = self._access_token('expired', self.now - timedelta(seconds=1))
+        refreshable_token = self._access_token('refreshable', self.now - timedelta(seconds=1))
+        RefreshToken.objects.create(
+            user=self.user,
+            token='refresh',
+            application=self.app,
+            access_token=refreshable_token
+        )
+        valid_token = self._access_token('valid', self.now + timedelta(days=1))
+
+        num_deleted = remove_expired_access_tokens()
+
+        remaining_pks = set(AccessToken.objects.values_list('pk', flat=True))
+        self.assertEqual(num_deleted, 1)
+        self.assertNotIn(expired_token.pk, remaining_pks)
+        self.assertEqual(remaining_pks, {refreshable_token.pk, valid_token.pk})
+
+    def test_remove_expired_refresh_tokens(self):
+        """Should delete revoked refresh tokens and detach tokens created from them
+        """
+        revoked_token = RefreshToken.objects.create(
+            user=self.user,
+            token='revoked',
+            application=self.app,
+            revoked=self.now - timedelta(seconds=1)
+        )
+        RefreshToken.objects.create(user=self.user, token='live', application=self.app)
+        access_token = self._access_token('refreshed', self.now + timedelta(days=1))
+        access_token.source_refresh_token = revoked_token
+        access_token.save()
+
+        num_deleted = remove_expired_refresh_tokens()
+
+        access_token.refresh_from_db()
+        self.assertEqual(num_deleted, 1)
+        self.assertEqual(list(RefreshToken.objects.values_list('token', flat=True)), ['live'])
+        self.assertIsNone(access_token.source_refresh_token)
+
+    def test_remove_expired_grants(self):
+        """Should delete expired grants
+        """
+        for code, expires in (('expired', self.now - timedelta(seconds=1)),
+                              ('valid', self.now + timedelta(minutes=1))):
+            Grant.objects.create(
+                user=self.user,
+                code=code,
+                application=self.app,
+                expires=expires,
+                redirect_uri='https://hs.cm'
+            )
+
+        self.assertEqual(remove_expired_grants(), 1)
+        self.assertEqual(list(Grant.objects.values_list('code', flat=True)), ['valid'])
+
+    def test_remove_stale_inactive_users(self):
+        """Should delete only old sign-ups that were never verified
+        """
+        joined_long_ago = self.now - timedelta(seconds=STALE_USER_SECONDS + 1)
+        User.objects.create(username='stale', email='stale@b.cm', is_active=False,
+                            date_joined=joined_long_ago)
+        User.objects.create(username='recent', email='recent@b.cm', is_active=False)
+        User.objects.create(username='old', email='old@b.cm', date_joined=joined_long_ago)
+
+        self.assertEqual(remove_stale_inactive_users(), 1)
+        self.assertFalse(User.objects.filter(username='stale').exists())
+        self.assertEqual(User.objects.count(), 3)
@@ -0,0 +1,167 @@
+from unittest import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import reverse
+from django.test import override_settings
+from oauth2_provider.models import Application
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
+from ..models import User
+from ..throttle import SlidingWindowThrottle
+
+THROTTLE_RATES = {
+    'user_exists_endpoint': '2/day',
+    'sign_up': {'ip': '4/minute', 'email': '2/minute', 'client_id': '100/minute'},
+    'sliding': '4/minute',
+}
+
+
+class SlidingThrottle(SlidingWindowThrottle):
+    scope = 'sliding'
+
+
+class InterleavingCache(object):
+    """A cache that runs `interleaved` right after the first call made to it"""
+
+    def __init__(self, cache, interleaved):
+        self.cache = cache
+        self.interleaved = interleaved
+
+    def __getattr__(self, name):
+        method = getattr(self.cache, name)
+
+        def call(*args, **kwargs):
+            result = method(*args, **kwargs)
+            interleaved, self.interleaved = self.interleaved, None
+            if interleaved:
+                interleaved()
+            return result
+        return call
+
+
+@override_settings(
+    THROTTLE_CACHE_ALIAS='default',
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': THROTTLE_RATES}
+)
+class SlidingWindowThrottleTestCase(APITestCase):
+    CLIENT_ID = 'boofar'
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create(username='oort', email='oort@oort.com')
+        Application.objects.create(user=user, client_id=self.CLIENT_ID)
+        self.sign_up_url = reverse('sign_up_view')
+
+    def _sign_up(self, email):
+        return self.client.post(self.sign_up_url, format='json', data={
+            'client_id': self.CLIENT_ID,
+            'email': email,
+            'password': 'random password'
+        })
+
+    def _allow_request_at(self, now, throttle_cache=None):
+        request = Request(APIRequestFactory().get('/'))
+        throttle = SlidingThrottle()
+        with mock.patch.object(SlidingThrottle, 'timer', return_value=now), \
+                mock.patch.object(throttle, 'get_cache', return_value=throttle_cache or cache):
+            return throttle.allow_request(request, None), throttle.wait()
+
+    def test_throttle_by_email(self):
+        """Should turn away an email over its rate before any query
+        """
+        for _ in range(2):
+            self.assertEqual(self._sign_up('hs@hs.cm').status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self._sign_up('hs@hs.cm')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response.has_header('Retry-After'))
+
+    def test_throttle_by_ip(self):
+        """Should count every email against the IP's rate
+        """
+        for idx in range(4):
+            self.assertEqual(self._sign_up(f'hs{idx}@hs.cm').status_code, 200)
+
+        self.assertEqual(self._sign_up('other@hs.cm').status_code, 429)
+
+    def test_email_is_normalized(self):
+        """Should count an email regardless of case
+        """
+        self._sign_up('hs@hs.cm')
+        self._sign_up('HS@hs.cm ')
+
+        self.assertEqual(self._sign_up('Hs@Hs.cm').status_code, 429)
+
+    def test_sliding_window(self):
+        """Should weigh the previous window by how much of it is still in the slide
+        """
+        for _ in range(4):
+            self.assertTrue(self._allow_request_at(600)[0])
+        allowed, wait = self._allow_request_at(630)
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 45)
+
+        # halfway through the next window 2 of the 4 requests still count
+        self.assertTrue(self._allow_request_at(690)[0])
+        self.assertTrue(self._allow_request_at(690)[0])
+        allowed, wait = self._allow_request_at(690)
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 15)
+
+        self.assertTrue(self._allow_request_at(705)[0])
+
+    def test_cache_calls_per_allowed_request(self):
+        """Should count an allowed request with one `incr` per key field
+        """
+        counted_cache = mock.Mock(wraps=cache)
+        with mock.patch.object(SlidingWindowThrottle, 'get_cache', return_value=counted_cache):
+            self.assertEqual(self._sign_up('hs@hs.cm').status_code, 200)
+            self.assertEqual([call[0] for call in counted_cache.mock_calls],
+                             ['incr', 'get', 'add'] * 3)
+
+            counted_cache.reset_mock()
+            self.assertEqual(self._sign_up('hs@hs.cm').status_code, 200)
+            self.assertEqual([call[0] for call in counted_cache.mock_calls],
+                             ['incr', 'incr', 'incr'])
+
+    def test_denied_request_is_taken_back(self):
+        """Should stop at the key field over its rate, and take back the hits counted
+        """
+        self._sign_up('hs@hs.cm')
+        self._sign_up('hs@hs.cm')
+
+        counted_cache = mock.Mock(wraps=cache)
+        with mock.patch.object(SlidingWindowThrottle, 'get_cache', return_value=counted_cache), \
+                self.assertNumQueries(0):
+            self.assertEqual(self._sign_up('hs@hs.cm').status_code, 429)
+        self.assertEqual([call[0] for call in counted_cache.mock_calls],
+                         ['incr', 'incr', 'decr', 'decr'])
+
+        # the IP's rate of 4 still has room for 2 other emails
+        self.assertEqual(self._sign_up('hs1@hs.cm').status_code, 200)
+        self.assertEqual(self._sign_up('hs2@hs.cm').status_code, 200)
+        self.assertEqual(self._sign_up('hs3@hs.cm').status_code, 429)
+
+    def test_parallel_checks_at_the_limit(self):
+        """Should let only one of two checks racing for the last request through
+        """
+        for _ in range(3):
+            self.assertTrue(self._allow_request_at(600)[0])
+
+        results = []
+        racing_cache = InterleavingCache(
+            cache, lambda: results.append(self._allow_request_at(600)[0]))
+        results.append(self._allow_request_at(600, racing_cache)[0])
+
+        self.assertEqual(sorted(results), [False, True])
+        self.assertFalse(self._allow_request_at(600)[0])
+
+    def test_user_exists_throttle(self):
+        """Should throttle /user/exists/ by IP
+        """
+        url = reverse('check_user_exists_view')
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, data={'email': 'a@hs.cm'}).status_code, 200)
+
+        self.assertEqual(self.client.post(url, data={'email': 'b@hs.cm'}).status_code, 429)
@@ -0,0 +1,38 @@
+from django.shortcuts import reverse
+from rest_framework.test import APITestCase
+from ..models import User
+
+
+class UserRetrieveTestCase(APITestCase):
+
+    def test_etag_per_viewer(self):
+        """Should tell the owner's ETag from everyone else's
+        """
+        user = User.objects.create(username='oort', email='oort@oort.com')
+        viewer = User.objects.create(username='hs', email='hs@hs.cm')
+        url = reverse('get_user_view', args=[user.pk])
+
+        self.client.force_authenticate(viewer)
+        public_etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=public_etag).status_code, 304)
+
+        self.client.force_authenticate(user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=public_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], 'oort@oort.com')
+
+    def test_sparse_fields_per_viewer(self):
+        """Should narrow each viewer's own fields and refuse the ones they cannot see
+        """
+        user = User.objects.create(username='oort', email='oort@oort.com')
+        viewer = User.objects.create(username='hs', email='hs@hs.cm')
+        url = reverse('get_user_view', args=[user.pk])
+
+        self.client.force_authenticate(viewer)
+        response = self.client.get(url, {'fields': 'username'})
+        self.assertEqual(response.data, {'username': 'oort'})
+        self.assertEqual(self.client.get(url, {'fields': 'email'}).status_code, 400)
+
+        self.client.force_authenticate(user)
+        response = self.client.get(url, {'fields': 'email,username'})
+        self.assertEqual(response.data, {'username': 'oort', 'email': 'oort@oort.com'})
@@ -1,5 +1,154 @@
-from rest_framework.throttling import UserRateThrottle
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
 
+THROTTLE_DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
 
-class UserExistenceViewThrottle(UserRateThrottle):
+
+def parse_rate(rate: str):
+    """'5/hour' -> (5, 3600), same format as DRF's `DEFAULT_THROTTLE_RATES`"""
+    num_requests, period = rate.split('/')
+    return int(num_requests), THROTTLE_DURATIONS[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Limits requests per `key_fields` value ('ip', 'email' or 'client_id') over
+    a sliding window, approximated from two fixed windows:
+
+        count = previous window count * share of it still in the slide
+                + current window count
+
+    Each key is one integer in the cache per window, holding the previous
+    window's count in its high bits and its own count in the low ones. The
+    first hit of a window reads the previous count into it, every other hit
+    is a single `incr` that counts the request and returns both counts at
+    once. Requests are counted first and checked after, so parallel requests
+    can not all slip in under the limit, and an allowed request takes one
+    `incr` per key field, as the cache API has no batched increment. A key's
+    first hit of a window takes a `get` and an `add` more.
+
+    A request over the limit of a key field is not checked against the
+    rest, and its hits are taken back with a `decr` each, so it does not use
+    up the rate of a key field it shares with allowed requests.
+
+    The rate of `scope` in `DEFAULT_THROTTLE_RATES` is either one rate for
+    every key field or a dict of rates by key field.
+    """
+    scope = None
+    key_fields = ('ip',)
+    timer = time.time
+    COUNT_BITS = 32
+    COUNT_MASK = (1 << COUNT_BITS) - 1
+
+    def __init__(self):
+        self._wait = None
+
+    def get_cache(self):
+        return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+    def get_rate(self, key_field):
+        rates = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if isinstance(rates, dict):
+            rates = rates.get(key_field)
+        if not rates:
+            raise ImproperlyConfigured(
+                f'No throttle rate set for scope "{self.scope}" and key "{key_field}"')
+        return parse_rate(rates)
+
+    def get_idents(self, request):
+        """Returns the value of every key field present in `request`
+        """
+        data = request.data if hasattr(request.data, 'get') else {}
+        idents = {}
+        for key_field in self.key_fields:
+            if key_field == 'ip':
+                ident = self.get_ident(request)
+            else:
+                ident = data.get(key_field)
+            if ident and isinstance(ident, str):
+                idents[key_field] = ident.strip().lower()
+        return idents
+
+    def get_cache_key(self, key_field, ident, window):
+        hashed_ident = hashlib.md5(ident.encode()).hexdigest()
+        return f'hs:throttle:{self.scope}:{key_field}:{hashed_ident}:{window}'
+
+    def _wait_seconds(self, num_requests, duration, previous, current, elapsed):
+        """Seconds until `previous` has slid out far enough to allow one more request
+        """
+        room = num_requests - 1
+        if current > room:
+            # only the next window can make room, with `current` as its previous
+            elapsed, previous, current = elapsed - duration, current, 0
+        share_left = (room - current) / previous if previous else 1
+        return max(duration * (1 - share_left) - elapsed, 0)
+
+    def _hit(self, cache, key, previous_key, timeout):
+        """Counts a request, returns the previous and current window counts including it
+        """
+        try:
+            value = cache.incr(key)
+        except ValueError:
+            # the first hit of the window carries the previous window's count over
+            previous = cache.get(previous_key, 0) & self.COUNT_MASK
+            value = previous << self.COUNT_BITS | 1
+            if not cache.add(key, value, timeout):
+                value = cache.incr(key)
+        return value >> self.COUNT_BITS, value & self.COUNT_MASK
+
+    def allow_request(self, request, view):
+        idents = self.get_idents(request)
+        if not idents:
+            return True
+
+        now = self.timer()
+        cache = self.get_cache()
+        hit_keys = []
+        for key_field, ident in idents.items():
+            num_requests, duration = self.get_rate(key_field)
+            window = int(now // duration)
+            elapsed = now - window * duration
+            key = self.get_cache_key(key_field, ident, window)
+            previous, current = self._hit(cache, key,
+                                          self.get_cache_key(key_field, ident, window - 1),
+                                          2 * duration)
+            hit_keys.append(key)
+
+            if previous * (1 - elapsed / duration) + current > num_requests:
+                self._wait = self._wait_seconds(num_requests, duration, previous, current - 1,
+                                                elapsed)
+                for hit_key in hit_keys:
+                    try:
+                        cache.decr(hit_key)
+                    except ValueError:
+                        pass
+                return False
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+class UserExistenceViewThrottle(SlidingWindowThrottle):
     scope = 'user_exists_endpoint'
+    key_fields = ('ip',)
+
+
+class SignUpThrottle(SlidingWindowThrottle):
+    scope = 'sign_up'
+    key_fields = ('ip', 'email', 'client_id')
+
+
+class ForgotPasswordThrottle(SlidingWindowThrottle):
+    scope = 'forgot_password'
+    key_fields = ('ip', 'email', 'client_id')
+
+
+class VerifyOTPThrottle(SlidingWindowThrottle):
+    scope = 'verify_otp'
+    key_fields = ('ip', 'email', 'client_id')
@@ -1,8 +1,10 @@
 from django.urls import path
 from .views import (
     UserRetrieveView,
+    UserProfileView,
     GetCurrentUserView,
     SignUpSendOTPView,
+    SignUpRequestView,
     ForgotPasswordSendOTPView,
     VerifyOTPView,
     ChangePasswordView,
@@ -15,7 +17,9 @@ urlpatterns = [
     path('exists/', CheckUserExistsView.as_view(), name='check_user_exists_view'),
     path('forgot-password/', ForgotPasswordSendOTPView.as_view(), name='forgot_password_view'),
     path('sign-up/', SignUpSendOTPView.as_view(), name='sign_up_view'),
+    path('sign-up/<uuid:request_id>/', SignUpRequestView.as_view(), name='sign_up_request_view'),
     path('verify-otp/', VerifyOTPView.as_view(), name='verify_otp_view'),
     path('change-password/', ChangePasswordView.as_view(), name='change_password'),
-    path('<int:pk>/', UserRetrieveView.as_view(), name='get_user_view')
+    path('<int:pk>/', UserRetrieveView.as_view(), name='get_user_view'),
+    path('<int:pk>/profile/', UserProfileView.as_view(), name='user_profile_view')
 ]
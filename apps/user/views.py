@@ -1,9 +1,19 @@
+import hashlib
 from datetime import timedelta
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404
+from django.shortcuts import get_object_or_404, reverse
 from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from apps.entities.models import Experience, Education
+from apps.entities.serializers import (ProfileExperienceSerializer, ProfileEducationSerializer,
+                                       UserDocumentMetadataSerializer)
 from apps.globals.utils.email import send_mail
 from apps.globals.constants import ResponseMessages
 from apps.globals.serializers import get_serializer_with_fields
-from oauth2_provider.models import Application, AccessToken, RefreshToken
+from apps.globals.views import ConditionalGetMixin, SparseFieldsMixin
+from oauth2_provider.models import AccessToken, RefreshToken
 from oauth2_provider.settings import oauth2_settings
 from oauthlib import common
 from rest_framework import generics, views, status
@@ -11,31 +21,89 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from .constants import ResponseMessages as UserResponseMessages
+from .email_filter import email_filter
+from .tasks import process_sign_up_request
 from .exceptions import AuthOTPException
-from .models import User, AuthOTP
+from .models import User, AuthOTP, ClientSettings, OutboxMessage, SignUpRequest
 from .serializers import (
     UserSerializer,
+    ProfileUserSerializer,
     SignUpOTPSerializer,
     TokenVerificationSerializer,
     ForgotPasswordOTPSerializer,
     ChangePasswordSerializer,
     OTPVerificationContexts
 )
-from .throttle import UserExistenceViewThrottle
-from .utils import get_verification_message_with_code, get_password_reset_message_with_code
+from .sign_up import sign_up, store_password
+from .signed_tokens import create_signed_token, revoke_user_signed_tokens
+from .throttle import (
+    ForgotPasswordThrottle,
+    SignUpThrottle,
+    UserExistenceViewThrottle,
+    VerifyOTPThrottle
+)
+from .utils import get_password_reset_message_with_code
 
 
-class UserRetrieveView(generics.RetrieveAPIView):
+class UserRetrieveView(ConditionalGetMixin, SparseFieldsMixin, generics.RetrieveAPIView):
     lookup_field = 'pk'
     queryset = User.get_all_users().filter(is_active=True)
     permission_classes = (IsAuthenticated,)
 
+    def get_etag_scope(self):
+        return 'owner' if self.request.user.id == self.kwargs.get('pk') else 'public'
+
     def get_serializer_class(self):
         fields_to_send = User.get_public_fields()
 
         if self.request.user.id == self.kwargs.get('pk'):
             fields_to_send = '__all__'
-        return get_serializer_with_fields(UserSerializer, fields=fields_to_send)
+        return self.get_sparse_serializer_class(
+            get_serializer_with_fields(UserSerializer, fields=fields_to_send))
+
+
+class UserProfileView(views.APIView):
+    """
+    A user with experiences, education and document metadata in one response.
+    Its ETag comes from the latest `updated_at` of every part, so a client
+    whose copy is current gets a 304 after a single query, and a full
+    response takes five.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    @staticmethod
+    def get_etag(stamp, is_owner):
+        scope = 'owner' if is_owner else 'public'
+        return quote_etag(hashlib.md5(f'{scope}:{stamp!r}'.encode()).hexdigest())
+
+    def get_profile_data(self, pk, is_owner):
+        user = User.objects.prefetch_related(
+            Prefetch('professions', queryset=Experience.objects.select_related('profession')
+                     .order_by('-start_date', '-id')),
+            Prefetch('education', queryset=Education.objects.order_by('-start_date', '-id')),
+            'documents'
+        ).get(pk=pk)
+
+        fields_to_send = None if is_owner else User.get_public_fields()
+        return {
+            'user': ProfileUserSerializer(user, fields=fields_to_send).data,
+            'experiences': ProfileExperienceSerializer(user.professions.all(), many=True).data,
+            'education': ProfileEducationSerializer(user.education.all(), many=True).data,
+            'documents': UserDocumentMetadataSerializer(user.documents.all(), many=True).data
+        }
+
+    def get(self, request, pk):
+        stamp = User.get_profile_stamp(pk)
+        if stamp is None:
+            raise Http404()
+
+        is_owner = request.user.id == pk
+        etag = self.get_etag(stamp, is_owner)
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(self.get_profile_data(pk, is_owner), headers=headers)
 
 
 class GetCurrentUserView(views.APIView):
@@ -56,7 +124,7 @@ class CheckUserExistsView(views.APIView):
         if not email:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        user_exists = User.objects.filter(email=email).exists()
+        user_exists = email_filter.might_exist(email) and User.objects.filter(email=email).exists()
 
         return Response({
             'exists': user_exists
@@ -64,18 +132,13 @@ class CheckUserExistsView(views.APIView):
 
 
 class SignUpSendOTPView(views.APIView):
+    """
+    Clients with `ClientSettings.async_sign_up` get a 202 with a `request_id`
+    right after validation, and `process_sign_up_request` does the rest.
+    Retries with the same `Idempotency-Key` header get the same request back.
+    """
     permission_classes = (AllowAny,)
-
-    def _send_otp(self, otp):
-        email_subject = 'HS: Please Verify your Email'
-        verification_message = get_verification_message_with_code(
-            otp.one_time_code)
-
-        send_mail.delay(
-            email_subject,
-            verification_message,
-            [otp.email]
-        )
+    throttle_classes = (SignUpThrottle,)
 
     def post(self, request: Request):
         serializer = SignUpOTPSerializer(data=request.data)
@@ -83,38 +146,66 @@ class SignUpSendOTPView(views.APIView):
             pass
 
         email = serializer.validated_data.get('email')
-        client_id = serializer.validated_data.get('client_id')
         password = serializer.validated_data.get('password')
+        client = serializer.client
 
-        client = Application.objects.get(client_id=client_id)
+        if ClientSettings.uses_async_sign_up(client):
+            return self._accept(request, email, password, client)
 
         try:
-            otp = AuthOTP.generate_otp(email=email, client=client)
-            self._send_otp(otp)
-
-            message = UserResponseMessages.OTP_SUCCESS
-            if otp.is_resend_blocked():
-                message = UserResponseMessages.OTP_RESENDS_EXCEEDED
-
-            self._create_user(email, password)
-            return Response({'message': message})
+            return Response({'message': sign_up(email, password, client)})
         except AuthOTPException as ex:
             return Response({'message': str(ex)}, status.HTTP_400_BAD_REQUEST)
 
-    def _create_user(self, email, password):
-        if not User.objects.filter(email=email).exists():
-            User.create_basic_user(email=email, password=password, is_active=False)
+    def _accept(self, request: Request, email, password, client):
+        idempotency_key = request.META.get('HTTP_IDEMPOTENCY_KEY') or None
+        with transaction.atomic():
+            sign_up_request, created = SignUpRequest.get_or_create_for_key(
+                email, client, idempotency_key)
+            if created:
+                store_password(sign_up_request.request_id, password)
+                OutboxMessage.enqueue(process_sign_up_request, str(sign_up_request.request_id))
+
+        if sign_up_request.email != email:
+            return Response({
+                'message': UserResponseMessages.IDEMPOTENCY_KEY_REUSED
+            }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        return Response(
+            SignUpRequestView.get_response_data(sign_up_request),
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse('sign_up_request_view',
+                                         args=[sign_up_request.request_id])}
+        )
+
+
+class SignUpRequestView(views.APIView):
+    permission_classes = (AllowAny,)
+
+    @staticmethod
+    def get_response_data(sign_up_request: SignUpRequest):
+        return {
+            'request_id': str(sign_up_request.request_id),
+            'status': sign_up_request.status,
+            'message': sign_up_request.message
+        }
+
+    def get(self, request: Request, request_id):
+        sign_up_request = get_object_or_404(SignUpRequest, request_id=request_id)
+        return Response(self.get_response_data(sign_up_request))
 
 
 class ForgotPasswordSendOTPView(views.APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = (ForgotPasswordThrottle,)
 
     def _send_otp(self, otp):
         email_subject = 'HS: OTP for Password Reset'
         message = get_password_reset_message_with_code(
             otp.one_time_code)
 
-        send_mail.delay(
+        OutboxMessage.enqueue(
+            send_mail,
             email_subject,
             message,
             [otp.email]
@@ -126,13 +217,13 @@ class ForgotPasswordSendOTPView(views.APIView):
             pass
 
         email = serializer.validated_data.get('email')
-        client_id = serializer.validated_data.get('client_id')
+        client = serializer.client
 
-        client = Application.objects.get(client_id=client_id)
         try:
-            otp = AuthOTP.generate_otp(email=email, client=client)
+            with transaction.atomic():
+                otp = AuthOTP.generate_otp(email=email, client=client)
+                self._send_otp(otp)
 
-            self._send_otp(otp)
             message = UserResponseMessages.OTP_SUCCESS
             if otp.is_resend_blocked():
                 message = UserResponseMessages.OTP_RESENDS_EXCEEDED
@@ -145,22 +236,19 @@ class ForgotPasswordSendOTPView(views.APIView):
 
 class VerifyOTPView(views.APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = (VerifyOTPThrottle,)
 
     def post(self, request: Request):
         serializer = TokenVerificationSerializer(data=request.data)
         if not serializer.is_valid(raise_exception=True):
             pass
 
-        email = serializer.validated_data.get('email')
-        client_id = serializer.validated_data.get('client_id')
         otp_string = serializer.validated_data.get('otp')
         context = serializer.validated_data.get('context')
+        client = serializer.client
+        otp: AuthOTP = serializer.otp_obj
 
-        client = Application.objects.get(client_id=client_id)
-
-        otp: AuthOTP = AuthOTP.get_otp(email, client)
-
-        if not otp:
+        if otp.client_id != client.pk:
             return Response({
                 'message': ResponseMessages.BAD_REQUEST
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -176,7 +264,6 @@ class VerifyOTPView(views.APIView):
             }, status.HTTP_400_BAD_REQUEST)
 
         otp_valid = otp.validate_otp(otp_string)
-        otp.save()
 
         if not otp_valid:
             error_message = UserResponseMessages.INVALID_OTP
@@ -189,36 +276,42 @@ class VerifyOTPView(views.APIView):
                 'attempts_left': otp.num_attempts_left()
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        otp.delete()
-        user = self._get_user_for_context(otp, context)
-        token_response = self._generate_token_response(user, client)
+        # nothing here needs a partial rollback, so skip the savepoint
+        # when already inside a transaction
+        with transaction.atomic(savepoint=False):
+            otp.discard()
+            user = self._activate_user_for_context(serializer.user, context)
+            token_response = self._generate_token_response(user, client)
         return Response(token_response)
 
-    def _get_user_for_context(self, otp, context):
-        user = User.objects.get(email=otp.email)
-
-        if context == OTPVerificationContexts.SIGN_UP:
+    def _activate_user_for_context(self, user: User, context):
+        if context == OTPVerificationContexts.SIGN_UP.value and not user.is_active:
+            User.objects.filter(pk=user.pk).update(is_active=True)
             user.is_active = True
-            user.save()
         return user
 
     def _generate_token_response(self, user: User, client):
-        expires = timezone.now() + timedelta(seconds=oauth2_settings.ACCESS_TOKEN_EXPIRE_SECONDS)
-        access_token = AccessToken(
+        scope = 'read write'
+        expires_in = oauth2_settings.ACCESS_TOKEN_EXPIRE_SECONDS
+
+        # a signed token still gets its row, so refresh and revocation work as usual
+        token = common.generate_token()
+        if ClientSettings.uses_signed_access_tokens(client):
+            token = create_signed_token(user.pk, client.pk, scope, expires_in)
+
+        access_token = AccessToken.objects.create(
             user=user,
-            scope='read write',
-            expires=expires,
-            token=common.generate_token(),
+            scope=scope,
+            expires=timezone.now() + timedelta(seconds=expires_in),
+            token=token,
             application=client
         )
-        access_token.save()
-        refresh_token = RefreshToken(
+        refresh_token = RefreshToken.objects.create(
             user=user,
             token=common.generate_token(),
             application=client,
             access_token=access_token
         )
-        refresh_token.save()
 
         return {
             'access_token': access_token.token,
@@ -240,5 +333,6 @@ class ChangePasswordView(views.APIView):
         password = serializer.validated_data.get('new_password')
 
         self.request.user.set_password(password)
-        self.request.user.save()
+        self.request.user.save(update_fields=['password'])
+        revoke_user_signed_tokens(self.request.user)
         return Response({'message': UserResponseMessages.RESET_PASSWORD_SUCCESS})
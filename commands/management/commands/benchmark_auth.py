@@ -0,0 +1,91 @@
+import time
+from datetime import timedelta
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from oauth2_provider.contrib.rest_framework import OAuth2Authentication
+from oauth2_provider.models import Application, AccessToken
+from oauthlib import common
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.user.authentication import CachedOAuth2Authentication, SignedTokenAuthentication
+from apps.user.models import User
+from apps.user.signed_tokens import create_signed_token
+from apps.user.views import GetCurrentUserView
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks authenticated requests for each kind of access token'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-n',
+            '--requests',
+            type=int,
+            default=1000,
+            help='Number of requests per authentication class'
+        )
+
+    def _rate(self, func, num_requests):
+        func()
+        started_at = time.perf_counter()
+        for _ in range(num_requests):
+            func()
+        return num_requests / (time.perf_counter() - started_at)
+
+    def _benchmark(self, authentication_class, token, num_requests):
+        """
+        Returns calls/sec of `authentication_class.authenticate` alone and of a
+        whole `GET /user/me/` authenticated with only `authentication_class`.
+        """
+        request = APIRequestFactory().get('/user/me/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        view = GetCurrentUserView.as_view(authentication_classes=[authentication_class])
+
+        def authenticate():
+            assert authentication_class().authenticate(Request(request)) is not None
+
+        def get():
+            response = view(request)
+            assert response.status_code == 200, response.data
+
+        return self._rate(authenticate, num_requests), self._rate(get, num_requests)
+
+    def handle(self, *args, **kwargs):
+        num_requests = kwargs.get('requests')
+        caches[getattr(settings, 'AUTH_TOKEN_CACHE_ALIAS', 'default')].clear()
+
+        # every row created here is rolled back
+        try:
+            with transaction.atomic():
+                user = User.objects.create(username='benchmark_auth',
+                                           email='benchmark_auth@hs.cm')
+                app = Application.objects.create(user=user, client_id='benchmark_auth')
+                expires_in = 3600
+                access_token = AccessToken.objects.create(
+                    user=user,
+                    scope='read write',
+                    expires=timezone.now() + timedelta(seconds=expires_in),
+                    token=common.generate_token(),
+                    application=app
+                )
+                signed_token = create_signed_token(user.pk, app.pk, 'read write', expires_in)
+
+                for authentication_class, token in (
+                        (OAuth2Authentication, access_token.token),
+                        (CachedOAuth2Authentication, access_token.token),
+                        (SignedTokenAuthentication, signed_token)):
+                    auth_rate, request_rate = self._benchmark(authentication_class, token,
+                                                              num_requests)
+                    print(f'{authentication_class.__name__}: {auth_rate:.0f} authentications/sec, '
+                          f'{request_rate:.0f} requests/sec')
+
+                raise Rollback()
+        except Rollback:
+            pass
@@ -0,0 +1,61 @@
+import time
+from django.core.management.base import BaseCommand
+
+from apps.globals.utils.bloom import BloomFilter
+from apps.user.constants import EMAIL_FILTER_ERROR_RATE
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the email Bloom filter with synthetic emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-n',
+            '--emails',
+            type=int,
+            default=10000000,
+            help='Number of emails in the filter'
+        )
+        parser.add_argument(
+            '-l',
+            '--lookups',
+            type=int,
+            default=1000000,
+            help='Number of lookups for registered and for unknown emails each'
+        )
+        parser.add_argument(
+            '-e',
+            '--error-rate',
+            type=float,
+            default=EMAIL_FILTER_ERROR_RATE,
+            help='Target false positive rate'
+        )
+
+    def _lookup_rate(self, bloom, emails):
+        started_at = time.perf_counter()
+        found = sum(email in bloom for email in emails)
+        return len(emails) / (time.perf_counter() - started_at), found
+
+    def handle(self, *args, **kwargs):
+        num_emails = kwargs.get('emails')
+        num_lookups = min(kwargs.get('lookups'), num_emails)
+        error_rate = kwargs.get('error_rate')
+
+        bloom = BloomFilter(capacity=num_emails, error_rate=error_rate)
+        started_at = time.perf_counter()
+        bloom.update(f'user{idx}@hs.cm' for idx in range(num_emails))
+        build_seconds = time.perf_counter() - started_at
+
+        print(f'Emails: {num_emails}, bits: {bloom.num_bits}, hashes: {bloom.num_hashes}, '
+              f'memory: {bloom.size_in_bytes() / 2 ** 20:.1f} MiB')
+        print(f'Build: {build_seconds:.1f}s ({num_emails / build_seconds:.0f} emails/sec)')
+
+        step = num_emails // num_lookups
+        registered_rate, _ = self._lookup_rate(
+            bloom, [f'user{idx}@hs.cm' for idx in range(0, num_emails, step)][:num_lookups])
+        unknown_rate, false_positives = self._lookup_rate(
+            bloom, [f'unknown{idx}@hs.cm' for idx in range(num_lookups)])
+
+        print(f'Registered lookups: {registered_rate:.0f}/sec')
+        print(f'Unknown lookups: {unknown_rate:.0f}/sec, false positive rate: '
+              f'{false_positives / num_lookups:.5f} (target {error_rate})')
@@ -0,0 +1,80 @@
+import math
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the configured PASSWORD_HASHERS and suggests work factors'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-r',
+            '--runs',
+            type=int,
+            default=5,
+            help='Hashes timed per hasher'
+        )
+        parser.add_argument(
+            '-t',
+            '--target-ms',
+            type=float,
+            default=250,
+            help='Target latency of one hash in milliseconds'
+        )
+
+    def _time_hash(self, hasher, runs):
+        """Returns the median milliseconds of `hasher.encode`
+        """
+        salt = hasher.salt()
+        timings = []
+        for _ in range(runs):
+            started_at = time.perf_counter()
+            hasher.encode('benchmark password', salt)
+            timings.append((time.perf_counter() - started_at) * 1000)
+        return statistics.median(timings)
+
+    def _suggest(self, hasher, latency_ms, target_ms):
+        ratio = target_ms / latency_ms
+        if isinstance(getattr(hasher, 'iterations', None), int):
+            return f'iterations {hasher.iterations} -> {round(hasher.iterations * ratio)}'
+        if isinstance(getattr(hasher, 'rounds', None), int):
+            # bcrypt's cost doubles with every round
+            return f'rounds {hasher.rounds} -> {hasher.rounds + round(math.log2(ratio))}'
+        if isinstance(getattr(hasher, 'time_cost', None), int):
+            return f'time_cost {hasher.time_cost} -> {max(round(hasher.time_cost * ratio), 1)}'
+        return 'no work factor to tune'
+
+    def _pool_throughput(self, hasher, workers, runs):
+        salt = hasher.salt()
+        num_hashes = workers * runs
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda _: hasher.encode('benchmark password', salt),
+                              range(num_hashes)))
+        return num_hashes / (time.perf_counter() - started_at)
+
+    def handle(self, *args, **kwargs):
+        runs = kwargs.get('runs')
+        target_ms = kwargs.get('target_ms')
+
+        for idx, hasher in enumerate(get_hashers()):
+            name = type(hasher).__name__
+            try:
+                latency_ms = self._time_hash(hasher, runs)
+            except ValueError as ex:
+                # library not installed
+                print(f'{name}: skipped ({ex})')
+                continue
+
+            default = ' (default)' if idx == 0 else ''
+            print(f'{name}{default}: {latency_ms:.1f}ms per hash, '
+                  f'{self._suggest(hasher, latency_ms, target_ms)} for {target_ms:.0f}ms')
+
+            if idx == 0:
+                workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', 2)
+                rate = self._pool_throughput(hasher, workers, runs)
+                print(f'  {workers} pool workers: {rate:.1f} hashes/sec')
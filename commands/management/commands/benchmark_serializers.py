@@ -0,0 +1,106 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.entities.models import Skill, Profession, Company, Job
+from apps.entities.serializers import JobSerializer, JobReadSerializer
+from apps.globals.serializers import ValuesSerializer
+from apps.user.models import User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks a page of jobs rendered by the model serializers '
+            'against their `ValuesSerializer`')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-n',
+            '--rows',
+            type=int,
+            default=100,
+            help='Number of jobs on the page'
+        )
+        parser.add_argument(
+            '-r',
+            '--runs',
+            type=int,
+            default=200,
+            help='Number of times each page is rendered'
+        )
+
+    def _create_jobs(self, num_rows):
+        poster = User.objects.create(username='benchmark_serializers',
+                                     email='benchmark_serializers@hs.cm')
+        skills = [Skill.objects.create(name=f'skill {idx}') for idx in range(5)]
+        for idx in range(num_rows):
+            company = Company.objects.create(
+                name=f'company {idx}', established_on=date(2000, 1, 1), about='about',
+                industry='software', size=10, phone='123', headquarters='hq', type='private',
+                logo=f'https://hs.cm/{idx}.png')
+            profession = Profession.objects.create(name=f'profession {idx}', industry='software')
+            job = Job.objects.create(
+                company=company, profession=profession, poster=poster,
+                description='description', end_date=timezone.now(), location='remote',
+                employment_type='full time', seniority_level='senior')
+            job.skills_required.set(skills)
+
+    def _milliseconds(self, func, num_runs):
+        func()
+        started_at = time.perf_counter()
+        for _ in range(num_runs):
+            func()
+        return (time.perf_counter() - started_at) / num_runs * 1000
+
+    def _benchmark(self, serializer_class, queryset, num_rows, num_runs):
+        """
+        Returns milliseconds per page for the model serializer and for its
+        `ValuesSerializer`, with the queries and rendering only.
+        """
+        queryset = queryset.order_by('-created_at', '-id')[:num_rows]
+        values_serializer = ValuesSerializer(serializer_class)
+        values_queryset = values_serializer.get_values_queryset(queryset)
+
+        instances = list(queryset)
+        rows = list(values_queryset)
+        plan = values_serializer.plan
+        related = plan.fetch_related(rows)
+        assert serializer_class(instances, many=True).data == values_serializer.serialize(rows)
+
+        return (
+            self._milliseconds(lambda: serializer_class(list(queryset.all()), many=True).data,
+                               num_runs),
+            self._milliseconds(lambda: values_serializer.serialize(values_queryset.all()),
+                               num_runs),
+            self._milliseconds(lambda: serializer_class(instances, many=True).data, num_runs),
+            self._milliseconds(lambda: [plan.build(row, related) for row in rows], num_runs),
+        )
+
+    def handle(self, *args, **kwargs):
+        num_rows = kwargs.get('rows')
+        num_runs = kwargs.get('runs')
+
+        # every row created here is rolled back
+        try:
+            with transaction.atomic():
+                self._create_jobs(num_rows)
+
+                for serializer_class, queryset in (
+                        (JobSerializer, Job.objects.prefetch_related('skills_required')),
+                        (JobReadSerializer, Job.get_all_with_relations())):
+                    model_ms, values_ms, model_render_ms, values_render_ms = self._benchmark(
+                        serializer_class, queryset, num_rows, num_runs)
+                    print(f'{serializer_class.__name__}, {num_rows} rows: '
+                          f'{model_ms:.2f} ms/page serializer, '
+                          f'{values_ms:.2f} ms/page values ({model_ms / values_ms:.1f}x); '
+                          f'rendering only {model_render_ms:.2f} ms vs '
+                          f'{values_render_ms:.2f} ms ({model_render_ms / values_render_ms:.1f}x)')
+
+                raise Rollback()
+        except Rollback:
+            pass
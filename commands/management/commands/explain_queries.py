@@ -0,0 +1,118 @@
+import re
+import uuid
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+from rest_framework.generics import GenericAPIView
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.globals.pagination import KeysetPagination
+from apps.user.models import User, AuthOTP
+
+# PostgreSQL and SQLite plans, a SQLite scan through an index is fine
+SEQUENTIAL_SCAN_PATTERNS = (
+    re.compile(r'Seq Scan on (\w+)'),
+    re.compile(r'\bSCAN (?:TABLE )?(?!TABLE\b)(\w+)\b(?!\s+USING)'),
+)
+
+# hot queries that are not a view's queryset
+EXTRA_QUERIES = {
+    'user exists by email': lambda: User.objects.filter(email='hs@hs.cm'),
+    'otp by email': lambda: AuthOTP.objects.filter(email='hs@hs.cm'),
+    'expired otps': lambda: AuthOTP.objects.filter(expires_at__lte=timezone.now()),
+}
+
+SAMPLE_URL_KWARGS = {
+    'int': 1,
+    'uuid': uuid.UUID(int=1),
+}
+
+
+class Command(BaseCommand):
+    help = ('Runs every generic view\'s queryset through EXPLAIN and flags sequential scans. '
+            'PostgreSQL plans depend on table statistics, so run it against realistic data')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-p',
+            '--plans',
+            action='store_true',
+            help='Print every plan, not only flagged ones'
+        )
+        parser.add_argument(
+            '-f',
+            '--fail',
+            action='store_true',
+            help='Exit with an error if any query scans a table sequentially'
+        )
+
+    def _iter_url_patterns(self, patterns, prefix=''):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from self._iter_url_patterns(pattern.url_patterns,
+                                                   prefix + str(pattern.pattern))
+            elif isinstance(pattern, URLPattern):
+                yield prefix + str(pattern.pattern), pattern
+
+    def _get_view_queryset(self, pattern: URLPattern):
+        view_class = getattr(pattern.callback, 'cls', None)
+        if not view_class or not issubclass(view_class, GenericAPIView):
+            return None
+
+        converters = getattr(pattern.pattern, 'converters', {})
+        kwargs = {
+            name: SAMPLE_URL_KWARGS.get(type(converter).__name__.replace('Converter', '').lower(),
+                                        'sample')
+            for name, converter in converters.items()
+        }
+
+        request = Request(APIRequestFactory().get('/'))
+        request.user = AnonymousUser()
+        view = view_class(request=request, args=(), kwargs=kwargs, format_kwarg=None)
+        queryset = view.get_queryset()
+
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        if lookup_url_kwarg in kwargs:
+            return queryset.filter(**{view.lookup_field: kwargs[lookup_url_kwarg]})
+
+        if view.pagination_class and issubclass(view.pagination_class, KeysetPagination):
+            queryset = queryset.order_by('-created_at', '-id')
+        return queryset[:KeysetPagination.page_size + 1]
+
+    def _sequential_scans(self, plan):
+        return sorted({
+            table
+            for pattern in SEQUENTIAL_SCAN_PATTERNS
+            for table in pattern.findall(plan)
+        })
+
+    def handle(self, *args, **kwargs):
+        queries = {}
+        for route, pattern in self._iter_url_patterns(get_resolver().url_patterns):
+            try:
+                queryset = self._get_view_queryset(pattern)
+            except Exception as ex:
+                print(f'{route}: skipped ({type(ex).__name__}: {ex})')
+                continue
+            if queryset is not None:
+                queries[route] = queryset
+        queries.update({name: get_queryset() for name, get_queryset in EXTRA_QUERIES.items()})
+
+        flagged = 0
+        for name, queryset in queries.items():
+            plan = queryset.explain()
+            tables = self._sequential_scans(plan)
+            if tables:
+                flagged += 1
+                print(f'{name}: sequential scan on {", ".join(tables)}')
+            else:
+                print(f'{name}: ok')
+
+            if tables or kwargs.get('plans'):
+                print('  ' + plan.replace('\n', '\n  '))
+
+        print(f'{flagged} of {len(queries)} queries scan sequentially')
+        if flagged and kwargs.get('fail'):
+            raise CommandError('Sequential scans found')
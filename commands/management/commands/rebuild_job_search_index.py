@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+
+from apps.entities.constants import SEARCH_REBUILD_BATCH_SIZE
+from apps.entities.search import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the job search index from the Job table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=int,
+            default=SEARCH_REBUILD_BATCH_SIZE,
+            help='Jobs read and written per batch'
+        )
+
+    def handle(self, *args, **kwargs):
+        started_at = time.perf_counter()
+        num_jobs = rebuild(batch_size=kwargs.get('batch_size'))
+        print(f'Indexed {num_jobs} jobs in {time.perf_counter() - started_at:.1f}s')
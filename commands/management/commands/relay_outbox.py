@@ -0,0 +1,51 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.user.constants import OUTBOX_BATCH_SIZE, OUTBOX_RELAY_INTERVAL_SECONDS
+from apps.user.outbox import relay_pending
+
+
+class Command(BaseCommand):
+    help = 'Publishes pending outbox messages to the broker until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help='Messages published per broker connection'
+        )
+        parser.add_argument(
+            '-i',
+            '--interval',
+            type=float,
+            default=OUTBOX_RELAY_INTERVAL_SECONDS,
+            help='Seconds to wait when the outbox is drained'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Publish what is pending and exit'
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs.get('batch_size')
+        interval = kwargs.get('interval')
+
+        while True:
+            try:
+                num_published = relay_pending(batch_size)
+            except Exception as ex:
+                # broker or DB hiccup, the batch stays pending
+                print(f'Relaying outbox failed: {ex}')
+                close_old_connections()
+                num_published = 0
+
+            if num_published:
+                print(f'Published {num_published} outbox messages')
+            if kwargs.get('once') and num_published < batch_size:
+                break
+            if num_published < batch_size:
+                time.sleep(interval)
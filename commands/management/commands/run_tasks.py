@@ -3,6 +3,15 @@ from django_celery_beat.models import CrontabSchedule, PeriodicTask
 
 ALL_TASKS = [
     'remove_expired_otps',
+    'remove_expired_access_tokens',
+    'remove_expired_refresh_tokens',
+    'remove_expired_grants',
+    'remove_stale_inactive_users',
+    'remove_expired_signed_token_revocations',
+    'relay_outbox',
+    'remove_published_outbox_messages',
+    'remove_old_sign_up_requests',
+    'remove_expired_document_uploads',
 ]
 
 
@@ -43,6 +52,21 @@ class Command(BaseCommand):
             help='List known tasks'
         )
 
+    def _get_or_create_task(self, task_name, task, crontab_config,
+                            override_existing_task=False):
+        periodic_task, _ = PeriodicTask.objects.get_or_create(
+            name=f'{task_name}'
+        )
+
+        if override_existing_task:
+            schedule, _ = CrontabSchedule.objects.get_or_create(
+                **crontab_config)
+            periodic_task.crontab = schedule
+            periodic_task.task = task
+            periodic_task.save()
+
+        return periodic_task
+
     def _remove_expired_otps(self, task_name, override_existing_task=False):
         """Delete expired tokens "Every week 6 AM" = "0 6 */7 * *"
         """
@@ -54,19 +78,134 @@ class Command(BaseCommand):
             'day_of_month': '*',
             'month_of_year': '*'
         }
+        return self._get_or_create_task(task_name, task, crontab_config,
+                                        override_existing_task)
 
-        periodic_task, _ = PeriodicTask.objects.get_or_create(
-            name=f'{task_name}'
-        )
+    def _remove_expired_access_tokens(self, task_name, override_existing_task=False):
+        """Delete expired access tokens "Every day 3 AM" = "0 3 * * *"
+        """
+        task = 'apps.user.tasks.remove_expired_access_tokens'
+        crontab_config = {
+            'minute': '0',
+            'hour': '3',
+            'day_of_week': '*',
+            'day_of_month': '*',
+            'month_of_year': '*'
+        }
+        return self._get_or_create_task(task_name, task, crontab_config,
+                                        override_existing_task)
 
-        if override_existing_task:
-            schedule, _ = CrontabSchedule.objects.get_or_create(
-                **crontab_config)
-            periodic_task.crontab = schedule
-            periodic_task.task = task
-            periodic_task.save()
+    def _remove_expired_refresh_tokens(self, task_name, override_existing_task=False):
+        """Delete expired refresh tokens "Every day 3:30 AM" = "30 3 * * *"
+        """
+        task = 'apps.user.tasks.remove_expired_refresh_tokens'
+        crontab_config = {
+            'minute': '30',
+            'hour': '3',
+            'day_of_week': '*',
+            'day_of_month': '*',
+            'month_of_year': '*'
+        }
+        return self._get_or_create_task(task_name, task, crontab_config,
+                                        override_existing_task)
 
-        return periodic_task
+    def _remove_expired_grants(self, task_name, override_existing_task=False):
+        """Delete expired grants "Every hour" = "15 * * * *"
+        """
+        task = 'apps.user.tasks.remove_expired_grants'
+        crontab_config = {
+            'minute': '15',
+            'hour': '*',
+            'day_of_week': '*',
+            'day_of_month': '*',
+            'month_of_year': '*'
+        }
+        return self._get_or_create_task(task_name, task, crontab_config,
+                                        override_existing_task)
+
+    def _remove_stale_inactive_users(self, task_name, override_existing_task=False):
+        """Delete never verified sign-ups "Every day 4 AM" = "0 4 * * *"
+        """
+        task = 'apps.user.tasks.remove_stale_inactive_users'
+        crontab_config = {
+            'minute': '0',
+            'hour': '4',
+            'day_of_week': '*',
+            'day_of_month': '*',
+            'month_of_year': '*'
+        }
+        return self._get_or_create_task(task_name, task, crontab_config,
+                                        override_existing_task)
+
+    def _remove_expired_signed_token_revocations(self, task_name, override_existing_task=False):
+        """Delete expired signed token revocations "Every day 3:45 AM" = "45 3 * * *"
+        """
+        task = 'apps.user.tasks.remove_expired_signed_token_revocations'
+        crontab_config = {
+            'minute': '45',
+            'hour': '3',
+            'day_of_week': '*',
+            'day_of_month': '*',
+            'month_of_year': '*'
+        }
+        return self._get_or_create_task(task_name, task, crontab_config,
+                                        override_existing_task)
+
+    def _relay_outbox(self, task_name, override_existing_task=False):
+        """Publish pending outbox messages "Every minute" = "* * * * *"
+        """
+        task = 'apps.user.tasks.relay_outbox'
+        crontab_config = {
+            'minute': '*',
+            'hour': '*',
+            'day_of_week': '*',
+            'day_of_month': '*',
+            'month_of_year': '*'
+        }
+        return self._get_or_create_task(task_name, task, crontab_config,
+                                        override_existing_task)
+
+    def _remove_published_outbox_messages(self, task_name, override_existing_task=False):
+        """Delete old published outbox messages "Every day 4:30 AM" = "30 4 * * *"
+        """
+        task = 'apps.user.tasks.remove_published_outbox_messages'
+        crontab_config = {
+            'minute': '30',
+            'hour': '4',
+            'day_of_week': '*',
+            'day_of_month': '*',
+            'month_of_year': '*'
+        }
+        return self._get_or_create_task(task_name, task, crontab_config,
+                                        override_existing_task)
+
+    def _remove_old_sign_up_requests(self, task_name, override_existing_task=False):
+        """Delete old sign-up requests "Every day 4:45 AM" = "45 4 * * *"
+        """
+        task = 'apps.user.tasks.remove_old_sign_up_requests'
+        crontab_config = {
+            'minute': '45',
+            'hour': '4',
+            'day_of_week': '*',
+            'day_of_month': '*',
+            'month_of_year': '*'
+        }
+        return self._get_or_create_task(task_name, task, crontab_config,
+                                        override_existing_task)
+
+    def _remove_expired_document_uploads(self, task_name, override_existing_task=False):
+        """Delete expired document uploads "Every day 5 AM" = "0 5 * * *"
+        """
+        task = 'apps.entities.tasks.remove_expired_document_uploads'
+        crontab_config = {
+            'minute': '0',
+            'hour': '5',
+            'day_of_week': '*',
+            'day_of_month': '*',
+            'month_of_year': '*'
+        }
+        return self._get_or_create_task(task_name, task, crontab_config,
+                                        override_existing_task)
 
     def _show_tasks(self):
         """Shows all known tasks using `ALL_TASKS` list